@@ -0,0 +1,50 @@
+"""gunicorn settings for the web process; gunicorn reads this file on start.
+
+The application is loaded once in the master and warmed up before the workers
+are forked, so they share its memory copy-on-write instead of each importing
+Django and the views. Workers are recycled after a jittered number of requests
+to cap slow memory growth without restarting them all at once.
+
+Everything can be overridden from the environment:
+
+    WEB_CONCURRENCY            worker processes (set by Heroku from the dyno size)
+    GUNICORN_THREADS           threads per worker; 1 uses the sync worker class
+    GUNICORN_MAX_REQUESTS      requests a worker serves before it is replaced, 0 for never
+    GUNICORN_TIMEOUT           seconds a request may take before its worker is killed
+"""
+import multiprocessing
+import os
+
+
+cpu_count = multiprocessing.cpu_count()
+
+# Most of a request is spent waiting on the database, so a few threads per
+# worker serve more requests than extra processes, for less memory.
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', min(2 * cpu_count, 8)))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = 5
+
+# Heartbeat files in memory, so a slow disk can never make a worker look dead
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Warm the preloaded application's caches; runs in the master before any worker is forked."""
+
+    from tasks.warmup import warm_up
+
+    warmed = warm_up()
+    server.log.info('Warmed %(url_names)d URL names and %(templates)d templates', warmed)
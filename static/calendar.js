@@ -56,6 +56,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 break; 
             }
         }
+        function escapeHtml(text) {
+            const element = document.createElement('div');
+            element.textContent = text;
+            return element.innerHTML;
+        }
+
         function getMoodEmoji(mood) {
             const moodEmojiMap = {
                 1: '😔', 
@@ -106,8 +112,13 @@ document.addEventListener('DOMContentLoaded', function() {
                                 entriesHtml += `
                                     <div class="journal-entry-box">
                                         <div class="journal-entry copy-div mt-4">
-                                            <h3 class="mt-4">${entry.title}</h3>
-                                            <p class="mt-4">${entry.text}</p>
+                                            <h3 class="mt-4">${escapeHtml(entry.title)}</h3>
+                                            <p class="mt-4">${escapeHtml(entry.excerpt)}</p>
+                                            <p class="mt-4">${entry.word_count} words · ${entry.reading_time} min read</p>
+                                            <details data-body-url="/entry_body/${entry.id}/">
+                                                <summary>Show Text</summary>
+                                                <div class="entry-body"></div>
+                                            </details>
                                             <p class="mt-4">Feeling: ${getMoodEmoji(entry.mood)}</p>
                                         </div>
                                     </div>
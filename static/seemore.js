@@ -1,12 +1,33 @@
+function loadEntryBody(element) {
+  const body = element.querySelector('.entry-body');
+  if (!element.dataset.bodyUrl || !body || element.dataset.bodyLoaded) {
+    return;
+  }
+  element.dataset.bodyLoaded = 'true';
+  fetch(element.dataset.bodyUrl)
+    .then(response => response.json())
+    .then(data => {
+      body.innerHTML = data.display_html;
+    })
+    .catch(error => {
+      delete element.dataset.bodyLoaded;
+      console.error('Error fetching journal entry:', error);
+    });
+}
+
 document.addEventListener('DOMContentLoaded', () => {
-  document.querySelectorAll('details').forEach((element) => {
+  // toggle does not bubble, so it is caught on the way down to cover cards added later, like the calendar's
+  document.addEventListener('toggle', (event) => {
+    const element = event.target;
+    if (!(element instanceof HTMLDetailsElement)) {
+      return;
+    }
     const summaryElement = element.querySelector('summary');
-    element.addEventListener('toggle', () => {
-      if (element.open) {
-        summaryElement.textContent = 'Hide Text';
-      } else {
-        summaryElement.textContent = 'Show Text';
-      }
-    });
-  });
+    if (element.open) {
+      summaryElement.textContent = 'Hide Text';
+      loadEntryBody(element);
+    } else {
+      summaryElement.textContent = 'Show Text';
+    }
+  }, true);
 });
@@ -53,14 +53,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.PerformanceInstrumentationMiddleware',
+    'tasks.middleware.QueryBudgetMiddleware',
+    'tasks.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'tasks.middleware.ReplicaRoutingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'task_manager.urls'
@@ -106,9 +110,93 @@ if IS_HEROKU_APP:
         'default': db_from_env
     }
 
-
-
-
+# A read replica such as a Heroku follower, read from by the read-heavy views through
+# tasks.db_routers. Locally, a copy of db.sqlite3 at DATABASE_REPLICA_URL=sqlite:///db.replica.sqlite3
+# stands in for one. In the tests it mirrors default.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600, test_options={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['tasks.db_routers.ReadReplicaRouter']
+# Seconds after a user's last write during which they keep reading from default, so they see their changes
+REPLICA_STICKY_SECONDS = 5
+
+
+
+
+
+
+# Request instrumentation
+# Every request is logged as a JSON line on the 'tasks.performance' logger and
+# aggregated into histograms served at /metrics/ to staff users.
+PERFORMANCE_LOG_REQUESTS = True
+PERFORMANCE_HISTOGRAMS = True
+
+# Maximum number of queries each view may run, checked by tasks.query_budget in the
+# tests and by QueryBudgetMiddleware when DEBUG is on. A query shape repeated more
+# than QUERY_BUDGET_MAX_REPEATS times in one request is reported as an N+1.
+QUERY_BUDGETS = {
+    'home': 2,
+    'log_in': 2,
+    'sign_up': 2,
+    'dashboard': 4,
+    'journal_log': 5,
+    'favourites': 5,
+    'templates': 4,
+    'trash': 6,
+    'avatar': 2,
+    'media': 0,
+    'empty_trash': 14,
+    'template_choices': 4,
+    'mood_breakdown': 8,
+    'export_mood_chart': 3,
+    'create_entry': 7,
+    'edit_entry': 5,
+    'profile': 3,
+    'password': 3,
+    'set_preferences': 4,
+    'edit_preferences': 4,
+    'delete_account': 3,
+    'get_journal_entries': 4,
+    'entry_body': 3,
+    'search_favouriteSuggestion': 3,
+    'delete_selected_entries': 4,
+    'export_entries': 3,
+    'export_journal_entry_to_pdf': 3,
+    'export_journal_entry_to_rtf': 3,
+}
+QUERY_BUDGET_MAX_REPEATS = 3
+
+# Rows deleted per statement when purging accounts, unseeding and emptying the trash
+PURGE_BATCH_SIZE = 1000
+
+# Entries and templates are permanently deleted this many days after being moved to the trash
+TRASH_RETENTION_DAYS = 30
+# Seconds each scheduled trash purge may spend before leaving the rest for its next run
+TRASH_PURGE_TIME_BUDGET = 60
+
+# Entries not changed for this many days have their bodies moved to the compressed archive, see tasks.archive
+ARCHIVE_AFTER_DAYS = 180
+# Entries archived per transaction, and seconds each scheduled run may spend
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_TIME_BUDGET = 60
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'tasks.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO' if IS_HEROKU_APP else 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation
@@ -152,8 +240,62 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Fingerprint, precompress and optimise static files at collectstatic time, so WhiteNoise can
+# serve them with immutable cache headers. Needs collectstatic, so it is off for local development.
+STATIC_MANIFEST = IS_HEROKU_APP or os.environ.get('STATIC_MANIFEST', 'false').lower() == 'true'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'tasks.storage.OptimisedStaticFilesStorage' if STATIC_MANIFEST
+                   else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# PNGs that are re-encoded and given a WebP variant by collectstatic
+STATIC_OPTIMISED_IMAGES = ['images/flower_stage_*.png', 'images/logo.png', 'images/pencil.png']
+# Largest width or height kept for those images, about three times their largest display size
+STATIC_IMAGE_MAX_DIMENSION = 480
+STATIC_WEBP_VARIANTS = STATIC_MANIFEST
+
 MEDIA_URL = '/images/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'static/images')
+# Seconds browsers may keep uploads, which never change when named by their content
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_MAX_AGE = 60 * 60
+
+# Downloads are streamed by Django unless DOWNLOAD_OFFLOAD hands them to the web server:
+# 'x-accel' for nginx, with an internal location at DOWNLOAD_ACCEL_PREFIX aliased to MEDIA_ROOT,
+# or 'x-sendfile' for Apache and lighttpd
+DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD') or None
+DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Part of every page ETag, so browsers never keep pages rendered by an earlier release. It
+# has to be the same in every worker and dyno of a release: an explicit RELEASE_VERSION baked
+# in at build time, or Heroku's release number or slug commit (with runtime dyno metadata on),
+# or the commit of the build. Without any of them it is left out of the ETag.
+RELEASE_VERSION = (
+    os.environ.get('RELEASE_VERSION') or os.environ.get('HEROKU_RELEASE_VERSION')
+    or os.environ.get('HEROKU_SLUG_COMMIT') or os.environ.get('SOURCE_VERSION') or ''
+)
+
+# Text responses at least this many bytes long are compressed by CompressionMiddleware,
+# with brotli when the browser accepts it and gzip otherwise
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+# Compressed responses are padded with up to this many random bytes, against BREACH
+COMPRESSION_MAX_RANDOM_BYTES = 100
+
+# Serve gravatars through the local avatar proxy instead of linking to gravatar.com
+AVATAR_PROXY = os.environ.get('AVATAR_PROXY', 'false').lower() == 'true'
+AVATAR_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'avatars')
+# Seconds before a cached avatar is fetched again from upstream
+AVATAR_CACHE_TTL = 60 * 60 * 24
+# Seconds browsers may keep an avatar without asking again
+AVATAR_BROWSER_MAX_AGE = 60 * 60 * 24 * 7
+AVATAR_UPSTREAM_FETCHER = 'tasks.avatars.fetch_gravatar'
+AVATAR_UPSTREAM_TIMEOUT = 5
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -195,7 +337,20 @@ CELERY_TIMEZONE = "Europe/London"
 
 REDIS_URL = os.environ.get('REDIS_URL')
 
+# Redis is also the shared cache when available, otherwise each process keeps its own in memory
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+# Seconds a rendered entry card is kept; an edited entry gets a new key straight away
+ENTRY_CARD_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
 CELERY_BROKER_URL = REDIS_URL
+# Without a broker, run tasks such as account purges in the request instead of queueing them
+CELERY_TASK_ALWAYS_EAGER = not REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_ACCEPT_CONTENT = ['application/json']
@@ -215,13 +370,38 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'tasks.tasks.reset_flower_growth_weekly',
         'schedule': crontab(minute=0, hour=0, day_of_week='sun'),# Run at the start of each week
     },
+    'purge_expired_trash': {
+        'task': 'tasks.tasks.purge_expired_trash',
+        'schedule': crontab(minute=0, hour=3),# Run daily at 3am
+    },
+    'collect_orphan_media': {
+        'task': 'tasks.tasks.collect_orphan_media',
+        'schedule': crontab(minute=30, hour=3),# Run daily at 3:30am
+    },
+    'archive_old_entries': {
+        'task': 'tasks.tasks.archive_old_entries',
+        'schedule': crontab(minute=0, hour=4),# Run daily at 4am
+    },
 
 }
 
 
 CKEDITOR_BASE_PATH = "/static/ckeditor/ckeditor/"
 CKEDITOR_UPLOAD_PATH = 'uploads/'
-CKEDITOR_IMAGE_BACKEND = "pillow"
+CKEDITOR_IMAGE_BACKEND = 'tasks.uploads.OptimisingImageBackend'
+CKEDITOR_STORAGE_BACKEND = 'tasks.storage.ContentAddressedStorage'
+# Seconds an upload is kept before it may be deleted for not being in any entry
+MEDIA_ORPHAN_GRACE_PERIOD = 60 * 60 * 24
+
+# Uploaded images are scaled, stripped of EXIF data and re-encoded, see tasks.uploads
+UPLOAD_IMAGE_FORMAT = 'WEBP'
+UPLOAD_IMAGE_QUALITY = 80
+UPLOAD_IMAGE_MAX_DIMENSION = 1600
+# Narrower copies offered to browsers through srcset
+UPLOAD_IMAGE_WIDTHS = [480, 960]
+# The JPEG copy used by PDF exports, about 8 inches at 300 dpi
+UPLOAD_PRINT_MAX_DIMENSION = 2400
+UPLOAD_PRINT_QUALITY = 90
 
 WHITENOISE_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
@@ -14,11 +14,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from tasks.views import PageViews, AuthViews, JournalEntryViews,TemplateViews,ExportViews
+from tasks.views import PageViews, AuthViews, JournalEntryViews,TemplateViews,ExportViews,MetricsViews,AvatarViews,MediaViews
 from ckeditor_uploader import views as ckeditor_views
 from django.contrib.auth.decorators import login_required
 
@@ -37,8 +37,10 @@ urlpatterns = [
     path('export_entries/', ExportViews.export_entries, name='export_entries'),
     path('favourites/',PageViews.favourites,name ='favourites'),
     path('mood_breakdown/',JournalEntryViews.mood_breakdown,name ='mood_breakdown'),
+    path('mood_breakdown/chart.png', JournalEntryViews.export_mood_chart, name='export_mood_chart'),
     path('templates/',PageViews.templates,name ='templates'),
     path('trash/',PageViews.trash,name ='trash'),
+    path('empty_trash/',PageViews.empty_trash,name ='empty_trash'),
     path('create_entry/', JournalEntryViews.CreateJournalEntryView.as_view(), name="create_entry"),
     path('delete_entry/<int:entry_id>', JournalEntryViews.delete_journal_entry, name="delete_entry"),
     path('delete_template/<int:template_id>',TemplateViews.delete_template,name = "delete_template"),
@@ -54,16 +56,18 @@ urlpatterns = [
     path('r^ckeditor/upload/', login_required(ckeditor_views.upload), name='ckeditor_upload'),
     path('edit/<int:pk>/', JournalEntryViews.JournalEntryUpdateView.as_view(), name='edit_entry'),
     path('get_journal_entries/', ExportViews.get_journal_entries, name='get_journal_entries'),
+    path('entry_body/<int:entry_id>/', ExportViews.entry_body, name='entry_body'),
     path('create_template/',PageViews.CreateTemplateView.as_view(),name = "create_template"),
     path('template_choices/',PageViews.template_choices,name = 'template_choices'),
     path('delete_selected_entries/', JournalEntryViews.delete_selected_entries, name='delete_selected_entries'),
     path('delete_account',AuthViews.delete_account,name = 'delete_account'),
     path('search-favourite/', JournalEntryViews.search_favourite, name='search_favourite'),
     path('search-favouritesuggestion/', JournalEntryViews.search_favouriteSuggestion, name='search_favouriteSuggestion'),
+    path('metrics/', MetricsViews.metrics, name='metrics'),
+    re_path(r'^avatar/(?P<digest>[0-9a-f]{32})/(?P<size>[0-9]+)/$', AvatarViews.avatar, name='avatar'),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), MediaViews.media, name='media'),
 
 
     ]
 
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from tasks.instrumentation import install_query_observer
+
+        connection_created.connect(install_query_observer, dispatch_uid='tasks.install_query_observer')
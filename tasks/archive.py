@@ -0,0 +1,78 @@
+"""Cold storage for old journal entries.
+
+Nearly every read is of the last few weeks of entries, but the bodies of years
+of them make up most of the journal entry table. archive_old_entries moves the
+HTML columns (text and display_html) of entries not changed for
+ARCHIVE_AFTER_DAYS into ArchivedEntry, compressed into a single blob with the
+codec of tasks.text_compression, and empties them in the entry's own row. The
+row keeps everything the list pages, calendar and mood charts read: the title,
+excerpt, reading stats, mood and dates, and plain_text for search. The hot table
+stays small enough for its pages and indexes to stay in memory.
+
+Archived entries read the same as any other where their HTML is needed:
+
+* JournalEntryQuerySet.with_bodies fills the HTML of archived entries in from
+  the archive, with one extra query, and only when a body column was loaded;
+  other querysets read the empty columns as they are stored;
+* JournalEntryQuerySet.search filters on the plain_text left in the row;
+* saving an archived entry leaves its body in the archive, unless the text was
+  edited, which brings the entry back out of it.
+
+Archiving does not touch updated_at, so cached cards and page ETags stay valid.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.models import ArchivedEntry, JournalEntry
+from tasks.text_compression import decompressed
+
+
+def archivable_entries(age_days=None):
+    age_days = age_days if age_days is not None else settings.ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=age_days)
+    # Trashed entries are left for purge_expired_trash
+    return JournalEntry._base_manager.filter(archived=False, deleted=False, updated_at__lt=cutoff)
+
+
+def archive_batch(entries, batch_size):
+    """Archive up to batch_size of entries in one transaction. Returns how many were archived."""
+
+    with transaction.atomic():
+        rows = list(entries.select_for_update().values_list('pk', *ArchivedEntry.BODY_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        bodies = {pk: dict(zip(ArchivedEntry.BODY_FIELDS, map(decompressed, body))) for pk, *body in rows}
+        ArchivedEntry.objects.bulk_create([
+            ArchivedEntry(entry_id=pk, body=ArchivedEntry.pack(body)) for pk, body in bodies.items()
+        ])
+        JournalEntry._base_manager.filter(pk__in=list(bodies)).update(
+            archived=True, **{field: '' for field in ArchivedEntry.BODY_FIELDS},
+        )
+    return len(rows)
+
+
+def archive_old_entries(age_days=None, batch_size=None, time_budget=None, progress=None):
+    """Move the bodies of entries not changed for age_days into the archive, batch_size entries at a time.
+
+    No new batch is started once time_budget seconds have passed, and whatever is
+    left is picked up by the next run. progress is called with the number of
+    entries archived so far after every batch. Returns the number archived.
+    """
+
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 200)
+    time_budget = time_budget if time_budget is not None else getattr(settings, 'ARCHIVE_TIME_BUDGET', 60)
+    entries = archivable_entries(age_days)
+    deadline = time.monotonic() + time_budget
+    archived = 0
+    while time.monotonic() < deadline:
+        count = archive_batch(entries, batch_size)
+        if not count:
+            break
+        archived += count
+        if progress:
+            progress(archived)
+    return archived
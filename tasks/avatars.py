@@ -0,0 +1,100 @@
+"""Gravatar URLs and the optional local avatar proxy.
+
+Gravatar URLs are memoised per email address and size, so the email is only
+hashed once and a changed email simply gets a new entry.
+
+With AVATAR_PROXY on, avatars are served from this site instead of gravatar.com.
+The avatar view fetches each image from upstream once, keeps it on disk in
+AVATAR_CACHE_DIR for AVATAR_CACHE_TTL seconds and sends it with long-lived cache
+headers. The upstream fetcher is AVATAR_UPSTREAM_FETCHER, so tests can swap in
+a local stand-in.
+"""
+import os
+import tempfile
+import time
+from functools import lru_cache
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from libgravatar import Gravatar
+
+
+DEFAULT_IMAGE = 'mp'
+MAX_SIZE = 512
+
+
+@lru_cache(maxsize=4096)
+def gravatar_digest(email):
+    return Gravatar(email).email_hash
+
+
+@lru_cache(maxsize=4096)
+def gravatar_url(email, size=120):
+    """Return the gravatar.com URL of an email's avatar."""
+    return Gravatar(email).get_image(size=size, default=DEFAULT_IMAGE)
+
+
+def avatar_url(email, size=120):
+    """Return the URL the site should use for an email's avatar."""
+
+    if getattr(settings, 'AVATAR_PROXY', False):
+        return reverse('avatar', args=[gravatar_digest(email), size])
+    return gravatar_url(email, size)
+
+
+def fetch_gravatar(digest, size):
+    """Fetch an avatar from gravatar.com and return (content type, image bytes)."""
+
+    url = f'https://www.gravatar.com/avatar/{digest}?s={size}&d={DEFAULT_IMAGE}'
+    with urlopen(url, timeout=getattr(settings, 'AVATAR_UPSTREAM_TIMEOUT', 5)) as response:
+        return response.headers.get_content_type(), response.read()
+
+
+def cache_path(digest, size):
+    return os.path.join(settings.AVATAR_CACHE_DIR, f'{digest}-{size}')
+
+
+def read_cached(path):
+    """Return (content type, image bytes, age in seconds) of a cached avatar, or None."""
+
+    try:
+        with open(path, 'rb') as cached:
+            content_type, body = cached.read().split(b'\n', 1)
+            age = time.time() - os.fstat(cached.fileno()).st_mtime
+    except (OSError, ValueError):
+        return None
+    return content_type.decode(), body, age
+
+
+def write_cached(path, content_type, body):
+    """Write an avatar to the cache atomically, so readers never see half a file."""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(descriptor, 'wb') as temporary:
+        temporary.write(content_type.encode() + b'\n' + body)
+    os.replace(temporary_path, path)
+
+
+def get_avatar(digest, size):
+    """Return (content type, image bytes) for an avatar, fetching it only when the cached copy has expired.
+
+    A stale copy is served if upstream cannot be reached.
+    """
+
+    path = cache_path(digest, size)
+    cached = read_cached(path)
+    if cached and cached[2] < settings.AVATAR_CACHE_TTL:
+        return cached[:2]
+
+    fetcher = import_string(settings.AVATAR_UPSTREAM_FETCHER)
+    try:
+        content_type, body = fetcher(digest, size)
+    except OSError:
+        if cached:
+            return cached[:2]
+        raise
+    write_cached(path, content_type, body)
+    return content_type, body
@@ -0,0 +1,214 @@
+"""Benchmarks of the core views and tasks against users with large histories.
+
+run_benchmarks seeds one user per history size and times each case against it.
+The results are plain dictionaries, so they can be written to JSON and compared
+between commits with compare_results. The benchmark management command runs them
+in a throwaway database.
+"""
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.context_processor import add_journal_streak
+from tasks.entry_text import process_entry_text
+from tasks.models import DEFAULT_TEMPLATES, FlowerGrowth, JournalEntry, User, UserPreferences
+from tasks.seeding import bulk_create_entries, random_body
+from tasks.text_compression import deflate, inflate
+from tasks.tasks import (
+    check_and_reset_growth_daily, check_and_trigger_reminder_emails, reset_flower_growth_weekly, send_reminder_emails,
+)
+
+
+class Benchmark:
+    """Time a callable over several rounds, in the style of pytest-benchmark's fixture.
+
+        benchmark = Benchmark(rounds=5)
+        benchmark(client.get, '/journal_log/')
+        benchmark.stats['median']
+    """
+
+    def __init__(self, rounds=5, warmup=1):
+        self.rounds = rounds
+        self.warmup = warmup
+        self.stats = None
+
+    def __call__(self, function, *args, **kwargs):
+        for _ in range(self.warmup):
+            function(*args, **kwargs)
+        timings = []
+        for _ in range(self.rounds):
+            started = time.perf_counter()
+            result = function(*args, **kwargs)
+            timings.append(time.perf_counter() - started)
+        self.stats = summarise(timings)
+        return result
+
+
+def summarise(timings):
+    return {
+        'rounds': len(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'mean': statistics.mean(timings),
+        'median': statistics.median(timings),
+        'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def create_benchmark_user(entry_count, username=None):
+    """Create a user with preferences, a flower and entry_count journal entries."""
+
+    username = username or f'@bench{entry_count}'
+    user = User.objects.create_user(
+        username=username,
+        email=f'{username[1:]}@example.org',
+        password='Password123',
+        first_name='Bench',
+        last_name='Mark',
+    )
+    UserPreferences.objects.create(user=user, journal_time=timezone.now().time())
+    FlowerGrowth.objects.create(user=user)
+    bulk_create_entries(user, entry_count)
+    return user
+
+
+def benchmark_cases(user, export_count):
+    """Return the (name, callable) pairs to time for a seeded user."""
+
+    client = Client()
+    client.force_login(user)
+    request = RequestFactory().get('/')
+    request.user = user
+    latest = JournalEntry.objects.filter(user=user).order_by('-created_at')
+    export_ids = ','.join(str(pk) for pk in latest.values_list('pk', flat=True)[:export_count])
+    busiest_day = latest.values_list('created_at', flat=True).first() or timezone.now()
+
+    def get(url, data=None):
+        return lambda: _check(client.get(url, data))
+
+    return [
+        ('journal_log', get(reverse('journal_log'))),
+        ('dashboard', get(reverse('dashboard'))),
+        ('mood_breakdown', get(reverse('mood_breakdown'))),
+        ('get_journal_entries', get(reverse('get_journal_entries'), {'date': busiest_day.date().isoformat()})),
+        ('export_entries_pdf', get(reverse('export_entries'), {'entries': export_ids, 'format': 'pdf'})),
+        ('export_entries_rtf', get(reverse('export_entries'), {'entries': export_ids, 'format': 'rtf'})),
+        ('add_journal_streak', lambda: add_journal_streak(request)),
+        ('task_check_and_trigger_reminder_emails', check_and_trigger_reminder_emails),
+        ('task_check_and_reset_growth_daily', check_and_reset_growth_daily),
+        ('task_reset_flower_growth_weekly', reset_flower_growth_weekly),
+    ]
+
+
+def _check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f'Benchmark request failed with status {response.status_code}.')
+    if response.streaming:
+        # Time sending the download too, not just setting it up
+        for _ in response.streaming_content:
+            pass
+        response.close()
+    return response
+
+
+def run_benchmarks(sizes, rounds=5, export_count=20, progress=None):
+    """Seed a user per history size and time every case against them."""
+
+    results = {}
+    with patch.object(send_reminder_emails, 'apply_async'):
+        for size in sizes:
+            user = create_benchmark_user(size)
+            for name, function in benchmark_cases(user, export_count):
+                benchmark = Benchmark(rounds=rounds)
+                benchmark(function)
+                results[f'{name}[{size}]'] = benchmark.stats
+                if progress:
+                    progress(f'{name}[{size}]', benchmark.stats)
+    return {'meta': environment(), 'results': results}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def compare_results(baseline, current, threshold=0.2, statistic='median'):
+    """Compare two result sets and return the cases that got slower than the threshold.
+
+    Each returned item is (name, baseline seconds, current seconds, relative change).
+    """
+
+    regressions = []
+    for name, stats in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name][statistic]
+        after = stats[statistic]
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            regressions.append((name, before, after, change))
+    return regressions
+
+
+def sample_entry_html(count, seed=None, generated=False):
+    """Return the text and display HTML of the latest count entries, or of as many generated ones if there are none."""
+
+    if not generated:
+        entries = JournalEntry.objects.filter(archived=False).order_by('-pk').only('text', 'display_html')[:count]
+        samples = [html for entry in entries for html in (entry.text, entry.display_html)]
+        if samples:
+            return samples
+    samples = []
+    rng = random.Random(seed)
+    questions = [template['questions'] for template in DEFAULT_TEMPLATES if template['questions']]
+    for _ in range(count):
+        text = random_body(rng)
+        # Half start with a template's questions, as the create entry page writes them
+        if rng.random() < 0.5:
+            text = f'<h1><strong><em>{rng.choice(questions).replace(",", "<br><br>")}</em></strong></h1>\r\n\r\n{text}'
+        samples += [text, process_entry_text(text).display_html]
+    return samples
+
+
+def benchmark_text_compression(samples, dictionaries, rounds=5):
+    """Compress every sample on its own with each preset dictionary, as CompressedTextField stores them.
+
+    dictionaries maps a name to a dictionary, or to None for plain deflate.
+    Returns, per name, the bytes before and after, the share saved, and the
+    median microseconds to encode and to decode one sample.
+    """
+
+    encoded = [sample.encode() for sample in samples]
+    raw_bytes = sum(map(len, encoded))
+    results = {}
+    for name, dictionary in dictionaries.items():
+        compressed = [deflate(data, dictionary) for data in encoded]
+        encode, decode = Benchmark(rounds=rounds), Benchmark(rounds=rounds)
+        encode(lambda: [deflate(data, dictionary) for data in encoded])
+        decode(lambda: [inflate(data, dictionary) for data in compressed])
+        # Two bytes of header, or one when stored as it is because that is smaller
+        stored_bytes = sum(min(len(data) + 2, len(original) + 1) for data, original in zip(compressed, encoded))
+        results[name] = {
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'saving': 1 - stored_bytes / raw_bytes if raw_bytes else 0.0,
+            'encode_us': encode.stats['median'] / len(samples) * 1e6,
+            'decode_us': decode.stats['median'] / len(samples) * 1e6,
+        }
+    return results
@@ -0,0 +1,82 @@
+"""Bring the database up to date when a new release is deployed.
+
+run_bootstrap is what the release phase runs, once per deploy, so web dynos
+start gunicorn straight away instead of migrating and seeding on every boot.
+It is safe to run any number of times, including from several dynos at once:
+
+* a lock serialises runs, a Postgres advisory lock where there is one;
+* migrations are only run when some are unapplied;
+* the sample data is only seeded when the fixture users do not exist yet;
+* when neither is needed, it returns without taking the lock.
+
+Both checks read the database itself, the applied migrations and the fixture
+users, so a database that was reset or restored is always brought up to date.
+"""
+import hashlib
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+LOCK_ID = int(hashlib.sha256(b'bloom-bootstrap').hexdigest()[:15], 16)
+
+
+@contextmanager
+def bootstrap_lock(database=DEFAULT_DB_ALIAS):
+    """Hold a lock no other bootstrap can take until this one is done.
+
+    Only Postgres has a lock shared between dynos; other databases are used by a
+    single machine, where runs are not expected to overlap.
+    """
+
+    connection = connections[database]
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [LOCK_ID])
+
+
+def unapplied_migrations(database=DEFAULT_DB_ALIAS):
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def is_seeded():
+    from tasks.management.commands.seed import user_fixtures
+    from tasks.models import User
+    return User.objects.filter(username__in=[data['username'] for data in user_fixtures]).exists()
+
+
+def run_bootstrap(seed=True, database=DEFAULT_DB_ALIAS, log=print):
+    """Migrate and seed the database if it needs it; return the steps that ran."""
+
+    if not unapplied_migrations(database) and (not seed or is_seeded()):
+        log('Database is up to date with this release.')
+        return []
+
+    # Another run may have done the work while this one waited for the lock
+    steps = []
+    with bootstrap_lock(database):
+        plan = unapplied_migrations(database)
+        if plan:
+            log(f'Applying {len(plan)} migrations.')
+            call_command('migrate', database=database, interactive=False, verbosity=0)
+            steps.append('migrate')
+        else:
+            log('No migrations to apply.')
+
+        if seed and not is_seeded():
+            log('Seeding sample data.')
+            call_command('seed')
+            steps.append('seed')
+        elif seed:
+            log('Sample data already seeded.')
+    return steps
@@ -0,0 +1,151 @@
+"""Content negotiation and streaming encoders for CompressionMiddleware.
+
+Brotli is preferred over gzip when the browser accepts both, as it makes HTML
+and JSON around a fifth smaller again. Both encoders can compress a response in
+one go or chunk by chunk. For a streaming response, each chunk is sent as soon
+as it is compressed, so the browser still receives it straight away.
+
+Against BREACH, every compressed response is padded with a random number of up
+to COMPRESSION_MAX_RANDOM_BYTES bytes, as Django's GZipMiddleware does, so its
+length no longer tells how well a guess at a secret in the page compressed. Gzip
+is Django's own compress_string, which puts the padding in the header as a
+random file name; brotli gets it as a metadata block, which decoders skip.
+"""
+import re
+import secrets
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Text types worth compressing; images, PDFs and archives are compressed already
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/rtf', 'application/xml', 'image/svg+xml',
+}
+
+_CODING = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Return the best encoding an Accept-Encoding header allows, or None to send the response as it is."""
+
+    supported = supported_encodings()
+    qualities = {}
+    for coding in (accept_encoding or '').lower().split(','):
+        match = _CODING.match(coding)
+        if match is None:
+            continue
+        name, quality = match.groups()
+        try:
+            qualities[name] = float(quality) if quality is not None else 1.0
+        except ValueError:
+            continue
+    default = qualities.get('*', 0)
+    best = max(supported, key=lambda name: qualities.get(name, default))
+    return best if qualities.get(best, default) > 0 else None
+
+
+def is_compressible(content_type):
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+
+
+def max_random_bytes():
+    return getattr(settings, 'COMPRESSION_MAX_RANDOM_BYTES', GZipMiddleware.max_random_bytes)
+
+
+def brotli_padding(max_random_bytes):
+    """Return a brotli metadata meta-block of 1 to max_random_bytes random bytes, at most 256."""
+
+    if not max_random_bytes:
+        return b''
+    length = secrets.randbelow(min(max_random_bytes, 256)) + 1
+    # ISLAST 0, MNIBBLES 3 for metadata, a reserved 0 bit, MSKIPBYTES 1 and
+    # MSKIPLEN - 1, then zero bits up to the byte boundary (RFC 7932, 9.2)
+    header = (3 << 1) | (1 << 4) | ((length - 1) << 6)
+    return header.to_bytes(2, 'little') + secrets.token_bytes(length)
+
+
+class GzipEncoder:
+    """Compress each chunk into a gzip member of its own, padded, as GZipMiddleware does for async streams."""
+
+    def compress(self, data):
+        return compress_string(data, max_random_bytes=max_random_bytes()) if data else b''
+
+    def flush(self):
+        return b''
+
+    def finish(self):
+        return b''
+
+
+class BrotliEncoder:
+
+    def __init__(self):
+        quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+        # Flushing first ends the stream header on a byte boundary, where a meta-block can start
+        self.pending = self.compressor.flush() + brotli_padding(max_random_bytes())
+
+    def compress(self, data):
+        output, self.pending = self.pending + self.compressor.process(data), b''
+        return output
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        output, self.pending = self.pending + self.compressor.finish(), b''
+        return output
+
+
+ENCODERS = {'gzip': GzipEncoder, 'br': BrotliEncoder}
+
+
+def compress(data, encoding):
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding, done):
+    """Compress an iterable of chunks, sending each one on; call done(input_bytes, output_bytes) at the end."""
+
+    encoder = ENCODERS[encoding]()
+    size = compressed_size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        data = encoder.compress(chunk) + encoder.flush()
+        compressed_size += len(data)
+        if data:
+            yield data
+    data = encoder.finish()
+    compressed_size += len(data)
+    yield data
+    done(size, compressed_size)
+
+
+async def compress_async_stream(chunks, encoding, done):
+    """The same as compress_stream, for the async iterator of a streaming response served under ASGI."""
+
+    encoder = ENCODERS[encoding]()
+    size = compressed_size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        data = encoder.compress(chunk) + encoder.flush()
+        compressed_size += len(data)
+        if data:
+            yield data
+    data = encoder.finish()
+    compressed_size += len(data)
+    yield data
+    done(size, compressed_size)
@@ -0,0 +1,116 @@
+"""Conditional GETs for the journal pages and the calendar JSON.
+
+conditional_page works out an ETag for a user's page before the view runs. If
+the browser's cached copy has the same ETag, the response is 304 Not Modified
+and the view never runs. The validator costs a single aggregate query over the
+user's entries. It changes whenever what the page shows can have changed:
+
+* the number of entries and their latest updated_at, as every edit, move to
+  the trash or recovery saves the entry, and hard deletes change the count;
+* the user's page_generation, bumped for the trashed templates, which have no
+  timestamp of their own, and the user's updated_at, for profile changes;
+* today's date, as streaks and the past month of moods move on each day;
+* the CSRF secret, so a cached form never posts an outdated token;
+* RELEASE_VERSION, a build identifier shared by every worker, so a deploy
+  never serves pages built by the old code.
+
+Pages showing flash messages are never given an ETag, so the message is not
+shown again from the browser's cache. Responses are marked private and no-cache,
+so browsers always ask before reusing their copy.
+"""
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from tasks.instrumentation import registry
+from tasks.models import JournalEntry
+
+
+def entry_summary(user):
+    return JournalEntry.objects.filter(user=user).aggregate(count=Count('id'), latest=Max('updated_at'))
+
+
+async def aentry_summary(user):
+    return await JournalEntry.objects.filter(user=user).aaggregate(count=Count('id'), latest=Max('updated_at'))
+
+
+def is_conditional(request):
+    """Whether a request can be answered from the browser's cache: a GET or HEAD with no flash messages to show."""
+
+    return request.method in ('GET', 'HEAD') and not len(get_messages(request))
+
+
+def page_validators(request, summary):
+    """Return the ETag and Last-Modified time of a user's page, given the summary of their entries."""
+
+    user = request.user
+    parts = [
+        settings.RELEASE_VERSION, request.get_full_path(), user.pk, user.page_generation, user.updated_at.isoformat(),
+        summary['count'], summary['latest'].isoformat() if summary['latest'] else '',
+        timezone.localdate().isoformat(), request.META.get('CSRF_COOKIE', ''),
+    ]
+    etag = 'W/"%s"' % hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+    last_modified = max(filter(None, (summary['latest'], user.updated_at)))
+    return etag, last_modified
+
+
+def conditional_response(request, etag):
+    """Return a 304 response when the browser's copy is current, or None to run the view.
+
+    Only the ETag is compared, as a page can change without anything being
+    modified later than Last-Modified, such as when the day changes.
+    """
+
+    response = get_conditional_response(request, etag=etag)
+    match = request.resolver_match
+    labels = {'view': match.view_name if match else 'unresolved', 'result': 'modified' if response is None else 'not_modified'}
+    registry.increment('http_conditional_requests_total', labels, help='Conditional page requests by whether the page had changed.')
+    return response
+
+
+def add_validators(request, response, summary):
+    """Give a page its validators; worked out again, as rendering a form sets the CSRF secret of a new visitor."""
+
+    etag, last_modified = page_validators(request, summary)
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if response.status_code == 200:
+            response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(view_function):
+    """Decorator for the views of a user's pages, sync or async, answering 304 when the page has not changed.
+
+    Goes inside login_required, as the validators need the logged in user.
+    """
+
+    if iscoroutinefunction(view_function):
+        @wraps(view_function)
+        async def modified_view_function(request, *args, **kwargs):
+            if not await sync_to_async(is_conditional)(request):
+                return await view_function(request, *args, **kwargs)
+            summary = await aentry_summary(request.user)
+            etag, _ = page_validators(request, summary)
+            response = conditional_response(request, etag) or await view_function(request, *args, **kwargs)
+            return add_validators(request, response, summary)
+        return modified_view_function
+
+    @wraps(view_function)
+    def modified_view_function(request, *args, **kwargs):
+        if not is_conditional(request):
+            return view_function(request, *args, **kwargs)
+        summary = entry_summary(request.user)
+        etag, _ = page_validators(request, summary)
+        response = conditional_response(request, etag) or view_function(request, *args, **kwargs)
+        return add_validators(request, response, summary)
+    return modified_view_function
@@ -0,0 +1,148 @@
+"""Routing reads of the read-heavy views to a read replica.
+
+Any alias in DATABASES that mirrors default in the tests, as set up from
+DATABASE_REPLICA_URL in the settings, is treated as a read replica of it:
+
+    DATABASES['replica'] = {..., 'TEST': {'MIRROR': 'default'}}
+
+Only views decorated with read_replica read from a replica; everything else,
+and every write, goes to default. A replica lags behind default, so a user who
+saved something in the last REPLICA_STICKY_SECONDS keeps reading from default
+and sees their own changes. ReplicaRoutingMiddleware notes the time of each
+request that wrote in the user's session; a view that writes reads from default
+for the rest of its request.
+
+Without a replica configured, the router leaves every query on default.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from tasks.instrumentation import registry
+
+
+LAST_WRITE_SESSION_KEY = '_last_write_at'
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_aliases():
+    return [
+        alias for alias, database in settings.DATABASES.items()
+        if (database.get('TEST') or {}).get('MIRROR') == DEFAULT_DB_ALIAS
+    ]
+
+
+class RoutingState:
+    """Where the reads of the current request may go, and whether it has written."""
+
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+    def activate(self):
+        return _routing.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _routing.reset(token)
+
+    @staticmethod
+    def current():
+        return _routing.get()
+
+
+class ReadReplicaRouter:
+    """Send reads to a replica when the current view allows it, and everything else to default."""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def pick_replica(self):
+        return random.choice(self.replicas)
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas:
+            return None
+        state = RoutingState.current()
+        if state is not None and state.use_replica and not state.wrote:
+            return self.pick_replica()
+        # An instance read from a replica would otherwise take its related objects from there too
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if not self.replicas:
+            return None
+        state = RoutingState.current()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas copy default's schema, they are never migrated themselves
+        return False if db in self.replicas else None
+
+
+def recently_wrote(request):
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    last_write = session.get(LAST_WRITE_SESSION_KEY, 0)
+    return time.time() - last_write < getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def record_routing(request, use_replica):
+    match = request.resolver_match
+    labels = {'view': match.view_name if match else 'unresolved', 'database': 'replica' if use_replica else 'primary'}
+    registry.increment('db_read_routing_total', labels, help='Requests of read-heavy views by the database they read from.')
+
+
+def read_replica(view_function):
+    """Decorator for read-heavy views, sync or async, letting their reads go to a replica.
+
+    Reads stay on default for users who wrote within REPLICA_STICKY_SECONDS.
+    Without a replica the session is left alone, so views that never load it,
+    such as the exports, still do not.
+    Goes inside login_required, so the user is loaded from default.
+    """
+
+    if iscoroutinefunction(view_function):
+        @wraps(view_function)
+        async def modified_view_function(request, *args, **kwargs):
+            state = RoutingState.current()
+            if state is None or not replica_aliases():
+                return await view_function(request, *args, **kwargs)
+            state.use_replica = not await sync_to_async(recently_wrote)(request)
+            record_routing(request, state.use_replica)
+            try:
+                return await view_function(request, *args, **kwargs)
+            finally:
+                state.use_replica = False
+        return modified_view_function
+
+    @wraps(view_function)
+    def modified_view_function(request, *args, **kwargs):
+        state = RoutingState.current()
+        if state is None or not replica_aliases():
+            return view_function(request, *args, **kwargs)
+        state.use_replica = not recently_wrote(request)
+        record_routing(request, state.use_replica)
+        try:
+            return view_function(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+    return modified_view_function
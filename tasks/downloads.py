@@ -0,0 +1,139 @@
+"""Streamed file downloads with HTTP range support.
+
+file_response sends an open file through FileResponse, which reads it
+DOWNLOAD_CHUNK_SIZE bytes at a time, or hands it to the WSGI server's sendfile,
+so a download is never held in memory as a whole. Range requests are answered
+with 206 Partial Content, so browsers can resume downloads and seek in media.
+
+serve_file does the same for a file on disk. When DOWNLOAD_OFFLOAD is set, it
+instead tells the web server in front of Django to send the file, with nginx's
+X-Accel-Redirect or the X-Sendfile header of Apache and lighttpd, so the worker
+does not read the file at all.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Return the first and last byte, inclusive, a Range header asks for.
+
+    Returns None when the whole file should be sent, as the header is missing or
+    not a single byte range. Raises RangeNotSatisfiable when the range starts
+    past the end of the file.
+    """
+
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    if last and int(last) < int(first):
+        return None
+    if int(first) >= size:
+        raise RangeNotSatisfiable
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+class RangeFile:
+    """Read-only view of length bytes of a file from start, for FileResponse to stream."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_response(request, file, size, filename='', as_attachment=False, content_type=None, last_modified=None):
+    """Return a FileResponse streaming an open file, or the part of it asked for by a Range header.
+
+    The response closes the file once it has been sent. If-Range is honoured
+    when last_modified, a timestamp, is given.
+    """
+
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and (last_modified is None or parse_http_date_safe(if_range) != int(last_modified)):
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment, filename=filename, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), as_attachment=as_attachment,
+                                filename=filename, content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response.block_size = getattr(settings, 'DOWNLOAD_CHUNK_SIZE', 64 * 1024)
+    response['Accept-Ranges'] = 'bytes'
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def offload_response(path, root, filename='', as_attachment=False, content_type=None):
+    """Return an empty response telling the web server to send the file at path, or None when offloading is off."""
+
+    offload = getattr(settings, 'DOWNLOAD_OFFLOAD', None)
+    if not offload:
+        return None
+    filename = filename or os.path.basename(path)
+    response = HttpResponse(content_type=content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    if disposition := content_disposition_header(as_attachment, filename):
+        response['Content-Disposition'] = disposition
+    if offload == 'x-accel':
+        relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.DOWNLOAD_ACCEL_PREFIX + relative_path
+    elif offload == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        raise ValueError(f"DOWNLOAD_OFFLOAD must be 'x-accel' or 'x-sendfile', not {offload!r}")
+    return response
+
+
+def serve_file(request, path, root, filename='', as_attachment=False, content_type=None):
+    """Return a response sending the file at path, which must be inside root.
+
+    Raises FileNotFoundError when there is no such file.
+    """
+
+    stat = os.stat(path)
+    response = offload_response(path, root, filename, as_attachment, content_type)
+    if response is None:
+        response = file_response(request, open(path, 'rb'), stat.st_size, filename or os.path.basename(path),
+                                 as_attachment, content_type, stat.st_mtime)
+    else:
+        response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,88 @@
+"""Cached rendering of the journal entry cards on the list pages.
+
+Each card is cached under the entry's id and updated_at, so any change saved to
+an entry gives it a new key and the old card is simply never read again. Bulk
+updates must therefore also set updated_at. The keys also include the card
+template's fingerprint, so a changed template never serves old markup, and the
+static files manifest's, as cards link to hashed static file names.
+
+A page looks all its cards up with a single get_many and only renders the ones
+that are missing. Hits and misses are counted per card variant in the metrics
+registry, along with each page's hit ratio.
+
+Cards only show an entry's excerpt and reading stats; the body is fetched from
+the entry_body endpoint when a card is opened, so the text columns are never
+loaded for a list page.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from tasks.instrumentation import RATIO_BUCKETS, registry
+
+
+CARD_TEMPLATES = {
+    'log': 'partials/list_entries.html',
+    'favourite': 'partials/favourite_entry.html',
+    'trash': 'partials/trash_entry.html',
+}
+# Columns the cards never show
+DEFERRED_FIELDS = ('text', 'display_html', 'plain_text')
+
+
+@lru_cache(maxsize=None)
+def template_fingerprint(template_name):
+    source = get_template(template_name).template.source
+    return hashlib.md5(source.encode()).hexdigest()[:8]
+
+
+def static_fingerprint():
+    """Return a fingerprint of the static file URLs, which change when collectstatic renames an asset."""
+    version = f"{settings.STATIC_URL}:{getattr(staticfiles_storage, 'manifest_hash', '')}"
+    return hashlib.md5(version.encode()).hexdigest()[:8]
+
+
+def card_cache_key(entry, variant, static_version=None):
+    fingerprint = template_fingerprint(CARD_TEMPLATES[variant])
+    static_version = static_version or static_fingerprint()
+    return f'entry-card:{variant}:{fingerprint}:{static_version}:{entry.pk}:{entry.updated_at.timestamp()}'
+
+
+def render_entry_cards(entries, variant):
+    """Set entry.card to the rendered card of every entry, rendering only those not cached."""
+
+    if isinstance(entries, QuerySet):
+        entries = entries.defer(*DEFERRED_FIELDS)
+    entries = list(entries)
+    static_version = static_fingerprint()
+    keys = {card_cache_key(entry, variant, static_version): entry for entry in entries}
+    cards = cache.get_many(keys)
+
+    missing = {}
+    if len(cards) < len(keys):
+        template = get_template(CARD_TEMPLATES[variant])
+        for key, entry in keys.items():
+            if key not in cards:
+                missing[key] = template.render({'entry': entry})
+        cache.set_many(missing, getattr(settings, 'ENTRY_CARD_CACHE_TIMEOUT', None))
+        cards.update(missing)
+
+    for entry in entries:
+        entry.card = mark_safe(cards[card_cache_key(entry, variant, static_version)])
+    record_hits(variant, len(keys) - len(missing), len(missing))
+    return entries
+
+
+def record_hits(variant, hits, misses):
+    labels = {'variant': variant}
+    registry.increment('entry_card_cache_hits_total', labels, hits, help='Entry cards served from the cache.')
+    registry.increment('entry_card_cache_misses_total', labels, misses, help='Entry cards rendered because they were not cached.')
+    if hits or misses:
+        registry.observe('entry_card_cache_hit_ratio', hits / (hits + misses), labels, buckets=RATIO_BUCKETS,
+                         help='Share of the entry cards on a page served from the cache.')
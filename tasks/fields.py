@@ -0,0 +1,70 @@
+"""Model fields for the tasks app."""
+from ckeditor_uploader.fields import RichTextUploadingField
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from tasks.text_compression import CompressedText, compress_text
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decompress the field's value the first time it is read, and keep the text.
+
+    Has __set__, so reads go through __get__ even once the value is in the
+    instance's __dict__.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[self.field.attname] = value.decompress()
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextMixin:
+    """Store a text field compressed in a binary column, see tasks.text_compression.
+
+    Loaded values stay compressed until read, so rows whose text is never shown
+    cost no decompression. A value saved back unread is written as it was
+    loaded, without compressing it again. Values from values() and values_list()
+    are CompressedText; tasks.text_compression.decompressed turns them into text.
+    The column can only be compared for equality, not searched.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def pre_save(self, model_instance, add):
+        # Reading the attribute would decompress a value that was never read
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, CompressedText):
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if isinstance(value, CompressedText):
+            return bytes(value)
+        value = super().get_prep_value(value)
+        return None if value is None else compress_text(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return None if value is None else connection.Database.Binary(value)
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else CompressedText(value)
+
+
+class CompressedTextField(CompressedTextMixin, models.TextField):
+    pass
+
+
+class CompressedRichTextField(CompressedTextMixin, RichTextUploadingField):
+    pass
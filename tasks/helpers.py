@@ -1,12 +1,30 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import redirect
 
 def login_prohibited(view_function):
     """Decorator for view functions that redirect users away if they are logged in."""
-    
+
     def modified_view_function(request):
         if request.user.is_authenticated:
             return redirect(settings.REDIRECT_URL_WHEN_LOGGED_IN)
         else:
             return view_function(request)
-    return modified_view_function
\ No newline at end of file
+    return modified_view_function
+
+def async_login_required(view_function):
+    """Decorator for async view functions that redirect users to log in if they are not logged in.
+
+    login_required cannot wrap coroutine views on Django 4.2, and request.user is
+    loaded lazily from the database, so it is resolved in a thread first.
+    """
+
+    @wraps(view_function)
+    async def modified_view_function(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_function(request, *args, **kwargs)
+    return modified_view_function
@@ -0,0 +1,218 @@
+"""Per request performance measurements.
+
+The instrumentation middleware opens a RequestMetrics for every request. Database
+queries are timed through observe_query and template rendering through a wrapper
+around Template.render. The finished measurements are logged as JSON and
+aggregated into the in-process registry, which the metrics view exposes in the
+Prometheus text format.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+
+from django.db import connections
+from django.template.base import Template
+
+
+_current_metrics = ContextVar('request_metrics', default=None)
+_query_observers = ContextVar('query_observers', default=())
+
+
+class RequestMetrics:
+    """Measurements collected while handling a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    def activate(self):
+        return _current_metrics.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_metrics.reset(token)
+
+    @staticmethod
+    def current():
+        """Return the metrics of the request being handled, if any."""
+        return _current_metrics.get()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper that counts and times every query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += time.perf_counter() - started
+
+
+def observe_query(execute, sql, params, many, context):
+    """Execute wrapper, on every connection, that passes each query through the observers of its context.
+
+    Connections belong to a thread, and the async ORM runs its queries on a
+    worker thread's connection. The observers are kept in a context variable,
+    which follows the request onto that thread, rather than on the connection.
+    """
+    for observer in reversed(_query_observers.get()):
+        execute = partial(observer, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_observer(connection, **kwargs):
+    """connection_created receiver adding observe_query to a connection, once."""
+    if observe_query not in connection.execute_wrappers:
+        # First, so connection.execute_wrapper blocks still pop their own wrapper
+        connection.execute_wrappers.insert(0, observe_query)
+
+
+@contextmanager
+def observing_queries(observer):
+    """Pass every query run in the current context to observer, an execute wrapper, while the block runs."""
+    for connection in connections.all():
+        install_query_observer(connection)
+    token = _query_observers.set((*_query_observers.get(), observer))
+    try:
+        yield observer
+    finally:
+        _query_observers.reset(token)
+
+
+def install_template_timer():
+    """Wrap Template.render once so that rendering time is added to the current request.
+
+    Included templates are rendered inside their parent, so only the outermost
+    render is timed.
+    """
+    if getattr(Template.render, '_timed', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, context):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return render(self, context)
+        metrics._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if metrics._template_depth == 0:
+                metrics.template_time += time.perf_counter() - started
+
+    timed_render._timed = True
+    Template.render = timed_render
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class Histogram:
+    """Cumulative histogram in the shape Prometheus expects."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread safe store of labelled histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+
+    def observe(self, name, value, labels=None, buckets=DURATION_BUCKETS, help=''):
+        key = (name, _freeze(labels))
+        with self._lock:
+            self._help.setdefault(name, ('histogram', help))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels=None, amount=1, help=''):
+        key = (name, _freeze(labels))
+        with self._lock:
+            self._help.setdefault(name, ('counter', help))
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter_value(self, name, labels=None):
+        with self._lock:
+            return self._counters.get((name, _freeze(labels)), 0)
+
+    def histogram(self, name, labels=None):
+        with self._lock:
+            return self._histograms.get((name, _freeze(labels)))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._help.clear()
+
+    def render_prometheus(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            for name in sorted(self._help):
+                kind, help = self._help[name]
+                if help:
+                    lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                if kind == 'counter':
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(float(bound))),))} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+            return '\n'.join(lines) + '\n'
+
+
+def _freeze(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tasks.archive import archive_old_entries
+
+
+class Command(BaseCommand):
+    """Move the bodies of old journal entries into the archive, without the time budget of the scheduled task."""
+
+    help = 'Archives journal entries not changed for ARCHIVE_AFTER_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive entries not changed for this many days, defaults to ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, help='Entries archived per transaction, defaults to ARCHIVE_BATCH_SIZE')
+
+    def handle(self, *args, **options):
+        archived = archive_old_entries(options['days'], options['batch_size'], float('inf'), self.report_progress)
+        self.stdout.write(f"Archived {archived} journal entries.                ")
+
+    def report_progress(self, archived):
+        self.stdout.write(f"Archived {archived} journal entries", ending='\r')
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tasks.benchmarks import compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    """Time the core views and tasks against users with large journal histories.
+
+    Runs in a throwaway test database, so the development data is never touched.
+
+        python manage.py benchmark --sizes 10,1000,10000 --output after.json --compare before.json
+    """
+
+    help = 'Benchmarks the core views and Celery tasks with large synthetic datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000', help='Comma separated journal entry counts per user')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--export-count', type=int, default=20, help='Number of entries in each export')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to check for regressions')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Fail when a median is this much slower than the baseline (0.2 is 20%%)')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of numbers.')
+
+        test_database = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(sizes, options['rounds'], options['export_count'], progress=self.report)
+        finally:
+            connection.creation.destroy_test_db(test_database, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = compare_results(baseline, results, options['threshold'])
+            for name, before, after, change in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms (+{change:.0%})'
+                ))
+            if regressions:
+                raise CommandError(f'{len(regressions)} benchmark(s) regressed by more than {options["threshold"]:.0%}.')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def report(self, name, stats):
+        self.stdout.write(f"{name:<50} median {stats['median'] * 1000:9.2f} ms   min {stats['min'] * 1000:9.2f} ms")
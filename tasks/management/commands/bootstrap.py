@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tasks.bootstrap import run_bootstrap
+
+
+class Command(BaseCommand):
+    """Migrate and seed the database when a release needs it; run by the release phase.
+
+        python manage.py bootstrap
+        python manage.py bootstrap --no-seed
+    """
+
+    help = 'Applies migrations and seeds the database, skipping whatever is already done'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-seed', action='store_false', dest='seed', help='Do not seed the sample data')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        run_bootstrap(seed=options['seed'], database=options['database'], log=self.stdout.write)
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmarks import benchmark_text_compression, environment, sample_entry_html
+from tasks.text_compression import CURRENT_DICTIONARY, DICTIONARIES, train_dictionary
+
+
+class Command(BaseCommand):
+    """Report how much the stored journal entry HTML shrinks, and what decoding it costs.
+
+    Compares plain deflate, the current preset dictionary and one trained on half
+    of the sample, all measured on the other half. Reads the latest entries, or
+    generated ones with --generated or when the database has none.
+
+        python manage.py compression_benchmark --sample 2000 --write-dictionary trained.bin
+    """
+
+    help = 'Benchmarks the compression of journal entry HTML'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=1000, help='Number of entries to sample')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--generated', action='store_true', help='Sample generated entries, not the database')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for generated entries')
+        parser.add_argument('--write-dictionary', help='Write the trained dictionary to this file')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['sample'] < 2:
+            raise CommandError('--sample must be at least 2.')
+        samples = sample_entry_html(options['sample'], options['seed'], options['generated'])
+        half = len(samples) // 2
+        training, measured = samples[:half], samples[half:]
+        trained = train_dictionary(training)
+
+        results = benchmark_text_compression(measured, {
+            'deflate': None,
+            f'dictionary v{CURRENT_DICTIONARY}': DICTIONARIES[CURRENT_DICTIONARY],
+            'trained dictionary': trained,
+        }, options['rounds'])
+
+        self.stdout.write(f'{len(measured)} HTML values, {len(trained)} byte trained dictionary')
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22} {result['raw_bytes']:>10} -> {result['stored_bytes']:>10} bytes "
+                f"({result['saving']:6.1%} saved)   encode {result['encode_us']:7.1f} us   "
+                f"decode {result['decode_us']:7.1f} us per value"
+            )
+
+        if options['write_dictionary']:
+            with open(options['write_dictionary'], 'wb') as output:
+                output.write(trained)
+            self.stdout.write(f"Trained dictionary written to {options['write_dictionary']}")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'meta': environment(), 'results': results}, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
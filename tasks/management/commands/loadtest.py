@@ -0,0 +1,155 @@
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.cookies import SimpleCookie
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.startup import worker_memory
+
+
+ENDPOINTS = {
+    'calendar': lambda: f'/get_journal_entries/?date={date.today().isoformat()}',
+    'autocomplete': lambda: '/search-favouritesuggestion/?q=a',
+}
+
+
+class Command(BaseCommand):
+    """Fire concurrent calendar and autocomplete requests at a running server.
+
+    Used to compare the gunicorn sync workers with the ASGI server, e.g.
+
+        gunicorn task_manager.wsgi --workers 1
+        uvicorn task_manager.asgi:application --workers 1
+        python manage.py loadtest --concurrency 200 --requests 2000
+
+    Given the pid of the gunicorn master, it also reports the memory of each
+    worker after the run, to compare configurations such as preload_app:
+
+        python manage.py loadtest --server-pid $(pgrep -of 'gunicorn task_manager')
+    """
+
+    help = 'Measures throughput and latency of the JSON endpoints on a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--username', default='@johndoe')
+        parser.add_argument('--password', default='Password123')
+        parser.add_argument('--endpoint', choices=[*ENDPOINTS, 'mixed'], default='mixed')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--server-pid', type=int, help='Report the memory of the workers of this gunicorn master')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        self.base_url = options['base_url'].rstrip('/')
+        self.timeout = options['timeout']
+        self.cookie_header = self.log_in(options['username'], options['password'])
+
+        endpoints = list(ENDPOINTS) if options['endpoint'] == 'mixed' else [options['endpoint']]
+        paths = [ENDPOINTS[endpoints[i % len(endpoints)]]() for i in range(options['requests'])]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(self.timed_get, paths))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for ok, latency in results if ok]
+        summary = {
+            'endpoint': options['endpoint'],
+            'concurrency': options['concurrency'],
+            'requests': len(results),
+            'errors': sum(1 for ok, _ in results if not ok),
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(results) / elapsed, 1),
+            **summarise_latencies(latencies),
+        }
+        if options['server_pid']:
+            summary.update(summarise_memory(worker_memory(options['server_pid'])))
+
+        self.stdout.write(json.dumps(summary, indent=2))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(summary, output, indent=2)
+
+    def log_in(self, username, password):
+        """Log in through the normal form and return the Cookie header for the session."""
+
+        cookies = SimpleCookie()
+        with urllib.request.urlopen(self.base_url + '/log_in/', timeout=self.timeout) as response:
+            cookies.load(', '.join(response.headers.get_all('Set-Cookie') or []))
+        if 'csrftoken' not in cookies:
+            raise CommandError('The log in page did not set a CSRF cookie.')
+
+        body = urllib.parse.urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': cookies['csrftoken'].value,
+        }).encode()
+        request = urllib.request.Request(self.base_url + '/log_in/', data=body, headers={
+            'Cookie': f"csrftoken={cookies['csrftoken'].value}",
+            'Referer': self.base_url + '/log_in/',
+        })
+        opener = urllib.request.build_opener(NoRedirectHandler)
+        try:
+            opener.open(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            cookies.load(', '.join(error.headers.get_all('Set-Cookie') or []))
+        if 'sessionid' not in cookies:
+            raise CommandError(f'Could not log in as {username}.')
+        return '; '.join(f'{name}={morsel.value}' for name, morsel in cookies.items())
+
+    def timed_get(self, path):
+        request = urllib.request.Request(self.base_url + path, headers={'Cookie': self.cookie_header})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except OSError:
+            ok = False
+        return ok, time.perf_counter() - started
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Stop at the log in redirect so the session cookie can be read from it."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def summarise_latencies(latencies):
+    """Return the latency percentiles in milliseconds."""
+
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    latencies = sorted(latencies)
+
+    def percentile(fraction):
+        return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+
+    return {
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+def summarise_memory(workers):
+    """Return the number of workers and their mean resident, proportional and private memory in MB."""
+
+    if not workers:
+        return {'workers': 0}
+    return {
+        'workers': len(workers),
+        **{
+            f'worker_{field}': round(sum(worker[field] for worker in workers) / len(workers), 1)
+            for field in ('rss_mb', 'pss_mb', 'uss_mb')
+        },
+    }
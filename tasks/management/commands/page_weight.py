@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from tasks.benchmarks import create_benchmark_user
+from tasks.page_weight import measure_page
+
+
+PAGES = ['home', 'log_in', 'dashboard', 'journal_log', 'favourites', 'templates', 'trash', 'mood_breakdown', 'create_entry']
+
+
+class Command(BaseCommand):
+    """Report the total transfer size of the main pages and the static assets they load.
+
+    Runs in a throwaway test database, as a user with a few journal entries.
+
+        python manage.py page_weight --budget 500
+    """
+
+    help = 'Measures the bytes transferred to show each page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', default=','.join(PAGES), help='Comma separated URL names')
+        parser.add_argument('--budget', type=float, help='Fail when a page transfers more than this many KB')
+        parser.add_argument('--output', help='Write the measurements to this JSON file')
+        parser.add_argument('--verbose-assets', action='store_true', help='List every asset of each page')
+
+    def handle(self, *args, **options):
+        test_database = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = create_benchmark_user(20, username='@pageweight')
+            client = Client()
+            results = []
+            for name in options['pages'].split(','):
+                if name in ('home', 'log_in'):
+                    client.logout()
+                else:
+                    client.force_login(user)
+                results.append(measure_page(client, reverse(name)))
+        finally:
+            connection.creation.destroy_test_db(test_database, verbosity=0)
+
+        over_budget = []
+        for result in results:
+            kilobytes = result['transfer_bytes'] / 1024
+            self.stdout.write(
+                f"{result['url']:<20} {kilobytes:9.1f} KB   html {result['html_transfer_bytes'] / 1024:7.1f} KB   "
+                f"{len(result['assets'])} assets   {len(result['external'])} external"
+            )
+            if options['verbose_assets']:
+                for asset in result['assets']:
+                    self.stdout.write(f"    {asset['url']:<60} {asset['transfer_bytes'] / 1024:9.1f} KB")
+            if options['budget'] and kilobytes > options['budget']:
+                over_budget.append(result['url'])
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+        if over_budget:
+            raise CommandError(f"Over the {options['budget']} KB budget: {', '.join(over_budget)}")
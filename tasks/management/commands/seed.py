@@ -1,11 +1,13 @@
 from django.core.management.base import BaseCommand, CommandError
 
 from tasks.models import User,Template,JournalEntry
+from tasks.seeding import bulk_seed, parse_mood_weights
 
 from random import randint, random
 import pytz
 from faker import Faker
 from django.conf import settings
+from django.db import IntegrityError
 from django.utils import timezone
 from datetime import timedelta
 
@@ -30,11 +32,48 @@ class Command(BaseCommand):
         super().__init__(*args, **kwargs)
         self.faker = Faker('en_GB')
 
+    def add_arguments(self, parser):
+        parser.add_argument('--bulk', action='store_true', help='Generate a large load-testing dataset')
+        parser.add_argument('--users', type=int, default=100, help='Users to create in bulk mode')
+        parser.add_argument('--entries-per-user', type=int, default=100)
+        parser.add_argument('--days', type=int, default=365, help='Spread entries over this many past days')
+        parser.add_argument('--moods', default='1:1,2:2,3:4,4:3,5:2', help='Mood weights, e.g. 1:1,2:2,3:4,4:3,5:2')
+        parser.add_argument('--body-words', type=int, default=60, help='Words in each entry body')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating entry rows')
+
     def handle(self, *args, **options):
+        if options['bulk']:
+            self.bulk_seed(options)
+            return
         self.create_users()
         self.create_doe_journal_entries()
         self.users = User.objects.all()
 
+    def bulk_seed(self, options):
+        try:
+            mood_weights = parse_mood_weights(options['moods'])
+        except ValueError:
+            raise CommandError('--moods must look like 1:1,2:2,3:4,4:3,5:2')
+        for option in ('users', 'entries_per_user', 'batch_size', 'workers'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+
+        user_ids = bulk_seed(
+            options['users'],
+            options['entries_per_user'],
+            Command.DEFAULT_PASSWORD,
+            days=options['days'],
+            mood_weights=mood_weights,
+            body_words=options['body_words'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=self.report_progress,
+        )
+        print(f"Bulk seeding complete: {len(user_ids)} users, {len(user_ids) * options['entries_per_user']} entries.")
+
+    def report_progress(self, stage, done, total):
+        print(f"Seeding {stage} {done}/{total}", end='\r' if done < total else '\n')
 
     def create_users(self):
         self.generate_user_fixtures()
@@ -50,8 +89,8 @@ class Command(BaseCommand):
         user_count = User.objects.count()
         while  user_count < self.USER_COUNT:
             print(f"Seeding user {user_count}/{self.USER_COUNT}", end='\r')
-            self.generate_user()
-            user_count = User.objects.count()
+            if self.generate_user():
+                user_count += 1
         print("User seeding complete.      ")
 
     def generate_user(self):
@@ -59,13 +98,14 @@ class Command(BaseCommand):
         last_name = self.faker.last_name()
         email = create_email(first_name, last_name)
         username = create_username(first_name, last_name)
-        self.try_create_user({'username': username, 'email': email, 'first_name': first_name, 'last_name': last_name})
+        return self.try_create_user({'username': username, 'email': email, 'first_name': first_name, 'last_name': last_name})
        
     def try_create_user(self, data):
         try:
             self.create_user(data)
-        except:
-            pass
+        except IntegrityError:
+            return False
+        return True
 
     def create_user(self, data):
         User.objects.create_user(
@@ -91,18 +131,22 @@ class Command(BaseCommand):
             "My New Years Resolutiosn"
         ]
         
+            entries = []
             for user in [john_doe, jane_doe]:
                 for _ in range(3): 
                     title = self.faker.text(max_nb_chars=25)
                     text = self.faker.text(max_nb_chars=200) 
                     mood = 3
 
-                    JournalEntry.objects.create(
+                    entry = JournalEntry(
                         user=user,
                         title=title,
                         text=text,
                         mood=mood,
                     )
+                    entry.process_text()
+                    entries.append(entry)
+            JournalEntry.objects.bulk_create(entries)
 
 
 
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.startup import profile_startup
+
+
+class Command(BaseCommand):
+    """Report how long a fresh worker takes to boot, how much memory it holds and its slowest imports.
+
+        python manage.py startup_profile --runs 5 --budget-ms 1500 --max-rss-mb 120
+    """
+
+    help = 'Measures the cold boot time and baseline memory of a worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Boots to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list')
+        parser.add_argument('--budget-ms', type=float, help='Fail when booting takes longer than this')
+        parser.add_argument('--max-rss-mb', type=float, help='Fail when a booted worker holds more memory than this')
+        parser.add_argument('--output', help='Write the measurements to this JSON file')
+
+    def handle(self, *args, **options):
+        result = profile_startup(options['runs'])
+
+        self.stdout.write(
+            f"Cold boot {result['wall_ms']:.0f} ms   imports {result['import_ms']:.0f} ms   "
+            f"max RSS {result['max_rss_mb']:.1f} MB   (median of {result['runs']})"
+        )
+        for name, microseconds in result['slowest_imports'][:options['top']]:
+            self.stdout.write(f"    {name:<40} {microseconds / 1000:9.1f} ms")
+        if result['heavy_modules']:
+            self.stdout.write(f"Imported at boot: {', '.join(result['heavy_modules'])}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2)
+
+        failures = []
+        if options['budget_ms'] and result['wall_ms'] > options['budget_ms']:
+            failures.append(f"boot took {result['wall_ms']:.0f} ms, over the {options['budget_ms']:.0f} ms budget")
+        if options['max_rss_mb'] and result['max_rss_mb'] > options['max_rss_mb']:
+            failures.append(f"RSS is {result['max_rss_mb']:.1f} MB, over the {options['max_rss_mb']:.0f} MB limit")
+        if failures:
+            raise CommandError('; '.join(failures))
@@ -1,13 +1,21 @@
 from django.core.management.base import BaseCommand, CommandError
 from tasks.models import User,Template
+from tasks.purge import purge
 
 class Command(BaseCommand):
     """Build automation command to unseed the database."""
     
-    help = 'Seeds the database with sample data'
+    help = 'Removes the sample data from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per statement, defaults to PURGE_BATCH_SIZE')
 
     def handle(self, *args, **options):
         """Unseed the database."""
 
-        User.objects.filter(is_staff=False).delete()
-        Template.objects.all().delete()
\ No newline at end of file
+        purge(User.objects.filter(is_staff=False), options['batch_size'], progress=self.report_progress)
+        purge(Template.objects.all(), options['batch_size'], progress=self.report_progress)
+        print("Unseeding complete.                              ")
+
+    def report_progress(self, label, deleted):
+        print(f"Deleted {deleted} {label} rows", end='\r')
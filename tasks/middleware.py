@@ -0,0 +1,265 @@
+"""Middleware for the tasks app."""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+from tasks.compression import choose_encoding, compress, compress_async_stream, compress_stream, is_compressible
+from tasks.db_routers import LAST_WRITE_SESSION_KEY, RoutingState
+from tasks.instrumentation import (
+    COUNT_BUCKETS, RATIO_BUCKETS, SIZE_BUCKETS, RequestMetrics, install_template_timer, observing_queries,
+    registry,
+)
+from tasks.query_budget import QueryRecorder
+
+logger = logging.getLogger('tasks.performance')
+
+
+class HybridMiddleware:
+    """Base for middleware that runs sync or async, whichever the rest of the chain is.
+
+    Under ASGI, a sync only middleware makes Django run every request on a
+    thread and wrap async views in async_to_sync. Subclasses define __call__
+    for WSGI and __acall__ for ASGI, and __call__ hands over to __acall__ when
+    the middleware was built async, as django.utils.deprecation.MiddlewareMixin does.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+class PerformanceInstrumentationMiddleware(HybridMiddleware):
+    """Measure every request and report it as a JSON log line and as histograms.
+
+    Records the view name, wall time, number and duration of database queries,
+    template rendering time and response size. Logging and the histograms are
+    switched on with PERFORMANCE_LOG_REQUESTS and PERFORMANCE_HISTOGRAMS.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        install_template_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        try:
+            with observing_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            RequestMetrics.deactivate(token)
+
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        try:
+            with observing_queries(metrics):
+                response = await self.get_response(request)
+        finally:
+            RequestMetrics.deactivate(token)
+
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        measurements = {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(metrics.elapsed() * 1000, 2),
+            'db_queries': metrics.query_count,
+            'db_time_ms': round(metrics.query_time * 1000, 2),
+            'template_time_ms': round(metrics.template_time * 1000, 2),
+            'response_bytes': size,
+        }
+
+        if getattr(settings, 'PERFORMANCE_LOG_REQUESTS', True):
+            logger.info(json.dumps(measurements))
+
+        if getattr(settings, 'PERFORMANCE_HISTOGRAMS', True):
+            labels = {'view': view}
+            registry.observe('http_request_duration_seconds', metrics.elapsed(), labels,
+                             help='Wall time spent handling the request.')
+            registry.observe('http_request_db_queries', metrics.query_count, labels, buckets=COUNT_BUCKETS,
+                             help='Database queries run while handling the request.')
+            registry.observe('http_request_db_seconds', metrics.query_time, labels,
+                             help='Time spent waiting on the database.')
+            registry.observe('http_request_template_seconds', metrics.template_time, labels,
+                             help='Time spent rendering templates.')
+            if size is not None:
+                registry.observe('http_response_size_bytes', size, labels, buckets=SIZE_BUCKETS,
+                                 help='Size of the response body.')
+
+
+class QueryBudgetMiddleware(HybridMiddleware):
+    """Warn about N+1 queries and views going over their QUERY_BUDGETS while developing.
+
+    Only active when DEBUG is on. Tests enforce the same budgets with query_budget.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def check(self, request, recorder):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if budget is not None and recorder.count > budget:
+            logger.warning(f"{view} ran {recorder.count} queries, over its budget of {budget}:\n{recorder.report()}")
+        repeated = recorder.repeated_shapes(getattr(settings, 'QUERY_BUDGET_MAX_REPEATS', 3))
+        for shape, count in repeated:
+            logger.warning(f"{view or request.path} repeated a query {count} times, possible N+1: {shape}")
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Compress text responses with brotli or gzip, whichever the browser prefers.
+
+    Responses of COMPRESSION_MIN_SIZE bytes or more are compressed whole;
+    streaming responses are compressed chunk by chunk as they are sent. Files
+    (exports, uploads and static files) are left alone, so Content-Length and
+    byte ranges keep working, as are types that are compressed already, such as
+    PDF and PNG. The compressed size as a share of the original is recorded per
+    view and encoding.
+
+    Pages reflect what is in the URL, such as a search, next to private journal
+    text, which BREACH can guess at from the compressed size. Every compressed
+    response is padded with random bytes, as GZipMiddleware does, see
+    tasks.compression.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unresolved', 'encoding': encoding}
+        if response.streaming:
+            def done(size, compressed_size):
+                record_compression(labels, size, compressed_size)
+
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoding, done)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding, done)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+                return response
+            compressed = compress(response.content, encoding)
+            record_compression(labels, len(response.content), len(compressed))
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed body is no longer byte for byte what a strong ETag promises
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def should_compress(self, response):
+        return (
+            not isinstance(response, FileResponse)
+            and response.status_code not in (204, 206, 304)
+            and not response.has_header('Content-Encoding')
+            and not response.has_header('Content-Range')
+            and is_compressible(response.get('Content-Type'))
+        )
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Track whether each request writes to the database, for ReadReplicaRouter.
+
+    The time of a request that wrote is kept in the user's session, so their
+    next few requests read from default rather than a replica that may lag.
+    Goes after SessionMiddleware.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = state.activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            RoutingState.deactivate(token)
+
+        if state.wrote and hasattr(request, 'session'):
+            self.remember_write(request)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = state.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            RoutingState.deactivate(token)
+
+        if state.wrote and hasattr(request, 'session'):
+            # Loading the session can query its backend
+            await sync_to_async(self.remember_write)(request)
+        return response
+
+    def remember_write(self, request):
+        request.session[LAST_WRITE_SESSION_KEY] = time.time()
+
+
+def record_compression(labels, size, compressed_size):
+    if not size or not getattr(settings, 'PERFORMANCE_HISTOGRAMS', True):
+        return
+    registry.observe('http_response_compression_ratio', compressed_size / size, labels, buckets=RATIO_BUCKETS,
+                     help='Compressed size of a response as a share of its original size.')
+    registry.increment('http_response_compression_saved_bytes_total', labels, max(size - compressed_size, 0),
+                       help='Bytes saved by compressing responses.')
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:51
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_deleted_at(apps, schema_editor):
+    """Start the retention period of items already in the trash from their last change."""
+    JournalEntry = apps.get_model('tasks', 'JournalEntry')
+    Template = apps.get_model('tasks', 'Template')
+    JournalEntry.objects.filter(deleted=True, deleted_at__isnull=True).update(deleted_at=F('updated_at'))
+    Template.objects.filter(deleted=True, deleted_at__isnull=True).update(deleted_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='template',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_deleted_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,201 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:03
+
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.db import migrations, models
+
+
+# Copied from tasks.entry_text as it was when this migration was written, so later
+# changes to how entries are processed never change what this migration does
+
+EXCERPT_LENGTH = 200
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'font', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i',
+    'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'tbody', 'td',
+    'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Tags removed together with everything inside them
+DROPPED_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'title', 'head'}
+BLOCK_TAGS = {
+    'blockquote', 'br', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'ol', 'p', 'pre', 'table', 'tr', 'ul',
+}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'style', 'title'},
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'font': {'color', 'face', 'size'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+ALLOWED_STYLES = {
+    'background-color', 'color', 'font-family', 'font-size', 'font-style', 'font-weight', 'height', 'margin-left',
+    'text-align', 'text-decoration', 'width',
+}
+
+_URL_SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+# Browsers ignore whitespace and control characters in a URL, so "java\tscript:" is still javascript:
+_URL_IGNORED_CHARACTERS = re.compile(r'[\x00-\x20\x7f]+')
+_UNSAFE_STYLE_VALUE = re.compile(r'url\s*\(|expression\s*\(|javascript:|[<>\\]', re.IGNORECASE)
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES = re.compile(r'\s*\n\s*')
+
+def is_safe_url(url):
+    match = _URL_SCHEME.match(_URL_IGNORED_CHARACTERS.sub('', url))
+    return match is None or match.group(1).lower() in ALLOWED_URL_SCHEMES
+
+
+def clean_style(style):
+    declarations = []
+    for declaration in style.split(';'):
+        name, _, value = declaration.partition(':')
+        name, value = name.strip().lower(), value.strip()
+        if name in ALLOWED_STYLES and value and not _UNSAFE_STYLE_VALUE.search(value):
+            declarations.append(f'{name}: {value}')
+    return '; '.join(declarations)
+
+
+class EntryTextParser(HTMLParser):
+    """Rebuild HTML from an allowlist while collecting its plain text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag not in ALLOWED_TAGS:
+            return
+        self.html.append(f'<{tag}{self.clean_attributes(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def clean_attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            if name == 'style':
+                value = clean_style(value)
+                if not value:
+                    continue
+            cleaned.append(f' {name}="{escape(value)}"')
+        if tag == 'a' and any(name == 'target' for name, _ in attrs):
+            cleaned.append(' rel="noopener noreferrer"')
+        return ''.join(cleaned)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f'</{self.open_tags.pop()}>')
+
+
+def to_plain_text(fragments):
+    text = _SPACES.sub(' ', ''.join(fragments).replace('\xa0', ' '))
+    return _BLANK_LINES.sub('\n', text).strip()
+
+
+def make_excerpt(plain_text, length=EXCERPT_LENGTH):
+    """Return the start of the text, cut at a word boundary, on a single line."""
+
+    text = ' '.join(plain_text.split())
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(' ', 1)[0] or text[:length]
+    return cut.rstrip(' .,;:') + '…'
+
+
+def process_entry_text(raw_html):
+    """Return the sanitised HTML, plain text and excerpt of an entry's raw HTML."""
+
+    parser = EntryTextParser()
+    parser.feed(raw_html or '')
+    parser.close()
+    plain_text = to_plain_text(parser.text)
+    return ''.join(parser.html), plain_text, make_excerpt(plain_text)
+
+
+def backfill_entry_text(apps, schema_editor):
+    """Process the text of existing entries in batches."""
+    JournalEntry = apps.get_model('tasks', 'JournalEntry')
+    batch = []
+    for entry in JournalEntry.objects.only('pk', 'text').iterator(chunk_size=1000):
+        entry.display_html, entry.plain_text, entry.excerpt = process_entry_text(entry.text)
+        batch.append(entry)
+        if len(batch) == 1000:
+            JournalEntry.objects.bulk_update(batch, ['display_html', 'plain_text', 'excerpt'])
+            batch = []
+    JournalEntry.objects.bulk_update(batch, ['display_html', 'plain_text', 'excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_trash_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='display_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_entry_text, migrations.RunPython.noop),
+    ]
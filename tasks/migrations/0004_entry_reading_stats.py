@@ -0,0 +1,50 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+# Copied from tasks.entry_text, so later changes to it never change what this migration does
+WORDS_PER_MINUTE = 200
+
+
+def count_words(plain_text):
+    return len(plain_text.split())
+
+
+def reading_time(word_count, words_per_minute=WORDS_PER_MINUTE):
+    return -(-word_count // words_per_minute)
+
+
+def backfill_reading_stats(apps, schema_editor):
+    """Count the words of existing entries from their stored plain text, in batches."""
+    JournalEntry = apps.get_model('tasks', 'JournalEntry')
+    batch = []
+    for entry in JournalEntry.objects.only('pk', 'plain_text').iterator(chunk_size=1000):
+        entry.word_count = count_words(entry.plain_text)
+        entry.reading_time = reading_time(entry.word_count)
+        batch.append(entry)
+        if len(batch) == 1000:
+            JournalEntry.objects.bulk_update(batch, ['word_count', 'reading_time'])
+            batch = []
+    JournalEntry.objects.bulk_update(batch, ['word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_entry_text_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_reading_stats, migrations.RunPython.noop),
+    ]
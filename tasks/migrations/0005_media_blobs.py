@@ -0,0 +1,71 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:16
+
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Copied from tasks.uploads, so later changes to it never change what this migration does
+class ImageSourceParser(HTMLParser):
+    """Collect the src of every <img>, wherever the attribute is in the tag."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sources = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            src = dict(attrs).get('src')
+            if src:
+                self.sources.append(src)
+
+
+def uploaded_names(display_html):
+    parser = ImageSourceParser()
+    parser.feed(display_html)
+    parser.close()
+    prefix = settings.MEDIA_URL + settings.CKEDITOR_UPLOAD_PATH
+    return {src[len(settings.MEDIA_URL):] for src in parser.sources if src.startswith(prefix)}
+
+
+def link_entry_media(apps, schema_editor):
+    """Record the uploads existing entries show, and link the entries to them."""
+    JournalEntry = apps.get_model('tasks', 'JournalEntry')
+    MediaBlob = apps.get_model('tasks', 'MediaBlob')
+    Media = JournalEntry.media.through
+    # The editor writes other attributes before src, so only the URL itself is looked for
+    prefix = f'{settings.MEDIA_URL}{settings.CKEDITOR_UPLOAD_PATH}'
+    entries = JournalEntry.objects.filter(display_html__contains=prefix).only('pk', 'display_html')
+    for entry in entries.iterator(chunk_size=1000):
+        names = uploaded_names(entry.display_html)
+        MediaBlob.objects.bulk_create([MediaBlob(name=name) for name in names], ignore_conflicts=True)
+        Media.objects.bulk_create([
+            Media(journalentry_id=entry.pk, mediablob_id=pk)
+            for pk in MediaBlob.objects.filter(name__in=names).values_list('pk', flat=True)
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_entry_reading_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='media',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='entries', to='tasks.mediablob'),
+        ),
+        migrations.RunPython(link_entry_media, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='page_generation',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
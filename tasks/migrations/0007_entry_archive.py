@@ -0,0 +1,56 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Trigram indexes serve the icontains lookups of JournalEntryQuerySet.search, which
+# compare the UPPER of each column
+SEARCH_INDEXES = {
+    'tasks_entry_title_trgm': 'title',
+    'tasks_entry_plain_text_trgm': 'plain_text',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON tasks_journalentry USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_user_page_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEntry',
+            fields=[
+                ('entry', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='tasks.journalentry')),
+                ('body', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='archived',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(condition=models.Q(('archived', False), ('deleted', False)), fields=['updated_at'], name='tasks_entry_archivable_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
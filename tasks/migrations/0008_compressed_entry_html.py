@@ -0,0 +1,76 @@
+import ckeditor_uploader.fields
+from django.db import migrations
+
+import tasks.fields
+
+
+COMPRESSED_FIELDS = {'text': 'text_compressed', 'display_html': 'display_html_compressed'}
+BATCH_SIZE = 500
+
+
+def copy_bodies(apps, schema_editor, source, target):
+    JournalEntry = apps.get_model('tasks', 'JournalEntry')
+    entries = JournalEntry.objects.using(schema_editor.connection.alias).only('pk', *source)
+    batch = []
+    for entry in entries.iterator(chunk_size=BATCH_SIZE):
+        for source_field, target_field in zip(source, target):
+            setattr(entry, target_field, getattr(entry, source_field))
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            JournalEntry.objects.bulk_update(batch, target)
+            batch = []
+    JournalEntry.objects.bulk_update(batch, target)
+
+
+def compress_bodies(apps, schema_editor):
+    copy_bodies(apps, schema_editor, list(COMPRESSED_FIELDS), list(COMPRESSED_FIELDS.values()))
+
+
+def decompress_bodies(apps, schema_editor):
+    copy_bodies(apps, schema_editor, list(COMPRESSED_FIELDS.values()), list(COMPRESSED_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_entry_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='text_compressed',
+            field=tasks.fields.CompressedRichTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='display_html_compressed',
+            field=tasks.fields.CompressedTextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(compress_bodies, decompress_bodies),
+        # Lets the column be added back with a value when the migration is reversed
+        migrations.AlterField(
+            model_name='journalentry',
+            name='text',
+            field=ckeditor_uploader.fields.RichTextUploadingField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='journalentry',
+            name='text',
+        ),
+        migrations.RemoveField(
+            model_name='journalentry',
+            name='display_html',
+        ),
+        migrations.RenameField(
+            model_name='journalentry',
+            old_name='text_compressed',
+            new_name='text',
+        ),
+        migrations.RenameField(
+            model_name='journalentry',
+            old_name='display_html_compressed',
+            new_name='display_html',
+        ),
+    ]
@@ -1,10 +1,16 @@
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
+import json
+from itertools import islice
 from django.db import models
-from libgravatar import Gravatar
+from django.db.models.query import ModelIterable
+from tasks.avatars import avatar_url
+from tasks.entry_text import ProcessedText, process_entry_text
+from tasks.fields import CompressedRichTextField, CompressedTextField
+from tasks.text_compression import compress_text, decompress_text, decompressed
+from tasks.uploads import uploaded_names
 from django.contrib import messages
 from django.core.validators import MinValueValidator, MaxValueValidator
-from ckeditor_uploader.fields import RichTextUploadingField
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -27,6 +33,8 @@ class User(AbstractUser):
     email = models.EmailField(unique=True, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped by changes the page validators cannot see otherwise, see tasks.conditional
+    page_generation = models.PositiveIntegerField(default=0, editable=False)
 
 
     class Meta:
@@ -42,14 +50,18 @@ class User(AbstractUser):
     def gravatar(self, size=120):
         """Return a URL to the user's gravatar."""
 
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return avatar_url(self.email, size)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
         
         return self.gravatar(size=60)
+
+
+def bump_page_generation(user_ids):
+    """Make the cached copies browsers hold of these users' pages stale."""
+
+    User.objects.filter(pk__in=user_ids).update(page_generation=models.F('page_generation') + 1)
     
 class UserPreferences(models.Model):
 
@@ -64,28 +76,80 @@ class UserPreferences(models.Model):
     opt_out = models.BooleanField(default=False)
     journal_time = models.TimeField()
 
+DEFAULT_TEMPLATES = [
+    {'user_entry': False,'name': 'Blank Template', 'questions': '', 'deleted': False, 'unlock_after_days':0},
+    {'user_entry': False,'name': 'Morning Reflection', 'questions': 'What are some things you feel grateful for ?,What are your main focuses for today e.g. fitness or reading ... ? ,What are you planning to do today ?', 'deleted': False,'unlock_after_days':0},
+    {'user_entry': False,'name': 'Evening Reflection', 'questions': 'How was your day ? ,How well do you think you accomplished your goals for the day ?,What were your highlights of the day ?', 'deleted': False,'unlock_after_days':3},
+    {'user_entry': False,'name': 'Future Planning', 'questions': 'What are your 5 long term goals ? ,How are you planning on achieving them ?,What goals are you prioritising?', 'deleted': False,'unlock_after_days':7},
+]
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_templates(sender, instance, created, **kwargs):
     if created:
-        template_fixtures = [
-        {'user_entry': False,'name': 'Blank Template', 'questions': '', 'deleted': False, 'unlock_after_days':0},
-        {'user_entry': False,'name': 'Morning Reflection', 'questions': 'What are some things you feel grateful for ?,What are your main focuses for today e.g. fitness or reading ... ? ,What are you planning to do today ?', 'deleted': False,'unlock_after_days':0},
-        {'user_entry': False,'name': 'Evening Reflection', 'questions': 'How was your day ? ,How well do you think you accomplished your goals for the day ?,What were your highlights of the day ?', 'deleted': False,'unlock_after_days':3},
-        {'user_entry': False,'name': 'Future Planning', 'questions': 'What are your 5 long term goals ? ,How are you planning on achieving them ?,What goals are you prioritising?', 'deleted': False,'unlock_after_days':7},
-        ]
+        Template.objects.bulk_create([Template(user=instance, **fixture) for fixture in DEFAULT_TEMPLATES])
+
+class MediaBlob(models.Model):
+    """A file uploaded through CKEditor, stored once under its content hash, see tasks.uploads."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+class ArchivedBodyIterable(ModelIterable):
+    """Yield entries with the bodies of archived ones filled in from the archive, a chunk at a time."""
+
+    def __iter__(self):
+        entries = super().__iter__()
+        while True:
+            chunk = list(islice(entries, self.chunk_size))
+            if not chunk:
+                return
+            restore_archived_bodies(chunk, self.queryset.db)
+            yield from chunk
+
+
+class JournalEntryQuerySet(models.QuerySet):
+
+    def with_bodies(self):
+        """Fill in the text and display_html of archived entries from the archive, see tasks.archive.
+
+        Costs one query for each chunk of entries fetched that has an archived entry
+        with a body column loaded. Works with iterator(), but not values() or
+        values_list(), which read the columns as stored.
+        """
+        clone = self._chain()
+        clone._iterable_class = ArchivedBodyIterable
+        return clone
+
+    def search(self, key):
+        """Filter to the entries whose title or text contain key, archived ones included."""
+        return self.filter(models.Q(title__icontains=key) | models.Q(plain_text__icontains=key))
 
-        for fixture in template_fixtures:
-            Template.objects.create(user=instance, **fixture)
 
 class JournalEntry(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=50)
-    text = RichTextUploadingField(config_name='default')
+    # The HTML columns are stored compressed, see tasks.text_compression
+    text = CompressedRichTextField(config_name='default')
+    # Derived from text on save, see tasks.entry_text; plain_text stays uncompressed, and in
+    # the row when the entry is archived, for search
+    display_html = CompressedTextField(blank=True, editable=False)
+    plain_text = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=255, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
+    # The uploads shown in text, kept in step by save
+    media = models.ManyToManyField(MediaBlob, related_name='entries', blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted = models.BooleanField(default = False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
     permanently_deleted = models.BooleanField(default = False)
     favourited = models.BooleanField(default = False)
+    # Whether the body columns are kept in ArchivedEntry instead of this row, see tasks.archive
+    archived = models.BooleanField(default=False, editable=False)
     MOOD_CHOICES = [
         (1, 'Very Sad 😔'),  
         (2, 'Sad 🙁'),  
@@ -95,18 +159,137 @@ class JournalEntry(models.Model):
     ]
     mood = models.IntegerField(choices=MOOD_CHOICES, default=3)  
 
+    objects = JournalEntryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], condition=models.Q(archived=False, deleted=False),
+                         name='tasks_entry_archivable_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        entry = super().from_db(db, field_names, values)
+        entry._processed_text = entry.__dict__.get('text')
+        return entry
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        # Deferred bodies of an entry loaded with_bodies come from the archive too
+        if getattr(self, '_with_bodies', False):
+            restore_archived_bodies([self], using or self._state.db, fields)
+
+    def process_text(self):
+        """Update the fields derived from text, if text has changed. Returns whether it had."""
+        processed = getattr(self, '_processed_text', None)
+        # Text never read since it was loaded is still the same compressed value
+        if processed is not None and self.__dict__.get('text') is processed:
+            return False
+        if self.text == decompressed(processed):
+            return False
+        for field, value in process_entry_text(self.text)._asdict().items():
+            setattr(self, field, value)
+        self._processed_text = self.text
+        return True
+
+    def save(self, *args, **kwargs):
+        previous_html = self.__dict__.get('display_html')
+        text_changed = self.process_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *ProcessedText._fields}
+        thawed = self.__dict__.get('archived') and text_changed
+        if thawed:
+            # An edited entry comes back out of the archive
+            self.archived = False
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'archived', *ArchivedEntry.BODY_FIELDS}
+        elif self.__dict__.get('archived'):
+            # The body stays in the archive, only the slim row here is saved
+            if update_fields is None:
+                update_fields = [field.attname for field in self._meta.concrete_fields
+                                 if not field.primary_key and field.attname in self.__dict__]
+            kwargs['update_fields'] = [name for name in update_fields if name not in ArchivedEntry.BODY_FIELDS]
+        super().save(*args, **kwargs)
+        if thawed:
+            ArchivedEntry.objects.filter(entry_id=self.pk).delete()
+        if text_changed:
+            media = uploaded_names(self.display_html)
+            # previous_html is None when it was deferred, and unknown
+            if media or previous_html is None or uploaded_names(decompressed(previous_html)):
+                self.update_media(media)
+
+    def update_media(self, names):
+        """Link the entry to the blobs of the uploads named, recording any not seen before."""
+        MediaBlob.objects.bulk_create([MediaBlob(name=name) for name in names], ignore_conflicts=True)
+        self.media.set(MediaBlob.objects.filter(name__in=names))
+
     def delete_entry(self):
         self.deleted = True
+        self.deleted_at = timezone.now()
         self.save()
 
     def permanently_delete(self):
+        media = list(self.media.values_list('pk', flat=True))
         self.delete()
+        if media:
+            from tasks.tasks import collect_orphan_media
+            collect_orphan_media.delay(media)
 
     def recover_entry(self):
         self.deleted = False
+        self.deleted_at = None
         self.save()
 
 
+class ArchivedEntry(models.Model):
+    """The body of a journal entry not changed for ARCHIVE_AFTER_DAYS, compressed, see tasks.archive."""
+
+    # Columns moved out of JournalEntry, which keeps an empty string in each; plain_text
+    # stays in the row for search
+    BODY_FIELDS = ('text', 'display_html')
+
+    entry = models.OneToOneField(JournalEntry, on_delete=models.CASCADE, primary_key=True, related_name='archive')
+    body = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def pack(cls, body):
+        """Compress a dict of the body fields."""
+        return compress_text(json.dumps([body[field] for field in cls.BODY_FIELDS]))
+
+    @classmethod
+    def unpack(cls, data):
+        return dict(zip(cls.BODY_FIELDS, json.loads(decompress_text(data))))
+
+
+def restore_archived_bodies(entries, using, fields=None):
+    """Fill in the loaded body fields of the archived entries among entries, with one query.
+
+    Only the body fields among fields are filled in, when it is given.
+    """
+
+    body_fields = [field for field in ArchivedEntry.BODY_FIELDS if fields is None or field in fields]
+    for entry in entries:
+        entry._with_bodies = True
+    pending = {
+        entry.pk: entry for entry in entries
+        if entry.__dict__.get('archived', True) and any(field in entry.__dict__ for field in body_fields)
+    }
+    if not pending:
+        return
+    bodies = dict(ArchivedEntry.objects.using(using).filter(entry_id__in=pending).values_list('entry_id', 'body'))
+    for pk, entry in pending.items():
+        entry.archived = pk in bodies
+        if not entry.archived:
+            continue
+        for field, value in ArchivedEntry.unpack(bodies[pk]).items():
+            if field in body_fields and field in entry.__dict__:
+                setattr(entry, field, value)
+        if 'text' in body_fields:
+            entry._processed_text = entry.__dict__.get('text')
+
+
 class Calendar(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=50)
@@ -135,6 +318,7 @@ class Template(models.Model):
     questions = models.CharField(max_length =255,blank = True)
     user_entry = models.BooleanField(default = True)
     deleted = models.BooleanField(default = False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
     permanently_deleted = models.BooleanField(default = False)
     unlock_after_days = models.IntegerField(default=0) 
 
@@ -153,14 +337,19 @@ class Template(models.Model):
     
     def delete_template(self):
         self.deleted = True
+        self.deleted_at = timezone.now()
         self.save()
+        bump_page_generation([self.user_id])
 
     def recover_entry(self):
         self.deleted = False
+        self.deleted_at = None
         self.save()
+        bump_page_generation([self.user_id])
     
     def permanently_delete(self):
         self.delete()
+        bump_page_generation([self.user_id])
     
     def is_locked_for_user(self, account_creation_date):
         unlock_date = account_creation_date + timedelta(days=self.unlock_after_days)
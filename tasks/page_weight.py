@@ -0,0 +1,114 @@
+"""Measure how many bytes a browser downloads to show a page.
+
+The page is rendered with the test client, and every stylesheet, script and
+image it references from STATIC_URL is looked up on disk. Text is counted at its
+brotli (or gzip) size, the way WhiteNoise serves it; images are counted as they
+are. Assets from other hosts are listed but cannot be sized.
+"""
+import gzip
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ('.css', '.js', '.svg', '.html', '.txt', '.json')
+
+
+class AssetParser(HTMLParser):
+    """Collect the URLs of the stylesheets, scripts and images in a page.
+
+    Inside a <picture>, only the first <source> is counted, as that is the one a
+    modern browser downloads instead of the <img> fallback.
+    """
+
+    ATTRIBUTES = {'link': 'href', 'script': 'src', 'img': 'src', 'source': 'srcset'}
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.in_picture = False
+        self.picture_chosen = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self.in_picture, self.picture_chosen = True, False
+            return
+        if tag == 'link' and attrs.get('rel') not in ('stylesheet', 'icon', 'preload'):
+            return
+        url = attrs.get(self.ATTRIBUTES.get(tag, ''))
+        if not url or (self.in_picture and self.picture_chosen):
+            return
+        self.urls.append(url.split()[0])
+        if self.in_picture and tag in ('source', 'img'):
+            self.picture_chosen = True
+
+    def handle_endtag(self, tag):
+        if tag == 'picture':
+            self.in_picture = False
+
+
+def asset_urls(html):
+    parser = AssetParser()
+    parser.feed(html)
+    return list(dict.fromkeys(parser.urls))
+
+
+def transfer_size(data, name):
+    """Return the number of bytes sent for data, compressed when the file type allows."""
+
+    if not name.endswith(COMPRESSIBLE_TYPES):
+        return len(data)
+    if brotli is not None:
+        return min(len(data), len(brotli.compress(data)))
+    return min(len(data), len(gzip.compress(data, 9)))
+
+
+def read_static(url):
+    """Return the contents of a static file by URL, or None when it is not a local static file."""
+
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    name = url[len(settings.STATIC_URL):].split('?')[0]
+    try:
+        path = staticfiles_storage.path(name)
+    except NotImplementedError:
+        path = None
+    if not path or not staticfiles_storage.exists(name):
+        path = finders.find(name)
+    if not path:
+        return None
+    with open(path, 'rb') as static_file:
+        return static_file.read()
+
+
+def measure_page(client, url):
+    """Return the page and asset sizes of a URL as a dictionary."""
+
+    response = client.get(url)
+    html = response.content
+    assets, external = [], []
+    for asset_url in asset_urls(html.decode()):
+        data = read_static(asset_url)
+        if data is None:
+            external.append(asset_url)
+            continue
+        assets.append({'url': asset_url, 'bytes': len(data), 'transfer_bytes': transfer_size(data, asset_url)})
+
+    html_transfer = transfer_size(html, '.html')
+    return {
+        'url': url,
+        'status': response.status_code,
+        'html_bytes': len(html),
+        'html_transfer_bytes': html_transfer,
+        'assets': assets,
+        'external': external,
+        'transfer_bytes': html_transfer + sum(asset['transfer_bytes'] for asset in assets),
+    }
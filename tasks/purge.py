@@ -0,0 +1,147 @@
+"""Delete rows and everything that depends on them in bounded batches.
+
+queryset.delete() hands every row to Django's deletion collector, which loads
+all the dependent rows into memory before deleting anything. purge instead works
+out which tables depend on a model, then deletes from them in dependency order
+with chunked raw DELETE statements, a batch of primary keys at a time.
+
+A table is only deleted raw when nothing needs to run for its rows: no
+pre_delete or post_delete receivers, and every relation pointing at it cascades.
+Otherwise each batch of that table goes through the collector, so signals and
+SET_NULL or PROTECT relations still behave as they would with delete().
+
+    purge(User.objects.filter(is_staff=False), progress=print)
+
+purge_expired_trash applies the trash retention policy the same way, and
+purge_orphan_media deletes the uploads hard-deleted entries leave behind.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import CASCADE, DO_NOTHING, signals
+from django.utils import timezone
+from ckeditor_uploader.utils import storage as upload_storage
+
+from tasks.models import JournalEntry, MediaBlob, Template, bump_page_generation
+from tasks.uploads import delete_media_files
+
+
+def cascade_relations(model):
+    """Return the reverse one-to-one and foreign key relations pointing at a model."""
+
+    return [
+        relation for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete and (relation.one_to_one or relation.one_to_many)
+    ]
+
+
+def needs_collector(model):
+    """Whether deleting rows of model has to go through Django's deletion collector."""
+
+    if signals.pre_delete.has_listeners(model) or signals.post_delete.has_listeners(model):
+        return True
+    for relation in cascade_relations(model):
+        if relation.on_delete not in (CASCADE, DO_NOTHING) or relation.related_model is model:
+            return True
+    return False
+
+
+def plan_purge(model, lookup='pk__in', parents=()):
+    """Return (model, lookup, use_collector) steps, with dependent tables first.
+
+    lookup filters each model's rows by the primary keys of the rows being purged.
+    """
+
+    if needs_collector(model):
+        return [(model, lookup, True)]
+    steps = []
+    for relation in cascade_relations(model):
+        if relation.on_delete is DO_NOTHING:
+            continue
+        if relation.related_model in parents:
+            return [(model, lookup, True)]
+        steps += plan_purge(relation.related_model, f'{relation.field.name}__{lookup}', parents + (model,))
+    steps.append((model, lookup, False))
+    return steps
+
+
+def purge(queryset, batch_size=None, progress=None):
+    """Delete the rows of a queryset and all their dependents, batch_size rows at a time.
+
+    Each batch is committed on its own, so a purge that is interrupted can simply
+    be run again. progress is called with (model label, rows deleted so far) after
+    every batch. Returns a Counter of rows deleted per model label.
+    """
+
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+    steps = plan_purge(queryset.model)
+    deleted = Counter()
+    ids = list(queryset.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        for model, lookup, use_collector in steps:
+            label = model._meta.label
+            rows = model._base_manager.filter(**{lookup: chunk})
+            while True:
+                batch = list(rows.values_list('pk', flat=True)[:batch_size])
+                if not batch:
+                    break
+                batch_rows = model._base_manager.filter(pk__in=batch)
+                if use_collector:
+                    _, counts = batch_rows.delete()
+                    deleted.update(counts)
+                else:
+                    deleted[label] += batch_rows._raw_delete(batch_rows.db)
+                if progress:
+                    progress(label, deleted[label])
+    return deleted
+
+
+def purge_expired_trash(retention_days=None, batch_size=None, time_budget=None):
+    """Permanently delete entries and templates that have been in the trash longer than retention_days.
+
+    No new batch is started once time_budget seconds have passed, and whatever is
+    left is picked up by the next run. Returns a Counter of rows deleted per model label.
+    """
+
+    retention_days = retention_days if retention_days is not None else settings.TRASH_RETENTION_DAYS
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+    time_budget = time_budget if time_budget is not None else getattr(settings, 'TRASH_PURGE_TIME_BUDGET', 60)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deadline = time.monotonic() + time_budget
+    deleted = Counter()
+    for model in (JournalEntry, Template):
+        expired = model._base_manager.filter(deleted=True, deleted_at__lt=cutoff)
+        while time.monotonic() < deadline:
+            rows = list(expired.values_list('pk', 'user_id')[:batch_size])
+            if not rows:
+                break
+            deleted.update(purge(model._base_manager.filter(pk__in=[pk for pk, _ in rows]), batch_size))
+            bump_page_generation({user_id for _, user_id in rows})
+    return deleted
+
+
+def purge_orphan_media(blobs=None, grace_period=None, batch_size=None):
+    """Delete the uploads that no entry shows any more, files and all.
+
+    Uploads are made before the entry showing them is saved, so only blobs older
+    than grace_period seconds are deleted. blobs limits the collection to those
+    primary keys. Returns the number of blobs deleted.
+    """
+
+    grace_period = grace_period if grace_period is not None else settings.MEDIA_ORPHAN_GRACE_PERIOD
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+    orphans = MediaBlob.objects.filter(entries=None, created_at__lt=timezone.now() - timedelta(seconds=grace_period))
+    if blobs is not None:
+        orphans = orphans.filter(pk__in=blobs)
+    deleted = 0
+    while True:
+        batch = list(orphans.values_list('pk', 'name')[:batch_size])
+        if not batch:
+            return deleted
+        for _, name in batch:
+            delete_media_files(upload_storage, name)
+        MediaBlob.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        deleted += len(batch)
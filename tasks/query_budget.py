@@ -0,0 +1,130 @@
+"""Query budgets for catching N+1 query regressions.
+
+query_budget records every query run inside a block, as a context manager or a
+decorator. It fails when the block runs more queries than its budget, or when
+the same SQL shape repeats more often than allowed. Repeated shapes usually mean
+a query is being run once per item in a loop.
+
+Budgets for individual views are declared in the QUERY_BUDGETS setting, so the
+tests and the development middleware check against the same numbers:
+
+    with query_budget(view='journal_log'):
+        self.client.get(reverse('journal_log'))
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.conf import settings
+
+from tasks.instrumentation import observing_queries
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalise_sql(sql):
+    """Return the shape of a query, with literals and IN lists collapsed."""
+
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more queries than its budget allows."""
+
+
+class QueryRecorder:
+    """Context manager recording the queries run on every database connection.
+
+    Queries the async ORM runs on worker threads are recorded too, see
+    tasks.instrumentation.observe_query.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._observing = None
+
+    def __enter__(self):
+        self._observing = observing_queries(self)
+        self._observing.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._observing.__exit__(*exc_info)
+        return False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def shapes(self):
+        return Counter(normalise_sql(sql) for sql, _ in self.queries)
+
+    def repeated_shapes(self, max_repeats):
+        """Return the shapes run more than max_repeats times, most repeated first."""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count > max_repeats]
+
+    def report(self):
+        lines = [f'{count} x {shape}' for shape, count in self.shapes().most_common()]
+        return '\n'.join(lines)
+
+
+def get_view_budget(view):
+    """Return the query budget declared for a view name in QUERY_BUDGETS."""
+
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view not in budgets:
+        raise KeyError(f"No query budget is declared for the view '{view}' in QUERY_BUDGETS.")
+    return budgets[view]
+
+
+class query_budget(ContextDecorator):
+    """Fail when the wrapped block goes over its query budget.
+
+    Either pass max_queries, or the name of a view whose budget is declared in
+    QUERY_BUDGETS. max_repeats limits how often one SQL shape may be run and
+    defaults to QUERY_BUDGET_MAX_REPEATS.
+    """
+
+    def __init__(self, max_queries=None, view=None, max_repeats=None):
+        if max_queries is None and view is None:
+            raise TypeError('query_budget needs either max_queries or view.')
+        self.max_queries = max_queries if max_queries is not None else get_view_budget(view)
+        self.max_repeats = max_repeats if max_repeats is not None else getattr(settings, 'QUERY_BUDGET_MAX_REPEATS', 3)
+        self.label = f"'{view}'" if view else 'block'
+
+    def __enter__(self):
+        self.recorder = QueryRecorder().__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, *exc_info):
+        self.recorder.__exit__(exc_type, *exc_info)
+        if exc_type is not None:
+            return False
+        if self.recorder.count > self.max_queries:
+            raise QueryBudgetExceeded(
+                f'{self.label} ran {self.recorder.count} queries, over its budget of {self.max_queries}:\n'
+                f'{self.recorder.report()}'
+            )
+        repeated = self.recorder.repeated_shapes(self.max_repeats)
+        if repeated:
+            raise QueryBudgetExceeded(
+                f'{self.label} repeated a query more than {self.max_repeats} times, which usually means N+1 queries:\n'
+                + '\n'.join(f'{count} x {shape}' for shape, count in repeated)
+            )
+        return False
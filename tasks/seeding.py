@@ -0,0 +1,187 @@
+"""Helpers for generating large amounts of sample data quickly.
+
+Rows are written with bulk_create in batches rather than one save() at a time,
+and the shared password is hashed once. The benchmarks and the seed command's
+--bulk mode both use them.
+"""
+import random
+import secrets
+from contextlib import contextmanager
+from datetime import time, timedelta
+from multiprocessing import Pool
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from tasks.entry_text import ProcessedText, process_entry_text
+from tasks.models import DEFAULT_TEMPLATES, FlowerGrowth, JournalEntry, Template, User, UserPreferences
+
+
+WORDS = (
+    'today felt calm grateful tired busy walk friends family work study coffee rain sun '
+    'morning evening reflection goal progress music book gym dinner quiet long short happy '
+    'anxious hopeful plan weekend city park notes lecture project deadline rest sleep dream'
+).split()
+
+FIRST_NAMES = ['Amelia', 'Oliver', 'Isla', 'George', 'Ava', 'Noah', 'Mia', 'Arthur', 'Ivy', 'Leo', 'Freya', 'Oscar']
+LAST_NAMES = ['Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies', 'Patel', 'Wright']
+
+DEFAULT_MOOD_WEIGHTS = (1, 2, 4, 3, 2)
+
+
+@contextmanager
+def historical_timestamps(model):
+    """Let bulk_create keep explicit created_at/updated_at values instead of using now()."""
+
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_mood_weights(value):
+    """Parse a distribution such as '1:1,2:2,3:4,4:3,5:2' into weights for moods 1 to 5."""
+
+    weights = dict.fromkeys(range(1, 6), 0)
+    for part in value.split(','):
+        mood, weight = part.split(':')
+        if int(mood) not in weights:
+            raise ValueError(f'Unknown mood {mood}.')
+        weights[int(mood)] = float(weight)
+    if not any(weights.values()):
+        raise ValueError('At least one mood needs a weight.')
+    return tuple(weights.values())
+
+
+def random_body(rng, words=60):
+    return '<p>' + ' '.join(rng.choice(WORDS) for _ in range(words)) + '</p>'
+
+
+def generate_entry_rows(user_id, count, days=365, mood_weights=DEFAULT_MOOD_WEIGHTS, body_words=60, seed=None):
+    """Return (user_id, title, text, mood, favourited, created_at, processed text) tuples for one user.
+
+    Plain tuples are returned so that the rows, including the derived text fields
+    JournalEntry.save would work out, can be generated in worker processes.
+    """
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = max(days, 1) * 24 * 60 * 60
+    moods = rng.choices(range(1, 6), weights=mood_weights, k=count)
+    rows = []
+    for mood in moods:
+        text = random_body(rng, body_words)
+        rows.append((
+            user_id,
+            ' '.join(rng.choice(WORDS) for _ in range(3)).capitalize()[:50],
+            text,
+            mood,
+            rng.random() < 0.1,
+            now - timedelta(seconds=rng.randrange(span)),
+            tuple(process_entry_text(text)),
+        ))
+    return rows
+
+
+def _generate_entry_rows(arguments):
+    return generate_entry_rows(*arguments)
+
+
+def build_entries(rows):
+    return [
+        JournalEntry(user_id=user_id, title=title, text=text, mood=mood, favourited=favourited,
+                     created_at=created_at, updated_at=created_at,
+                     **dict(zip(ProcessedText._fields, processed)))
+        for user_id, title, text, mood, favourited, created_at, processed in rows
+    ]
+
+
+def bulk_create_entries(user, count, days=365, batch_size=1000, mood_weights=DEFAULT_MOOD_WEIGHTS, body_words=60, seed=None):
+    """Create count journal entries for a user with a realistic spread of dates."""
+
+    rows = generate_entry_rows(user.pk, count, days, mood_weights, body_words, seed)
+    with historical_timestamps(JournalEntry):
+        JournalEntry.objects.bulk_create(build_entries(rows), batch_size=batch_size)
+
+
+def bulk_create_users(count, password, batch_size=1000, rng=None):
+    """Create count users sharing one password, with their templates, flower and preferences.
+
+    The password is hashed once for all of them, and the rows post_save would
+    normally create are written with bulk_create as well. Returns the new user ids.
+    """
+
+    rng = rng or random.Random()
+    password_hash = make_password(password)
+    prefix = 'seed' + secrets.token_hex(3)
+    users = []
+    for index in range(count):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{prefix}{index}'
+        users.append(User(
+            username='@' + username,
+            email=f'{username}@example.org',
+            password=password_hash,
+            first_name=first_name,
+            last_name=last_name,
+        ))
+    User.objects.bulk_create(users, batch_size=batch_size)
+
+    user_ids = list(User.objects.filter(username__startswith='@' + prefix).values_list('pk', flat=True))
+    Template.objects.bulk_create(
+        [Template(user_id=user_id, **fixture) for user_id in user_ids for fixture in DEFAULT_TEMPLATES],
+        batch_size=batch_size,
+    )
+    FlowerGrowth.objects.bulk_create([FlowerGrowth(user_id=user_id) for user_id in user_ids], batch_size=batch_size)
+    UserPreferences.objects.bulk_create(
+        [UserPreferences(user_id=user_id, journal_time=time(rng.randint(7, 22))) for user_id in user_ids],
+        batch_size=batch_size,
+    )
+    return user_ids
+
+
+def bulk_seed(users, entries_per_user, password, days=365, mood_weights=DEFAULT_MOOD_WEIGHTS, body_words=60,
+              batch_size=1000, workers=1, progress=None):
+    """Create users with journal histories as fast as the database allows.
+
+    Entry rows are generated in a pool of worker processes when workers is above
+    one, while this process writes each batch. progress is called with
+    (stage, done, total) as rows are written.
+    """
+
+    user_ids = bulk_create_users(users, password, batch_size)
+    if progress:
+        progress('users', len(user_ids), users)
+
+    total = len(user_ids) * entries_per_user
+    jobs = [(user_id, entries_per_user, days, mood_weights, body_words, secrets.randbits(32)) for user_id in user_ids]
+    written = 0
+    pool = Pool(workers) if workers > 1 and jobs else None
+    try:
+        generated = pool.imap_unordered(_generate_entry_rows, jobs) if pool else map(_generate_entry_rows, jobs)
+        pending = []
+        with historical_timestamps(JournalEntry):
+            for rows in generated:
+                pending.extend(rows)
+                while len(pending) >= batch_size:
+                    batch, pending = pending[:batch_size], pending[batch_size:]
+                    JournalEntry.objects.bulk_create(build_entries(batch))
+                    written += len(batch)
+                    if progress:
+                        progress('entries', written, total)
+            if pending:
+                JournalEntry.objects.bulk_create(build_entries(pending))
+                written += len(pending)
+                if progress:
+                    progress('entries', written, total)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return user_ids
@@ -0,0 +1,114 @@
+"""Measure how long a fresh worker takes to boot and how much memory it holds.
+
+A new Python process is started with -X importtime, loads the WSGI application
+and the URL configuration, which imports every view, and reports its peak
+resident memory. The import times it writes to stderr are added up per
+top-level package, so the slowest imports can be found.
+
+HEAVY_MODULES are only needed by a few views, and are expected to be imported
+when those views first run rather than when the worker boots.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+HEAVY_MODULES = ('matplotlib', 'reportlab', 'PyPDF2', 'xhtml2pdf')
+
+BOOT_SCRIPT = """
+import json, resource, sys
+from django.conf import settings
+from task_manager.wsgi import application
+__import__(settings.ROOT_URLCONF)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'max_rss_kb': rss // 1024 if sys.platform == 'darwin' else rss, 'modules': sorted(sys.modules)}))
+"""
+
+
+def parse_import_times(stderr):
+    """Return the total import time and the import time of each top-level package, in microseconds.
+
+    Reads the output of -X importtime. Each package is charged with the time
+    its own modules took to import, not the time of the other packages they
+    imported, so the totals add up.
+    """
+
+    total = 0
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        if not own.strip().isdigit():
+            continue
+        if not name.startswith('  '):
+            total += int(cumulative)
+        package = name.strip().split('.', 1)[0]
+        packages[package] = packages.get(package, 0) + int(own)
+    return total, packages
+
+
+def profile_boot(settings_module=None):
+    """Boot the application in a new process and return its timings, memory and loaded modules."""
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module or os.environ['DJANGO_SETTINGS_MODULE'])
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT], env=env, capture_output=True, text=True, check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    report = json.loads(process.stdout.strip().splitlines()[-1])
+    total, packages = parse_import_times(process.stderr)
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': total / 1000,
+        'max_rss_mb': report['max_rss_kb'] / 1024,
+        'slowest_imports': sorted(packages.items(), key=lambda item: item[1], reverse=True),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in report['modules']],
+    }
+
+
+def profile_startup(runs=3, settings_module=None):
+    """Boot the application runs times and return the median wall time, import time and memory."""
+
+    profiles = [profile_boot(settings_module) for _ in range(runs)]
+    return {
+        'runs': runs,
+        'wall_ms': statistics.median(profile['wall_ms'] for profile in profiles),
+        'import_ms': statistics.median(profile['import_ms'] for profile in profiles),
+        'max_rss_mb': statistics.median(profile['max_rss_mb'] for profile in profiles),
+        'slowest_imports': profiles[-1]['slowest_imports'],
+        'heavy_modules': profiles[-1]['heavy_modules'],
+    }
+
+
+def process_memory(pid):
+    """Return the resident, proportional and private memory of a process in MB, from Linux's smaps_rollup.
+
+    Pages a forked worker still shares with the gunicorn master count fully
+    towards its RSS, but only by their share towards its PSS, and not at all
+    towards its private (USS) memory.
+    """
+
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'pid': pid, 'rss_mb': fields['Rss'] / 1024, 'pss_mb': fields['Pss'] / 1024, 'uss_mb': private / 1024}
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as children:
+        return [int(pid) for pid in children.read().split()]
+
+
+def worker_memory(master_pid):
+    """Return the memory of each worker forked by a gunicorn master."""
+
+    return [process_memory(pid) for pid in worker_pids(master_pid)]
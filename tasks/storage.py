@@ -0,0 +1,132 @@
+"""Static files storage that fingerprints, precompresses and optimises assets.
+
+WhiteNoise's CompressedManifestStaticFilesStorage adds a content hash to every
+file name and writes gzip and brotli copies at collectstatic time, so WhiteNoise
+can serve them with immutable far-future cache headers. On top of that, the
+PNGs matching STATIC_OPTIMISED_IMAGES are scaled down to at most
+STATIC_IMAGE_MAX_DIMENSION pixels, re-encoded with Pillow and given a WebP
+variant next to them (images/flower_stage_0.webp and so on).
+
+ContentAddressedStorage stores the files uploaded through CKEditor once each,
+named after the SHA-256 of their content.
+"""
+import hashlib
+import io
+import os
+import re
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+WEBP_QUALITY = 85
+
+# The names ContentAddressedStorage and tasks.uploads give files: a top directory, the
+# first two digits of the SHA-256 and the SHA-256, then for the copies tasks.uploads
+# derives from an upload a width or print suffix, and _thumb for ckeditor's thumbnails
+_CONTENT_ADDRESSED = re.compile(
+    r'(?:[^/]+/)?(?P<prefix>[0-9a-f]{2})/(?P<digest>[0-9a-f]{64})(?:-[0-9]+w|-print)?(?:_thumb)?(?:\.[a-z0-9]+)?'
+)
+
+
+def encode_image(data, format, max_dimension=None, **save_options):
+    """Re-encode an image, scaling it down to fit within max_dimension pixels."""
+
+    output = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as image:
+        if max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        image.save(output, format=format, **save_options)
+    return output.getvalue()
+
+
+def optimise_png(data, max_dimension=None):
+    return encode_image(data, 'PNG', max_dimension, optimize=True)
+
+
+def png_to_webp(data, max_dimension=None, quality=WEBP_QUALITY):
+    return encode_image(data, 'WEBP', max_dimension, quality=quality, method=6)
+
+
+def is_content_addressed(name):
+    """Whether a file is named after its content, so it never changes."""
+
+    match = _CONTENT_ADDRESSED.fullmatch(name.replace('\\', '/'))
+    return match is not None and match.group('digest').startswith(match.group('prefix'))
+
+
+class OptimisedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """CompressedManifestStaticFilesStorage that also optimises images before hashing them."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run and Image is not None:
+            self.optimise_images(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def optimise_images(self, paths):
+        patterns = getattr(settings, 'STATIC_OPTIMISED_IMAGES', [])
+        max_dimension = getattr(settings, 'STATIC_IMAGE_MAX_DIMENSION', None)
+        for name in list(paths):
+            if not name.endswith('.png') or not any(fnmatch(name, pattern) for pattern in patterns):
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                data = source.read()
+
+            optimised = optimise_png(data, max_dimension)
+            if len(optimised) < len(data):
+                self.replace(name, optimised)
+                paths[name] = (self, name)
+
+            webp_name = name[:-len('.png')] + '.webp'
+            self.replace(webp_name, png_to_webp(data, max_dimension))
+            paths[webp_name] = (self, webp_name)
+
+    def replace(self, name, data):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(data))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files after the SHA-256 of their content and writes each only once.
+
+    A file saved as uploads/2024/05/01/photo.jpg is stored as uploads/ab/abcd….jpg,
+    keeping the top directory and extension. Names already laid out that way, such
+    as the copies tasks.uploads derives from an upload, are kept as they are; any
+    other name is hashed, even one that happens to contain a SHA-256.
+    Saving a name that exists returns it without writing the file again, as its
+    content is the same.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if not is_content_addressed(name):
+            name = self.content_name(name, content)
+        return super().save(name, content, max_length)
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        parts = name.replace('\\', '/').split('/')
+        directory = parts[0] if len(parts) > 1 else ''
+        return os.path.join(directory, digest[:2], digest + os.path.splitext(name)[1].lower())
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
@@ -0,0 +1,160 @@
+"""Small SVG bar and line charts for the mood pages.
+
+The charts are plain SVG text, built with string formatting in well under a
+millisecond and without importing matplotlib. They are a few kilobytes, are
+inlined in the page, and are compressed and cached along with it. A viewBox
+lets them scale to the width of their container.
+
+tasks.charts draws the high resolution PNG of the mood chart that can be
+downloaded from the mood page, with matplotlib.
+"""
+import math
+from html import escape
+
+
+WIDTH = 640
+HEIGHT = 320
+MARGIN_TOP = 24
+MARGIN_RIGHT = 16
+MARGIN_BOTTOM = 56
+FONT_SIZE = 12
+# Rough width of a character of the 12px sans-serif labels, to leave room for the y axis labels
+CHARACTER_WIDTH = 7
+MAX_X_LABELS = 10
+
+BAR_COLOUR = '#B6E2B8'
+LINE_COLOUR = '#4C9A5F'
+AXIS_COLOUR = '#333'
+GRID_COLOUR = '#E5E5E5'
+
+
+def number(value):
+    """Format a coordinate with at most one decimal place and no trailing zeros."""
+
+    return f'{value:.1f}'.rstrip('0').rstrip('.')
+
+
+def integer_ticks(maximum, count=5):
+    """Return evenly spaced whole-number ticks from 0 past maximum, with steps of 1, 2 or 5 times a power of ten."""
+
+    rough_step = max(maximum, 1) / count
+    magnitude = 10 ** math.floor(math.log10(rough_step))
+    step = next(multiple * magnitude for multiple in (1, 2, 5, 10) if multiple * magnitude >= rough_step)
+    step = max(int(step), 1)
+    top = step * math.ceil(max(maximum, 1) / step)
+    return [(value, str(value)) for value in range(0, top + 1, step)]
+
+
+class Plot:
+    """The geometry shared by both chart types: the plot area and the mapping from data to pixels."""
+
+    def __init__(self, y_ticks, title, x_label, y_label):
+        self.y_ticks = y_ticks
+        self.y_min = y_ticks[0][0]
+        self.y_max = y_ticks[-1][0]
+        self.title = title
+        self.x_label = x_label
+        self.y_label = y_label
+        label_width = max(len(label) for _, label in y_ticks) * CHARACTER_WIDTH
+        self.left = label_width + (FONT_SIZE + 16 if y_label else 8)
+        self.right = WIDTH - MARGIN_RIGHT
+        self.top = MARGIN_TOP
+        self.bottom = HEIGHT - MARGIN_BOTTOM
+
+    def y(self, value):
+        span = (self.y_max - self.y_min) or 1
+        return self.bottom - (value - self.y_min) / span * (self.bottom - self.top)
+
+    def band(self, count):
+        return (self.right - self.left) / max(count, 1)
+
+    def svg(self, body):
+        """Wrap the marks of a chart with its grid, axes and labels."""
+
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" role="img" '
+            f'class="chart" font-family="sans-serif" font-size="{FONT_SIZE}">',
+            f'<title>{escape(self.title)}</title>',
+        ]
+        for value, label in self.y_ticks:
+            y = number(self.y(value))
+            parts.append(f'<line x1="{self.left}" y1="{y}" x2="{self.right}" y2="{y}" stroke="{GRID_COLOUR}"/>')
+            parts.append(f'<text x="{self.left - 6}" y="{y}" text-anchor="end" dy=".35em">{escape(label)}</text>')
+        parts.extend(body)
+        parts.append(
+            f'<path d="M{self.left} {self.top}V{self.bottom}H{self.right}" fill="none" stroke="{AXIS_COLOUR}"/>'
+        )
+        if self.x_label:
+            parts.append(
+                f'<text x="{number((self.left + self.right) / 2)}" y="{HEIGHT - 8}" text-anchor="middle">'
+                f'{escape(self.x_label)}</text>'
+            )
+        if self.y_label:
+            middle = number((self.top + self.bottom) / 2)
+            parts.append(
+                f'<text transform="translate({FONT_SIZE},{middle}) rotate(-90)" text-anchor="middle">'
+                f'{escape(self.y_label)}</text>'
+            )
+        parts.append('</svg>')
+        return ''.join(parts)
+
+    def x_labels(self, labels, centre):
+        """Return the x axis labels, thinned out so no more than MAX_X_LABELS are shown."""
+
+        every = math.ceil(len(labels) / MAX_X_LABELS)
+        return [
+            f'<text x="{number(centre(i))}" y="{self.bottom + FONT_SIZE + 6}" text-anchor="middle">{escape(label)}</text>'
+            for i, label in enumerate(labels) if i % every == 0
+        ]
+
+
+def bar_chart(labels, values, title='', x_label='', y_label='', colour=BAR_COLOUR):
+    """Return an SVG bar chart of whole-number values, each bar labelled with its value."""
+
+    plot = Plot(integer_ticks(max(values, default=0)), title, x_label, y_label)
+    band = plot.band(len(values))
+    bar_width = band * 0.6
+
+    def centre(i):
+        return plot.left + band * (i + 0.5)
+
+    body = []
+    for i, value in enumerate(values):
+        x, y = centre(i) - bar_width / 2, plot.y(value)
+        body.append(
+            f'<rect x="{number(x)}" y="{number(y)}" width="{number(bar_width)}" '
+            f'height="{number(plot.bottom - y)}" fill="{colour}"/>'
+        )
+        body.append(f'<text x="{number(centre(i))}" y="{number(y - 4)}" text-anchor="middle">{value}</text>')
+    body.extend(plot.x_labels(labels, centre))
+    return plot.svg(body)
+
+
+def line_chart(labels, values, y_ticks, title='', x_label='', y_label='', colour=LINE_COLOUR):
+    """Return an SVG line chart over y_ticks, a list of (value, label) pairs in increasing order.
+
+    A value of None leaves a gap in the line, such as a day with no entries.
+    """
+
+    plot = Plot(y_ticks, title, x_label, y_label)
+    step = (plot.right - plot.left) / max(len(values) - 1, 1)
+
+    def centre(i):
+        return plot.left + step * i
+
+    path = []
+    points = []
+    previous = None
+    for i, value in enumerate(values):
+        if value is not None:
+            point = f'{number(centre(i))} {number(plot.y(value))}'
+            path.append(('L' if previous is not None else 'M') + point)
+            points.append(f'<circle cx="{number(centre(i))}" cy="{number(plot.y(value))}" r="3" fill="{colour}"/>')
+        previous = value
+
+    body = []
+    if path:
+        body.append(f'<path d="{"".join(path)}" fill="none" stroke="{colour}" stroke-width="2"/>')
+    body.extend(points)
+    body.extend(plot.x_labels(labels, centre))
+    return plot.svg(body)
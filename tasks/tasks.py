@@ -3,7 +3,11 @@ from celery import shared_task
 from django.utils import timezone
 from .models import FlowerGrowth, JournalEntry
 from django.core.mail import send_mail
-from .models import UserPreferences
+from .models import UserPreferences, User
+from .archive import archive_old_entries
+from .purge import purge, purge_expired_trash, purge_orphan_media
+from .uploads import create_variants
+from ckeditor_uploader.utils import storage as upload_storage
 from datetime import datetime
 import task_manager.settings as settings 
 from datetime import timedelta
@@ -49,7 +53,7 @@ def send_reminder_emails(self, user_email):
 @shared_task
 def check_and_trigger_reminder_emails():
     today = datetime.now().strftime('%A').lower()
-    user_preferences = UserPreferences.objects.filter(**{f"{today}": True})
+    user_preferences = UserPreferences.objects.filter(**{f"{today}": True}).select_related('user')
     
     for index, preference in enumerate(user_preferences):
         if preference.opt_out:
@@ -66,4 +70,37 @@ def check_and_trigger_reminder_emails():
     
 
 
+@shared_task
+def purge_user_account(user_id):
+    """Delete a user and all their data in batches, after delete_account has deactivated them."""
+    purge(User.objects.filter(pk=user_id, is_active=False))
+    collect_orphan_media.delay()
+
+
+@shared_task(name='tasks.tasks.purge_expired_trash')
+def purge_expired_trash_task():
+    """Apply the trash retention policy, see TRASH_RETENTION_DAYS."""
+    deleted = purge_expired_trash()
+    logging.info(f"Purged expired trash: {dict(deleted)}")
+    if deleted:
+        collect_orphan_media.delay()
+
+
+@shared_task(name='tasks.tasks.archive_old_entries')
+def archive_old_entries_task():
+    """Move the bodies of old entries into the archive, see ARCHIVE_AFTER_DAYS."""
+    archived = archive_old_entries()
+    logging.info(f"Archived {archived} journal entries")
+
+
+@shared_task
+def create_upload_variants(name):
+    """Write the srcset copies of an image uploaded through CKEditor, see tasks.uploads."""
+    create_variants(upload_storage, name)
+
 
+@shared_task(name='tasks.tasks.collect_orphan_media')
+def collect_orphan_media(blobs=None):
+    """Delete the uploads no entry uses any more, see MEDIA_ORPHAN_GRACE_PERIOD."""
+    deleted = purge_orphan_media(blobs)
+    logging.info(f"Deleted {deleted} unused uploads")
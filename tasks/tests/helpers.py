@@ -35,3 +35,23 @@ class MenuTesterMixin(AssertHTMLMixin):
         
         for url in self.menu_urls:
             self.assertNotHTML(response, f'a[href="{url}"]')
+
+
+def enter_context(test, context_manager):
+    """Enter a context manager until the test ends, like TestCase.enterContext, which needs Python 3.11."""
+
+    result = context_manager.__enter__()
+    test.addCleanup(context_manager.__exit__, None, None, None)
+    return result
+
+
+avatar_fetches = []
+
+def fake_avatar_fetcher(digest, size):
+    """Local stand-in for gravatar.com, used through the AVATAR_UPSTREAM_FETCHER setting."""
+
+    avatar_fetches.append((digest, size))
+    return 'image/png', f'avatar {digest} {size}'.encode()
+
+def unreachable_avatar_fetcher(digest, size):
+    raise OSError('gravatar.com is unreachable')
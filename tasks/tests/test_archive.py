@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.archive import archive_old_entries
+from tasks.models import ArchivedEntry, JournalEntry, User
+from tasks.purge import purge
+from tasks.tasks import archive_old_entries_task
+from tasks.text_compression import decompressed
+
+
+TEXT = '<p>We walked along the river to the old mill and had lunch by the water.</p>' * 20
+
+
+@override_settings(ARCHIVE_AFTER_DAYS=180)
+class TestArchive(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.old = self.create_entry('Old', TEXT, days_ago=200)
+        self.recent = self.create_entry('Recent', '<p>Hello</p>', days_ago=10)
+        self.trashed = self.create_entry('Trashed', '<p>Bye</p>', days_ago=200, deleted=True)
+
+    def create_entry(self, title, text, days_ago, **fields):
+        entry = JournalEntry.objects.create(user=self.user, title=title, text=text, **fields)
+        JournalEntry.objects.filter(pk=entry.pk).update(updated_at=timezone.now() - timedelta(days=days_ago))
+        return JournalEntry.objects.get(pk=entry.pk)
+
+    def hot_row(self, entry):
+        row = JournalEntry.objects.filter(pk=entry.pk).values('archived', 'text', 'display_html', 'plain_text', 'updated_at').get()
+        return {field: decompressed(value) for field, value in row.items()}
+
+    def test_old_entries_are_archived(self):
+        self.assertEqual(archive_old_entries(), 1)
+        row = self.hot_row(self.old)
+        self.assertEqual(row, {'archived': True, 'text': '', 'display_html': '', 'plain_text': self.old.plain_text,
+                               'updated_at': self.old.updated_at})
+        archived = ArchivedEntry.objects.get(entry=self.old)
+        self.assertLess(len(archived.body), len(self.old.text) / 5)
+        self.assertEqual(ArchivedEntry.unpack(archived.body)['display_html'], self.old.display_html)
+        self.assertFalse(self.hot_row(self.recent)['archived'])
+        self.assertFalse(self.hot_row(self.trashed)['archived'])
+        self.assertEqual(archive_old_entries(), 0)
+
+    def test_archived_entries_read_as_before_with_bodies(self):
+        archive_old_entries()
+        entry = JournalEntry.objects.with_bodies().get(pk=self.old.pk)
+        self.assertTrue(entry.archived)
+        self.assertEqual(entry.text, self.old.text)
+        self.assertEqual(entry.display_html, self.old.display_html)
+        self.assertEqual(entry.plain_text, self.old.plain_text)
+        self.assertEqual(entry.excerpt, self.old.excerpt)
+
+    def test_bodies_are_only_restored_when_asked_for(self):
+        archive_old_entries()
+        entry = JournalEntry.objects.get(pk=self.old.pk)
+        self.assertEqual((entry.text, entry.display_html), ('', ''))
+        self.assertEqual(entry.plain_text, self.old.plain_text)
+
+    def test_iterator_restores_bodies(self):
+        archive_old_entries()
+        entries = JournalEntry.objects.with_bodies().filter(user=self.user).order_by('pk')
+        # Only the chunk with the archived entry reads the archive
+        with self.assertNumQueries(2):
+            texts = [entry.text for entry in entries.iterator(chunk_size=1)]
+        self.assertEqual(texts, [self.old.text, self.recent.text, self.trashed.text])
+
+    def test_deferred_bodies_are_restored(self):
+        archive_old_entries()
+        entry = JournalEntry.objects.with_bodies().defer('display_html').get(pk=self.old.pk)
+        entry.text = '<p>Edited</p>'
+        self.assertEqual(entry.display_html, self.old.display_html)
+        self.assertEqual(entry.text, '<p>Edited</p>')
+
+    def test_reading_hot_entries_costs_no_extra_query(self):
+        archive_old_entries()
+        entries = JournalEntry.objects.with_bodies()
+        with self.assertNumQueries(1):
+            list(entries.filter(pk__in=[self.recent.pk, self.trashed.pk]))
+        with self.assertNumQueries(2):
+            list(entries.filter(user=self.user))
+        with self.assertNumQueries(1):
+            list(entries.filter(user=self.user).defer(*ArchivedEntry.BODY_FIELDS))
+
+    def test_saving_keeps_the_body_in_the_archive(self):
+        archive_old_entries()
+        entry = JournalEntry.objects.get(pk=self.old.pk)
+        entry.favourited = True
+        entry.save()
+        row = self.hot_row(self.old)
+        self.assertTrue(row['archived'])
+        self.assertEqual(row['text'], '')
+        self.assertTrue(JournalEntry.objects.get(pk=self.old.pk).favourited)
+
+    def test_editing_the_text_brings_the_entry_back(self):
+        archive_old_entries()
+        entry = JournalEntry.objects.get(pk=self.old.pk)
+        entry.text = '<p>Edited</p>'
+        entry.save()
+        row = self.hot_row(self.old)
+        self.assertFalse(row['archived'])
+        self.assertEqual(row['plain_text'], 'Edited')
+        self.assertFalse(ArchivedEntry.objects.filter(entry=self.old).exists())
+
+    def test_time_budget(self):
+        self.assertEqual(archive_old_entries(time_budget=0), 0)
+        self.assertFalse(self.hot_row(self.old)['archived'])
+
+    def test_purge_deletes_the_archive(self):
+        archive_old_entries()
+        purge(JournalEntry.objects.filter(pk=self.old.pk))
+        self.assertFalse(ArchivedEntry.objects.exists())
+
+    def test_task_and_command(self):
+        archive_old_entries_task()
+        self.assertTrue(self.hot_row(self.old)['archived'])
+        call_command('archive_entries', days=5, stdout=StringIO())
+        self.assertTrue(self.hot_row(self.recent)['archived'])
+
+
+@override_settings(ARCHIVE_AFTER_DAYS=180)
+class TestArchivedEntryViews(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        self.entry = JournalEntry.objects.create(user=self.user, title='Picnic', text=TEXT, favourited=True)
+        JournalEntry.objects.filter(pk=self.entry.pk).update(updated_at=timezone.now() - timedelta(days=365))
+        archive_old_entries()
+
+    def test_search_finds_archived_text(self):
+        self.assertEqual(list(JournalEntry.objects.search('old mill')), [self.entry])
+        for name in ('journal_log', 'favourites'):
+            with self.subTest(name):
+                self.assertContains(self.client.post(reverse(name), {'search': 'OLD MILL'}), 'Picnic')
+                self.assertNotContains(self.client.post(reverse(name), {'search': 'mountain'}), 'Picnic')
+
+    def test_entry_body(self):
+        response = self.client.get(reverse('entry_body', args=[self.entry.pk]))
+        self.assertEqual(response.json()['display_html'], self.entry.display_html)
+
+    def test_export(self):
+        response = self.client.get(reverse('export_journal_entry_to_rtf', args=[self.entry.pk]))
+        self.assertIn(b'the old mill', response.getvalue())
+
+    def test_edit_form_shows_the_text(self):
+        response = self.client.get(reverse('edit_entry', args=[self.entry.pk]))
+        self.assertContains(response, 'the old mill')
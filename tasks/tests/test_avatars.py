@@ -0,0 +1,53 @@
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from tasks.avatars import avatar_url, get_avatar, gravatar_digest, gravatar_url
+from tasks.models import User
+from tasks.tests.helpers import avatar_fetches, enter_context
+
+
+@override_settings(AVATAR_UPSTREAM_FETCHER='tasks.tests.helpers.fake_avatar_fetcher')
+class TestAvatars(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.cache_dir = enter_context(self, tempfile.TemporaryDirectory())
+        avatar_fetches.clear()
+
+    def test_gravatar_url_is_memoised(self):
+        gravatar_url.cache_clear()
+        self.user.gravatar()
+        self.user.gravatar()
+        self.assertEqual(gravatar_url.cache_info().hits, 1)
+
+    def test_email_change_gives_a_new_url(self):
+        before = self.user.gravatar()
+        self.user.email = 'someone.else@example.org'
+        self.assertNotEqual(self.user.gravatar(), before)
+
+    @override_settings(AVATAR_PROXY=True)
+    def test_proxy_url(self):
+        self.assertEqual(avatar_url(self.user.email, 60), f'/avatar/{gravatar_digest(self.user.email)}/60/')
+
+    def test_get_avatar_fetches_once(self):
+        digest = gravatar_digest(self.user.email)
+        with self.settings(AVATAR_CACHE_DIR=self.cache_dir):
+            self.assertEqual(get_avatar(digest, 60), ('image/png', f'avatar {digest} 60'.encode()))
+            get_avatar(digest, 60)
+        self.assertEqual(avatar_fetches, [(digest, 60)])
+
+    def test_get_avatar_refetches_after_ttl(self):
+        digest = gravatar_digest(self.user.email)
+        with self.settings(AVATAR_CACHE_DIR=self.cache_dir, AVATAR_CACHE_TTL=0):
+            get_avatar(digest, 60)
+            get_avatar(digest, 60)
+        self.assertEqual(len(avatar_fetches), 2)
+
+    def test_get_avatar_serves_stale_copy_when_upstream_fails(self):
+        digest = gravatar_digest(self.user.email)
+        with self.settings(AVATAR_CACHE_DIR=self.cache_dir, AVATAR_CACHE_TTL=0):
+            get_avatar(digest, 60)
+            with self.settings(AVATAR_UPSTREAM_FETCHER='tasks.tests.helpers.unreachable_avatar_fetcher'):
+                self.assertEqual(get_avatar(digest, 60)[0], 'image/png')
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, f'{digest}-60')))
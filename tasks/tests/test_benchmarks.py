@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from tasks.benchmarks import Benchmark, compare_results, run_benchmarks
+from tasks.models import JournalEntry, User
+from tasks.seeding import bulk_create_entries
+
+
+class TestBenchmark(TestCase):
+
+    def test_benchmark_times_every_round(self):
+        calls = []
+        benchmark = Benchmark(rounds=3, warmup=1)
+        result = benchmark(calls.append, 'called')
+        self.assertIsNone(result)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(benchmark.stats['rounds'], 3)
+        self.assertLessEqual(benchmark.stats['min'], benchmark.stats['median'])
+
+    def test_compare_results_finds_regressions(self):
+        baseline = {'results': {'journal_log[10]': {'median': 0.010}, 'dashboard[10]': {'median': 0.010}}}
+        current = {'results': {'journal_log[10]': {'median': 0.015}, 'dashboard[10]': {'median': 0.011},
+                               'trash[10]': {'median': 1.0}}}
+        regressions = compare_results(baseline, current, threshold=0.2)
+        self.assertEqual([name for name, *_ in regressions], ['journal_log[10]'])
+        self.assertAlmostEqual(regressions[0][3], 0.5)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks([5], rounds=1, export_count=2)
+        self.assertIn('journal_log[5]', results['results'])
+        self.assertIn('export_entries_pdf[5]', results['results'])
+        self.assertIn('task_check_and_trigger_reminder_emails[5]', results['results'])
+        self.assertEqual(JournalEntry.objects.filter(user__username='@bench5').count(), 5)
+
+
+class TestSeeding(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def test_bulk_create_entries_keeps_historical_dates(self):
+        user = User.objects.get(username='@johndoe')
+        bulk_create_entries(user, 50, days=30)
+        entries = JournalEntry.objects.filter(user=user)
+        self.assertEqual(entries.count(), 50)
+        oldest = entries.order_by('created_at').first().created_at
+        self.assertLess(oldest, timezone.now() - timedelta(hours=1))
+        self.assertGreater(oldest, timezone.now() - timedelta(days=31))
@@ -0,0 +1,50 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from tasks.bootstrap import run_bootstrap
+from tasks.models import JournalEntry, User
+
+
+@patch('builtins.print')
+class TestBootstrap(TestCase):
+
+    def bootstrap(self, **options):
+        output = StringIO()
+        call_command('bootstrap', stdout=output, **options)
+        return output.getvalue()
+
+    def test_seeds_an_empty_database_once(self, mock_print):
+        self.assertIn('Seeding sample data.', self.bootstrap())
+        users, entries = User.objects.count(), JournalEntry.objects.count()
+        self.assertGreater(entries, 0)
+
+        self.assertIn('up to date', self.bootstrap())
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(JournalEntry.objects.count(), entries)
+
+    def test_does_not_migrate_a_current_schema(self, mock_print):
+        with patch('tasks.bootstrap.call_command') as command:
+            self.assertEqual(run_bootstrap(seed=False, log=lambda message: None), [])
+        command.assert_not_called()
+
+    def test_applies_unapplied_migrations(self, mock_print):
+        with patch('tasks.bootstrap.unapplied_migrations', return_value=['0006']), \
+                patch('tasks.bootstrap.call_command') as command:
+            self.assertEqual(run_bootstrap(seed=False, log=lambda message: None), ['migrate'])
+        command.assert_called_once_with('migrate', database='default', interactive=False, verbosity=0)
+
+    def test_up_to_date_database_is_skipped(self, mock_print):
+        self.bootstrap(seed=False)
+        with patch('tasks.bootstrap.bootstrap_lock') as lock:
+            self.assertIn('up to date', self.bootstrap(seed=False))
+        lock.assert_not_called()
+        self.assertFalse(User.objects.exists())
+
+    def test_checks_the_database_on_every_run(self, mock_print):
+        self.bootstrap(seed=False)
+        with patch('tasks.bootstrap.unapplied_migrations', return_value=['0006']), \
+                patch('tasks.bootstrap.call_command') as command:
+            self.assertEqual(run_bootstrap(seed=False, log=lambda message: None), ['migrate'])
+        command.assert_called_once()
+        self.assertIn('Seeding sample data.', self.bootstrap())
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from tasks.charts import mood_bar_chart
+
+
+MOODS = ['Very Sad', 'Sad', 'Neutral', 'Happy', 'Very Happy']
+
+
+def chart_data(seed):
+    return MOODS[:seed % 5 + 1], [(seed * (i + 3)) % 7 + 1 for i in range(seed % 5 + 1)]
+
+
+class TestCharts(SimpleTestCase):
+
+    def test_chart_is_a_png(self):
+        png = mood_bar_chart(['Happy', 'Sad'], [3, 1])
+        self.assertTrue(png.startswith(b'\x89PNG\r\n\x1a\n'))
+
+    def test_empty_chart(self):
+        self.assertTrue(mood_bar_chart([], []).startswith(b'\x89PNG'))
+
+    def test_charts_drawn_in_parallel_match_charts_drawn_alone(self):
+        expected = {seed: mood_bar_chart(*chart_data(seed)) for seed in range(5)}
+        seeds = [seed % 5 for seed in range(40)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            charts = list(executor.map(lambda seed: mood_bar_chart(*chart_data(seed)), seeds))
+        for seed, chart in zip(seeds, charts):
+            self.assertEqual(chart, expected[seed])
+
+    def test_pyplot_is_never_imported(self):
+        script = (
+            "import sys; from tasks.charts import mood_bar_chart; mood_bar_chart(['Happy'], [1]); "
+            "sys.exit('matplotlib.pyplot' in sys.modules)"
+        )
+        self.assertEqual(subprocess.run([sys.executable, '-c', script]).returncode, 0)
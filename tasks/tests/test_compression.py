@@ -0,0 +1,176 @@
+import gzip
+from io import BytesIO
+import brotli
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from tasks.compression import choose_encoding
+from tasks.instrumentation import registry
+from tasks.middleware import CompressionMiddleware
+from tasks.models import JournalEntry, User
+
+
+PAGE = ('<p>Dear diary, today was a good day.</p>' * 100).encode()
+
+
+class TestChooseEncoding(SimpleTestCase):
+
+    def test_prefers_brotli(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+
+    def test_follows_quality_values(self):
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, br;q=0'), None)
+        self.assertEqual(choose_encoding('*'), 'br')
+        self.assertEqual(choose_encoding('*;q=0, gzip'), 'gzip')
+
+    def test_unsupported_encodings(self):
+        self.assertIsNone(choose_encoding(''))
+        self.assertIsNone(choose_encoding(None))
+        self.assertIsNone(choose_encoding('deflate, identity'))
+        self.assertEqual(choose_encoding('gzip;q=x, br'), 'br')
+
+
+class TestCompressionMiddleware(SimpleTestCase):
+
+    def setUp(self):
+        registry.reset()
+
+    def respond(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_brotli(self):
+        response = self.respond(HttpResponse(PAGE))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(brotli.decompress(response.content), PAGE)
+
+    def test_gzip(self):
+        response = self.respond(HttpResponse(PAGE), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+
+    def test_responses_are_padded_against_breach(self):
+        for encoding in ('br', 'gzip'):
+            with self.subTest(encoding):
+                lengths = {len(self.respond(HttpResponse(PAGE), encoding).content) for _ in range(10)}
+                self.assertGreater(len(lengths), 1)
+        self.assertTrue(self.respond(HttpResponse(PAGE), 'gzip').content[3] & gzip.FNAME)
+
+    def test_padded_brotli_streams_decode(self):
+        chunks = [PAGE[:1000], PAGE[1000:]]
+        response = self.respond(StreamingHttpResponse(iter(chunks)), 'br')
+        decompressor = brotli.Decompressor()
+        stream = iter(response.streaming_content)
+        self.assertEqual(decompressor.process(next(stream)), chunks[0])
+        self.assertEqual(b''.join(decompressor.process(part) for part in stream), chunks[1])
+
+    def test_no_padding(self):
+        with self.settings(COMPRESSION_MAX_RANDOM_BYTES=0):
+            self.assertEqual(len({len(self.respond(HttpResponse(PAGE)).content) for _ in range(3)}), 1)
+
+    def test_compression_ratio_is_recorded(self):
+        response = self.respond(HttpResponse(PAGE))
+        histogram = registry.histogram('http_response_compression_ratio', {'view': 'unresolved', 'encoding': 'br'})
+        self.assertEqual(histogram.count, 1)
+        self.assertAlmostEqual(histogram.sum, len(response.content) / len(PAGE))
+        self.assertEqual(
+            registry.counter_value('http_response_compression_saved_bytes_total', {'view': 'unresolved', 'encoding': 'br'}),
+            len(PAGE) - len(response.content),
+        )
+
+    def test_small_responses_are_sent_as_they_are(self):
+        response = self.respond(HttpResponse(b'<p>Hi</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_uncompressed_when_not_accepted(self):
+        response = self.respond(HttpResponse(PAGE), '')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, PAGE)
+
+    def test_compressed_types_are_skipped(self):
+        for content_type in ('application/pdf', 'image/png', 'application/zip'):
+            response = self.respond(HttpResponse(PAGE, content_type=content_type))
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertFalse(response.has_header('Vary'))
+
+    def test_json_is_compressed(self):
+        response = self.respond(HttpResponse(PAGE, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_encoded_responses_are_skipped(self):
+        original = HttpResponse(PAGE, headers={'Content-Encoding': 'gzip'})
+        self.assertEqual(self.respond(original).content, PAGE)
+
+    def test_files_and_partial_content_are_skipped(self):
+        response = self.respond(FileResponse(BytesIO(PAGE), content_type='text/rtf'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        partial = self.respond(HttpResponse(PAGE, status=206, headers={'Content-Range': 'bytes 0-10/100'}))
+        self.assertFalse(partial.has_header('Content-Encoding'))
+
+    def test_strong_etag_is_weakened(self):
+        response = self.respond(HttpResponse(PAGE, headers={'ETag': '"abc"'}))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_streaming_response_is_compressed_chunk_by_chunk(self):
+        chunks = [PAGE[:1000], PAGE[1000:2000], PAGE[2000:]]
+        response = self.respond(StreamingHttpResponse(iter(chunks), headers={'Content-Length': len(PAGE)}))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response.streaming_content)
+        self.assertGreaterEqual(len(parts), len(chunks))
+        self.assertEqual(brotli.decompress(b''.join(parts)), PAGE)
+        histogram = registry.histogram('http_response_compression_ratio', {'view': 'unresolved', 'encoding': 'br'})
+        self.assertEqual(histogram.count, 1)
+
+    def test_each_streamed_chunk_can_be_decoded_on_arrival(self):
+        chunks = [PAGE[:1000], PAGE[1000:]]
+        response = self.respond(StreamingHttpResponse(iter(chunks)), 'gzip')
+        decompressor = gzip.zlib.decompressobj(16 + gzip.zlib.MAX_WBITS)
+        stream = iter(response.streaming_content)
+        self.assertEqual(decompressor.decompress(next(stream)), chunks[0])
+
+    def test_async_streaming_response(self):
+        async def chunks():
+            yield PAGE[:1000]
+            yield PAGE[1000:]
+
+        response = self.respond(StreamingHttpResponse(chunks()), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        async def read():
+            return b''.join([part async for part in response.streaming_content])
+
+        self.assertEqual(gzip.decompress(async_to_sync(read)()), PAGE)
+
+
+    def test_async_middleware(self):
+        async def view(request):
+            return HttpResponse(PAGE)
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+
+class TestCompressedPages(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        for i in range(10):
+            JournalEntry.objects.create(user=self.user, title=f'Entry {i}', text='<p>A long day at work.</p>' * 20, mood=3)
+
+    def test_journal_log_is_compressed(self):
+        plain = self.client.get(reverse('journal_log'))
+        compressed = self.client.get(reverse('journal_log'), HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(compressed['Content-Encoding'], 'br')
+        self.assertLess(len(compressed.content), len(plain.content) / 3)
+        self.assertIn(b'Entry 9', brotli.decompress(compressed.content))
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.instrumentation import registry
+from tasks.models import JournalEntry, Template, User
+from tasks.purge import purge_expired_trash
+from tasks.query_budget import query_budget
+
+
+class TestConditionalPages(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        self.entry = JournalEntry.objects.create(user=self.user, title='Monday', text='<p>Hello</p>', mood=4)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_modified(self):
+        registry.reset()
+        for name in ('journal_log', 'favourites', 'trash', 'mood_breakdown'):
+            with self.subTest(name):
+                url = reverse(name)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('W/"'))
+                self.assertIn('Last-Modified', response)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('private', response['Cache-Control'])
+
+                not_modified = self.revalidate(url, response)
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['ETag'], response['ETag'])
+                self.assertEqual(not_modified.content, b'')
+        self.assertEqual(
+            registry.counter_value('http_conditional_requests_total', {'view': 'journal_log', 'result': 'not_modified'}), 1,
+        )
+
+    def test_not_modified_skips_the_view(self):
+        url = reverse('journal_log')
+        response = self.client.get(url)
+        with query_budget(max_queries=3):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    def test_calendar_json(self):
+        url = reverse('get_journal_entries') + f'?date={timezone.localdate().isoformat()}'
+        response = self.client.get(url)
+        self.assertEqual(response.json()['entries'][0]['title'], 'Monday')
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.entry.title = 'Tuesday'
+        self.entry.save()
+        changed = self.revalidate(url, response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['entries'][0]['title'], 'Tuesday')
+
+    def test_edited_entry(self):
+        url = reverse('journal_log')
+        response = self.client.get(url)
+        self.entry.text = '<p>Hello again</p>'
+        self.entry.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_deleted_entry(self):
+        url = reverse('journal_log')
+        JournalEntry.objects.create(user=self.user, title='Tuesday', text='<p>Hi</p>', mood=3)
+        response = self.client.get(url)
+        self.entry.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_trashed_template(self):
+        template = Template.objects.create(user=self.user, name='Gratitude', questions='What went well?')
+        url = reverse('trash')
+        response = self.client.get(url)
+        template.delete_template()
+        trashed = self.revalidate(url, response)
+        self.assertContains(trashed, 'Gratitude')
+
+        template.recover_entry()
+        self.assertNotContains(self.revalidate(url, trashed), 'Gratitude')
+
+    def test_expired_templates_make_trash_stale(self):
+        template = Template.objects.create(user=self.user, name='Gratitude', questions='What went well?')
+        template.delete_template()
+        Template.objects.filter(pk=template.pk).update(deleted_at=timezone.now() - timedelta(days=60))
+        url = reverse('trash')
+        response = self.client.get(url)
+        purge_expired_trash()
+        self.assertNotContains(self.revalidate(url, response), 'Gratitude')
+
+    def test_new_day(self):
+        url = reverse('journal_log')
+        response = self.client.get(url)
+        with patch('tasks.conditional.timezone.localdate', return_value=date.today() + timedelta(days=1)):
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_new_release(self):
+        url = reverse('journal_log')
+        with override_settings(RELEASE_VERSION='v41'):
+            response = self.client.get(url)
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        with override_settings(RELEASE_VERSION='v42'):
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        url = reverse('journal_log')
+        response = self.client.get(url)
+        self.client.force_login(User.objects.get(username='@janedoe'))
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_pages_with_messages_are_not_cached(self):
+        url = reverse('trash')
+        response = self.client.get(url)
+        self.client.post(reverse('empty_trash'))
+        with_message = self.revalidate(url, response)
+        self.assertContains(with_message, 'Trash emptied!')
+        self.assertNotIn('ETag', with_message)
+        self.assertIn('ETag', self.client.get(url))
+
+    def test_search_is_never_conditional(self):
+        response = self.client.post(reverse('journal_log'), {'search': 'Monday'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
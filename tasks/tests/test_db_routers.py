@@ -0,0 +1,110 @@
+import time
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.db_routers import LAST_WRITE_SESSION_KEY, ReadReplicaRouter, RoutingState
+from tasks.instrumentation import registry
+from tasks.middleware import ReplicaRoutingMiddleware
+from tasks.models import JournalEntry, User
+from tasks.tests.helpers import enter_context
+
+
+class TestReadReplicaRouter(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+        self.router.replicas = ['replica']
+        state = RoutingState()
+        self.addCleanup(RoutingState.deactivate, state.activate())
+        self.state = state
+
+    def test_without_replicas_everything_stays_on_default(self):
+        self.router.replicas = []
+        self.state.use_replica = True
+        self.assertIsNone(self.router.db_for_read(JournalEntry))
+        self.assertIsNone(self.router.db_for_write(JournalEntry))
+        self.assertFalse(self.state.wrote)
+
+    def test_reads_go_to_default_outside_replica_views(self):
+        self.assertEqual(self.router.db_for_read(JournalEntry), 'default')
+
+    def test_reads_go_to_the_replica_in_replica_views(self):
+        self.state.use_replica = True
+        self.assertEqual(self.router.db_for_read(JournalEntry), 'replica')
+
+    def test_reads_after_a_write_go_to_default(self):
+        self.state.use_replica = True
+        self.assertEqual(self.router.db_for_write(JournalEntry), 'default')
+        self.assertTrue(self.state.wrote)
+        self.assertEqual(self.router.db_for_read(JournalEntry), 'default')
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'tasks'))
+        self.assertIsNone(self.router.allow_migrate('default', 'tasks'))
+
+
+class TestReplicaRouting(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.force_login(self.user)
+        self.entry = JournalEntry.objects.create(user=self.user, title='Monday', text='<p>Hello</p>', mood=4)
+        replica_router = next(r for r in router.routers if isinstance(r, ReadReplicaRouter))
+        enter_context(self, patch.object(replica_router, 'replicas', ['replica']))
+        # The tests only have default, which the replica mirrors
+        self.pick_replica = enter_context(self, patch.object(replica_router, 'pick_replica', return_value='default'))
+        enter_context(self, patch('tasks.db_routers.replica_aliases', return_value=['replica']))
+        registry.reset()
+
+    def test_read_heavy_views_read_from_the_replica(self):
+        for name in ('journal_log', 'favourites', 'mood_breakdown'):
+            with self.subTest(name):
+                self.pick_replica.reset_mock()
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+                self.assertTrue(self.pick_replica.called)
+        self.assertEqual(registry.counter_value('db_read_routing_total', {'view': 'journal_log', 'database': 'replica'}), 1)
+
+    def test_async_views_read_from_the_replica(self):
+        url = reverse('get_journal_entries') + f'?date={timezone.localdate().isoformat()}'
+        self.assertEqual(self.client.get(url).json()['entries'][0]['title'], 'Monday')
+        self.assertTrue(self.pick_replica.called)
+
+    def test_other_views_read_from_default(self):
+        self.client.get(reverse('trash'))
+        self.assertFalse(self.pick_replica.called)
+
+    def test_reads_stick_to_default_after_a_write(self):
+        self.client.get(reverse('favourite_entry', args=[self.entry.pk]))
+        self.assertIn(LAST_WRITE_SESSION_KEY, self.client.session)
+
+        response = self.client.get(reverse('favourites'))
+        self.assertContains(response, 'Monday')
+        self.assertFalse(self.pick_replica.called)
+        self.assertEqual(registry.counter_value('db_read_routing_total', {'view': 'favourites', 'database': 'primary'}), 1)
+
+        later = time.time() + 60
+        with patch('tasks.db_routers.time.time', return_value=later):
+            self.client.get(reverse('favourites'))
+        self.assertTrue(self.pick_replica.called)
+
+    def test_reads_only_do_not_stick(self):
+        self.client.get(reverse('journal_log'))
+        self.assertNotIn(LAST_WRITE_SESSION_KEY, self.client.session)
+
+    def test_async_middleware_remembers_writes(self):
+        async def view(request):
+            await sync_to_async(JournalEntry.objects.filter(pk=self.entry.pk).update)(favourited=True)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        async_to_sync(middleware)(request)
+        self.assertIn(LAST_WRITE_SESSION_KEY, request.session)
@@ -0,0 +1,97 @@
+import os
+import tempfile
+from django.test import RequestFactory, TestCase
+from django.utils.http import http_date
+from tasks.downloads import RangeNotSatisfiable, file_response, parse_range, serve_file
+from tasks.tests.helpers import enter_context
+
+
+class TestParseRange(TestCase):
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-2000', 1000), (990, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_whole_file(self):
+        for header in (None, '', 'bytes=-', 'bytes=0-9,20-29', 'lines=1-2', 'bytes=9-0'):
+            self.assertIsNone(parse_range(header, 1000), header)
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=1000-', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1000)
+
+
+class TestFileResponses(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.directory = enter_context(self, tempfile.TemporaryDirectory())
+        self.path = os.path.join(self.directory, 'export.pdf')
+        self.content = bytes(range(256)) * 1024
+        with open(self.path, 'wb') as file:
+            file.write(self.content)
+
+    def get(self, **headers):
+        return serve_file(self.factory.get('/', **headers), self.path, self.directory)
+
+    def test_whole_file_is_streamed(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        response.close()
+
+    def test_file_is_read_in_chunks(self):
+        with self.settings(DOWNLOAD_CHUNK_SIZE=1000):
+            response = self.get()
+        chunks = list(response.streaming_content)
+        response.close()
+        self.assertEqual(max(len(chunk) for chunk in chunks), 1000)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=1000-1999')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1999/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '1000')
+        self.assertEqual(b''.join(response.streaming_content), self.content[1000:2000])
+        response.close()
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_if_range(self):
+        modified = http_date(os.stat(self.path).st_mtime)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=modified).status_code, 206)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='Wed, 21 Oct 2015 07:28:00 GMT').status_code, 200)
+
+    def test_open_file(self):
+        file = tempfile.TemporaryFile()
+        file.write(b'report')
+        file.seek(0)
+        response = file_response(self.factory.get('/'), file, 6, 'report.rtf', as_attachment=True)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.rtf"')
+        self.assertEqual(b''.join(response.streaming_content), b'report')
+        response.close()
+        self.assertTrue(file.closed)
+
+    def test_x_accel_redirect(self):
+        with self.settings(DOWNLOAD_OFFLOAD='x-accel', DOWNLOAD_ACCEL_PREFIX='/protected/'):
+            response = self.get()
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/export.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
+
+    def test_x_sendfile(self):
+        with self.settings(DOWNLOAD_OFFLOAD='x-sendfile'):
+            response = self.get()
+        self.assertEqual(response['X-Sendfile'], self.path)
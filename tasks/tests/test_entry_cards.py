@@ -0,0 +1,74 @@
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.entry_cards import render_entry_cards
+from tasks.instrumentation import registry
+from tasks.models import JournalEntry, User
+
+
+class TestEntryCards(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.get(username='@johndoe')
+        for i in range(3):
+            JournalEntry.objects.create(user=self.user, title=f'Title {i}', text=f'<p>Text {i}</p>', mood=3)
+
+    def entries(self):
+        return JournalEntry.objects.filter(user=self.user).order_by('pk')
+
+    def test_cards_are_rendered_once(self):
+        first = render_entry_cards(self.entries(), 'log')
+        self.assertIn('Title 0', first[0].card)
+        with patch('tasks.entry_cards.get_template') as get_template:
+            second = render_entry_cards(self.entries(), 'log')
+        get_template.assert_not_called()
+        self.assertEqual([entry.card for entry in first], [entry.card for entry in second])
+        self.assertEqual(registry.counter_value('entry_card_cache_hits_total', {'variant': 'log'}), 3)
+        self.assertEqual(registry.counter_value('entry_card_cache_misses_total', {'variant': 'log'}), 3)
+
+    def test_cards_are_looked_up_in_one_batch(self):
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            render_entry_cards(self.entries(), 'favourite')
+        get_many.assert_called_once()
+
+    def test_changed_entry_is_rendered_again(self):
+        render_entry_cards(self.entries(), 'log')
+        entry = self.entries().first()
+        entry.favourited = True
+        entry.save()
+        cards = render_entry_cards(self.entries(), 'log')
+        self.assertIn(reverse('unfavourite_entry', args=[entry.pk]), cards[0].card)
+        self.assertEqual(registry.counter_value('entry_card_cache_misses_total', {'variant': 'log'}), 4)
+
+    def test_variants_are_cached_separately(self):
+        render_entry_cards(self.entries(), 'log')
+        cards = render_entry_cards(self.entries(), 'trash')
+        self.assertIn(reverse('recover_entry', args=[cards[0].pk]), cards[0].card)
+
+    def test_new_static_urls_give_new_cards(self):
+        render_entry_cards(self.entries(), 'log')
+        with override_settings(STATIC_URL='/assets/'):
+            cards = render_entry_cards(self.entries(), 'log')
+        self.assertIn('/assets/images/pencil.png', cards[0].card)
+        with patch('tasks.entry_cards.staticfiles_storage') as storage:
+            storage.manifest_hash = 'after-collectstatic'
+            render_entry_cards(self.entries(), 'log')
+        self.assertEqual(registry.counter_value('entry_card_cache_misses_total', {'variant': 'log'}), 9)
+
+    def test_hit_ratio_is_recorded_per_page(self):
+        render_entry_cards(self.entries(), 'log')
+        render_entry_cards(self.entries(), 'log')
+        histogram = registry.histogram('entry_card_cache_hit_ratio', {'variant': 'log'})
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.sum, 1.0)
+
+    def test_journal_log_uses_cached_cards(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(reverse('journal_log'))
+        response = self.client.get(reverse('journal_log'))
+        self.assertContains(response, '<h5 class="card-title">Title 2</h5>', count=2, html=True)
+        self.assertEqual(registry.counter_value('entry_card_cache_hits_total', {'variant': 'log'}), 3)
@@ -0,0 +1,85 @@
+from django.test import TestCase
+from tasks.entry_text import EXCERPT_LENGTH, make_excerpt, process_entry_text, reading_time
+from tasks.models import JournalEntry, User
+
+
+class TestProcessEntryText(TestCase):
+
+    def test_keeps_allowed_markup(self):
+        html = '<h1><strong><em>Question</em></strong></h1><p style="text-align: center">Answer &amp; more</p>'
+        display_html, plain_text, excerpt, _, _ = process_entry_text(html)
+        self.assertEqual(display_html, html)
+        self.assertEqual(plain_text, 'Question\nAnswer & more')
+        self.assertEqual(excerpt, 'Question Answer & more')
+
+    def test_removes_scripts_and_event_handlers(self):
+        display_html, plain_text, *_ = process_entry_text(
+            '<p onclick="steal()">Hi</p><script>alert(1)</script><iframe src="https://x.org"></iframe>'
+            '<img src="x" onerror="steal()"><style>p { color: red }</style>'
+        )
+        self.assertEqual(display_html, '<p>Hi</p><img src="x" loading="lazy">')
+        self.assertEqual(plain_text, 'Hi')
+
+    def test_removes_unsafe_urls_and_styles(self):
+        display_html, *_ = process_entry_text(
+            '<a href="java\tscript:steal()">a</a><a href="https://example.org" target="_blank">b</a>'
+            '<span style="color: red; background-image: url(https://x.org/a.png)">c</span>'
+        )
+        self.assertEqual(
+            display_html,
+            '<a>a</a><a href="https://example.org" target="_blank" rel="noopener noreferrer">b</a>'
+            '<span style="color: red">c</span>',
+        )
+
+    def test_closes_unbalanced_tags(self):
+        self.assertEqual(process_entry_text('<p>one <em>two</p>three').display_html, '<p>one <em>two</em></p>three')
+
+    def test_escapes_text(self):
+        self.assertEqual(process_entry_text('&lt;script&gt;').display_html, '&lt;script&gt;')
+
+    def test_counts_words_and_reading_time(self):
+        processed = process_entry_text('<p>' + 'word ' * 450 + '</p><p>end</p>')
+        self.assertEqual(processed.word_count, 451)
+        self.assertEqual(processed.reading_time, 3)
+
+    def test_reading_time_rounds_up(self):
+        self.assertEqual(reading_time(0), 0)
+        self.assertEqual(reading_time(1), 1)
+        self.assertEqual(reading_time(200), 1)
+        self.assertEqual(reading_time(201), 2)
+
+    def test_excerpt_is_cut_at_a_word(self):
+        excerpt = make_excerpt('word ' * 100)
+        self.assertLessEqual(len(excerpt), EXCERPT_LENGTH + 1)
+        self.assertTrue(excerpt.endswith('word…'))
+
+
+class TestJournalEntryTextProcessing(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+
+    def test_save_processes_text(self):
+        entry = JournalEntry.objects.create(user=self.user, title='Title', text='<p>Hello <script>x</script>world</p>')
+        entry.refresh_from_db()
+        self.assertEqual(entry.display_html, '<p>Hello world</p>')
+        self.assertEqual(entry.plain_text, 'Hello world')
+        self.assertEqual(entry.excerpt, 'Hello world')
+        self.assertEqual(entry.word_count, 2)
+        self.assertEqual(entry.reading_time, 1)
+
+    def test_save_with_update_fields_includes_processed_text(self):
+        entry = JournalEntry.objects.create(user=self.user, title='Title', text='<p>Before</p>')
+        entry.text = '<p>After</p>'
+        entry.save(update_fields=['text'])
+        entry.refresh_from_db()
+        self.assertEqual(entry.plain_text, 'After')
+        self.assertEqual(entry.word_count, 1)
+
+    def test_unchanged_text_is_not_processed_again(self):
+        JournalEntry.objects.create(user=self.user, title='Title', text='<p>Text</p>')
+        entry = JournalEntry.objects.get(title='Title')
+        entry.display_html = 'marker'
+        entry.save()
+        self.assertEqual(entry.display_html, 'marker')
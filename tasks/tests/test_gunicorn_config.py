@@ -0,0 +1,50 @@
+import os
+import runpy
+from unittest.mock import patch
+from django.conf import settings
+from django.test import SimpleTestCase
+from tasks.entry_cards import template_fingerprint
+from tasks.warmup import warm_templates, warm_up
+
+
+CONFIG_PATH = os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')
+
+
+class TestGunicornConfig(SimpleTestCase):
+
+    def load_config(self, **environ):
+        with patch.dict(os.environ, environ):
+            return runpy.run_path(CONFIG_PATH)
+
+    def test_preloads_and_recycles_workers(self):
+        config = self.load_config(GUNICORN_MAX_REQUESTS='500')
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['max_requests'], 500)
+        self.assertEqual(config['max_requests_jitter'], 50)
+
+    def test_worker_class_follows_thread_count(self):
+        config = self.load_config(WEB_CONCURRENCY='3', GUNICORN_THREADS='4')
+        self.assertEqual((config['workers'], config['threads'], config['worker_class']), (3, 4, 'gthread'))
+        self.assertEqual(self.load_config(GUNICORN_THREADS='1')['worker_class'], 'sync')
+
+    def test_workers_default_to_the_cpu_count(self):
+        with patch.dict(os.environ):
+            os.environ.pop('WEB_CONCURRENCY', None)
+            os.environ.pop('GUNICORN_THREADS', None)
+            with patch('multiprocessing.cpu_count', return_value=2):
+                config = runpy.run_path(CONFIG_PATH)
+        self.assertEqual((config['workers'], config['threads']), (3, 4))
+
+
+class TestWarmUp(SimpleTestCase):
+
+    def test_templates_are_compiled(self):
+        template_fingerprint.cache_clear()
+        self.assertGreater(warm_templates(), 0)
+        self.assertEqual(template_fingerprint.cache_info().currsize, 3)
+
+    @patch('gc.freeze')
+    def test_warm_up_freezes_the_heap(self, freeze):
+        warmed = warm_up()
+        self.assertGreater(warmed['url_names'], 0)
+        freeze.assert_called_once()
@@ -0,0 +1,94 @@
+import json
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from tasks.instrumentation import MetricsRegistry, COUNT_BUCKETS, registry
+from tasks.middleware import PerformanceInstrumentationMiddleware
+from tasks.models import User
+
+
+class TestMetricsRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_is_rendered_cumulatively(self):
+        self.registry.observe('queries', 1, {'view': 'dashboard'}, buckets=(1, 5), help='Queries run.')
+        self.registry.observe('queries', 3, {'view': 'dashboard'}, buckets=(1, 5))
+        self.registry.observe('queries', 9, {'view': 'dashboard'}, buckets=(1, 5))
+        text = self.registry.render_prometheus()
+        self.assertIn('# HELP queries Queries run.', text)
+        self.assertIn('# TYPE queries histogram', text)
+        self.assertIn('queries_bucket{view="dashboard",le="1.0"} 1', text)
+        self.assertIn('queries_bucket{view="dashboard",le="5.0"} 2', text)
+        self.assertIn('queries_bucket{view="dashboard",le="+Inf"} 3', text)
+        self.assertIn('queries_sum{view="dashboard"} 13.0', text)
+        self.assertIn('queries_count{view="dashboard"} 3', text)
+
+    def test_counter(self):
+        self.registry.increment('hits', {'page': 'journal_log'})
+        self.registry.increment('hits', {'page': 'journal_log'}, amount=2)
+        self.assertEqual(self.registry.counter_value('hits', {'page': 'journal_log'}), 3)
+        self.assertIn('# TYPE hits counter', self.registry.render_prometheus())
+        self.assertIn('hits{page="journal_log"} 3', self.registry.render_prometheus())
+
+    def test_label_values_are_escaped(self):
+        self.registry.increment('hits', {'path': 'a"b'})
+        self.assertIn('hits{path="a\\"b"} 1', self.registry.render_prometheus())
+
+
+class TestPerformanceInstrumentationMiddleware(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/default_entry.json']
+
+    def setUp(self):
+        registry.reset()
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_request_is_logged_as_json(self):
+        with self.assertLogs('tasks.performance', level='INFO') as logs:
+            self.client.get(reverse('journal_log'))
+        measurements = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(measurements['view'], 'journal_log')
+        self.assertEqual(measurements['status'], 200)
+        self.assertGreater(measurements['db_queries'], 0)
+        self.assertGreater(measurements['template_time_ms'], 0)
+        self.assertGreater(measurements['response_bytes'], 0)
+
+    def test_request_is_added_to_histograms(self):
+        self.client.get(reverse('journal_log'))
+        histogram = registry.histogram('http_request_db_queries', {'view': 'journal_log'})
+        self.assertEqual(histogram.count, 1)
+        self.assertEqual(histogram.buckets, COUNT_BUCKETS)
+
+    def test_histograms_can_be_switched_off(self):
+        with self.settings(PERFORMANCE_HISTOGRAMS=False):
+            self.client.get(reverse('journal_log'))
+        self.assertIsNone(registry.histogram('http_request_duration_seconds', {'view': 'journal_log'}))
+
+
+def select_one():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+class TestAsyncInstrumentation(TestCase):
+
+    def test_counts_queries_run_on_a_worker_thread(self):
+        async def view(request):
+            await sync_to_async(select_one, thread_sensitive=False)()
+            await sync_to_async(select_one, thread_sensitive=False)()
+            return HttpResponse('ok')
+
+        middleware = PerformanceInstrumentationMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs('tasks.performance', level='INFO') as logs:
+            response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(json.loads(logs.records[-1].getMessage())['db_queries'], 2)
+
+    def test_sync_chain_stays_sync(self):
+        middleware = PerformanceInstrumentationMiddleware(lambda request: HttpResponse('ok'))
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(middleware(RequestFactory().get('/')).content, b'ok')
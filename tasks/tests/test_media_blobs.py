@@ -0,0 +1,140 @@
+import os
+import tempfile
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+from tasks.models import JournalEntry, MediaBlob, User
+from tasks.purge import purge_orphan_media
+from tasks.storage import ContentAddressedStorage, is_content_addressed
+from tasks.tests.helpers import enter_context
+from tasks.uploads import uploaded_names
+from tasks.views.ExportViews import link_callback
+
+
+class TestContentAddressedStorage(TestCase):
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage(location=enter_context(self, tempfile.TemporaryDirectory()))
+
+    def test_files_are_named_by_content(self):
+        first = self.storage.save('uploads/2024/05/01/notes.TXT', ContentFile(b'notes'))
+        second = self.storage.save('uploads/2024/06/01/copy.txt', ContentFile(b'notes'))
+        self.assertRegex(first, r'^uploads/([0-9a-f]{2})/\1[0-9a-f]{62}\.txt$')
+        self.assertEqual(second, first)
+        self.assertEqual(self.storage.listdir(os.path.dirname(first))[1], [os.path.basename(first)])
+
+    def test_content_addressed_names_are_kept(self):
+        name = 'uploads/ab/' + 'ab' * 32 + '-480w.webp'
+        self.assertEqual(self.storage.save(name, ContentFile(b'image')), name)
+        self.assertEqual(self.storage.save(name, ContentFile(b'other')), name)
+        with self.storage.open(name) as saved:
+            self.assertEqual(saved.read(), b'image')
+
+
+    def test_other_names_with_a_digest_in_them_are_hashed(self):
+        name = 'uploads/2024/05/01/report-' + 'ab' * 32 + '.txt'
+        first = self.storage.save(name, ContentFile(b'first'))
+        second = self.storage.save(name, ContentFile(b'second'))
+        self.assertNotEqual(first, second)
+        for saved_name, content in ((first, b'first'), (second, b'second')):
+            with self.storage.open(saved_name) as saved:
+                self.assertEqual(saved.read(), content)
+
+    def test_only_the_exact_layout_is_content_addressed(self):
+        digest = 'ab' * 32
+        for name in (f'uploads/ab/{digest}.gif', f'uploads/ab/{digest}-480w.webp', f'uploads/ab/{digest}-print.jpg',
+                     f'uploads/ab/{digest}-480w_thumb.webp'):
+            with self.subTest(name):
+                self.assertTrue(is_content_addressed(name))
+        for name in (f'uploads/cd/{digest}.gif', f'uploads/2024/ab/{digest}.gif', f'uploads/ab/x{digest}.gif',
+                     f'uploads/2024/05/01/{digest}.gif'):
+            with self.subTest(name):
+                self.assertFalse(is_content_addressed(name))
+
+class TestMediaBlobs(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username=self.user.username, password='Password123')
+        self.media_root = enter_context(self, tempfile.TemporaryDirectory())
+        enter_context(self, self.settings(MEDIA_ROOT=self.media_root, MEDIA_ORPHAN_GRACE_PERIOD=0))
+
+    def upload(self, colour='red'):
+        output = BytesIO()
+        Image.new('RGB', (1200, 800), colour).save(output, format='JPEG')
+        response = self.client.post(reverse('ckeditor_upload'), {'upload': SimpleUploadedFile('photo.jpg', output.getvalue())})
+        return response.json()['url']
+
+    def files(self):
+        return sorted(name for _, _, names in os.walk(self.media_root) for name in names)
+
+    def test_entries_reference_their_uploads(self):
+        red, blue = self.upload('red'), self.upload('blue')
+        entry = JournalEntry.objects.create(user=self.user, title='Photos', text=f'<img src="{red}"><img src="{blue}">')
+        other = JournalEntry.objects.create(user=self.user, title='Copy', text=f'<p><img src="{red}"></p>')
+        self.assertEqual(sorted(entry.media.values_list('name', flat=True)), sorted([red[8:], blue[8:]]))
+        self.assertEqual(MediaBlob.objects.get(name=red[8:]).entries.count(), 2)
+
+        entry.text = f'<img src="{blue}">'
+        entry.save()
+        self.assertEqual(list(entry.media.values_list('name', flat=True)), [blue[8:]])
+        other.text = 'No photo'
+        other.save()
+        self.assertFalse(MediaBlob.objects.get(name=red[8:]).entries.exists())
+
+    def test_images_written_by_the_editor_are_linked(self):
+        url = self.upload()
+        text = f'<p><img alt="" src="{url}" style="height:400px; width:600px" /></p>'
+        entry = JournalEntry.objects.create(user=self.user, title='Photo', text=text)
+        self.assertIn(f'<img alt="" src="{url}"', entry.display_html)
+        self.assertEqual(list(entry.media.values_list('name', flat=True)), [url[8:]])
+        self.assertEqual(purge_orphan_media(), 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, url[8:])))
+
+    def test_uploaded_names(self):
+        html = ('<img alt="a &amp; b" src="/images/uploads/ab/photo.webp" loading="lazy">'
+                '<img src="/images/uploads/cd/other.webp"><img alt="" src="https://example.org/uploads/x.png">'
+                '<img alt="no source">')
+        self.assertEqual(uploaded_names(html), {'uploads/ab/photo.webp', 'uploads/cd/other.webp'})
+        self.assertEqual(uploaded_names('<p>No images</p>'), set())
+
+    def test_orphans_are_deleted_with_their_files(self):
+        kept, orphan = self.upload('red'), self.upload('blue')
+        JournalEntry.objects.create(user=self.user, title='Photos', text=f'<img src="{kept}">')
+        self.assertEqual(purge_orphan_media(), 1)
+        self.assertEqual(list(MediaBlob.objects.values_list('name', flat=True)), [kept[8:]])
+        digest = os.path.basename(orphan).split('-')[0]
+        self.assertFalse([name for name in self.files() if name.startswith(digest)])
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, kept[8:])))
+
+    def test_recent_uploads_are_kept(self):
+        self.upload()
+        with self.settings(MEDIA_ORPHAN_GRACE_PERIOD=60):
+            self.assertEqual(purge_orphan_media(), 0)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_hard_deleting_an_entry_collects_its_uploads(self):
+        url = self.upload()
+        entry = JournalEntry.objects.create(user=self.user, title='Photo', text=f'<img src="{url}">')
+        entry.permanently_delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.files(), [])
+
+    def test_emptying_the_trash_collects_uploads(self):
+        url = self.upload()
+        entry = JournalEntry.objects.create(user=self.user, title='Photo', text=f'<img src="{url}">')
+        entry.delete_entry()
+        self.client.post(reverse('empty_trash'))
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.files(), [])
+
+    def test_link_callback_stops_resolving_collected_uploads(self):
+        url = self.upload()
+        self.assertTrue(os.path.isfile(link_callback(url, None)))
+        self.assertEqual(purge_orphan_media(), 1)
+        with self.assertRaises(Exception):
+            link_callback(url, None)
@@ -0,0 +1,70 @@
+from datetime import time
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group
+from django.db.models import signals
+from django.test import TestCase
+from tasks.models import Calendar, FlowerGrowth, JournalEntry, Template, User, UserPreferences
+from tasks.purge import plan_purge, purge
+from tasks.query_budget import query_budget
+from tasks.seeding import bulk_create_entries
+from tasks.tasks import purge_user_account
+
+
+class TestPurge(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        bulk_create_entries(self.user, 25)
+        bulk_create_entries(self.other_user, 5)
+        FlowerGrowth.objects.create(user=self.user)
+        UserPreferences.objects.create(user=self.user, journal_time=time(20))
+        self.user.groups.add(Group.objects.create(name='Testers'))
+        LogEntry.objects.log_action(self.user.pk, None, None, 'entry', ADDITION)
+
+    def test_plan_deletes_dependents_before_users(self):
+        steps = plan_purge(User)
+        models = [model for model, _, _ in steps]
+        self.assertEqual(models[-1], User)
+        for model in (JournalEntry, Template, FlowerGrowth, UserPreferences, Calendar, LogEntry):
+            self.assertIn(model, models)
+        self.assertFalse(any(use_collector for _, _, use_collector in steps))
+
+    def test_purge_removes_user_and_dependents(self):
+        progress = []
+        deleted = purge(User.objects.filter(pk=self.user.pk), batch_size=10,
+                        progress=lambda label, count: progress.append((label, count)))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(JournalEntry.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(Template.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(LogEntry.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(deleted['tasks.JournalEntry'], 25)
+        self.assertIn(('tasks.JournalEntry', 20), progress)
+        self.assertEqual(JournalEntry.objects.filter(user=self.other_user).count(), 5)
+        self.assertTrue(Group.objects.filter(name='Testers').exists())
+
+    def test_purge_runs_a_bounded_number_of_queries(self):
+        with query_budget(max_queries=40, max_repeats=10):
+            purge(User.objects.filter(pk=self.user.pk), batch_size=10)
+
+    def test_purge_uses_collector_when_signals_are_connected(self):
+        deleted_entries = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted_entries.append(instance.pk)
+
+        signals.post_delete.connect(receiver, sender=JournalEntry)
+        try:
+            self.assertIn((JournalEntry, 'user__pk__in', True), plan_purge(User))
+            purge(User.objects.filter(pk=self.user.pk))
+        finally:
+            signals.post_delete.disconnect(receiver, sender=JournalEntry)
+        self.assertEqual(len(deleted_entries), 25)
+
+    def test_purge_user_account_only_deletes_deactivated_users(self):
+        purge_user_account(self.user.pk)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        purge_user_account(self.user.pk)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
@@ -0,0 +1,100 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from tasks.middleware import QueryBudgetMiddleware
+from tasks.models import JournalEntry, User
+from tasks.query_budget import QueryBudgetExceeded, QueryRecorder, normalise_sql, query_budget
+
+
+class TestNormaliseSql(TestCase):
+
+    def test_literals_are_replaced(self):
+        self.assertEqual(
+            normalise_sql("SELECT * FROM t WHERE id = 12 AND name = 'bob'"),
+            'SELECT * FROM t WHERE id = ? AND name = ?'
+        )
+
+    def test_placeholder_lists_are_collapsed(self):
+        self.assertEqual(
+            normalise_sql('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            normalise_sql('SELECT * FROM t WHERE id IN (%s, %s)')
+        )
+
+
+class TestQueryBudget(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        for i in range(5):
+            JournalEntry.objects.create(user=self.user, title=f'Entry {i}', text='Text')
+
+    def test_recorder_counts_queries(self):
+        with QueryRecorder() as recorder:
+            list(JournalEntry.objects.all())
+            User.objects.count()
+        self.assertEqual(recorder.count, 2)
+
+    def test_block_within_budget(self):
+        with query_budget(max_queries=1):
+            list(JournalEntry.objects.select_related('user'))
+
+    def test_block_over_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(max_queries=1):
+                list(JournalEntry.objects.all())
+                User.objects.count()
+
+    def test_repeated_query_shapes_fail(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            with query_budget(max_queries=100, max_repeats=3):
+                for entry in JournalEntry.objects.all():
+                    entry.user.email
+
+    def test_decorator(self):
+        @query_budget(max_queries=1)
+        def count_entries():
+            return JournalEntry.objects.count()
+
+        self.assertEqual(count_entries(), 5)
+
+    @override_settings(QUERY_BUDGETS={'journal_log': 0})
+    def test_view_budget_from_settings(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "'journal_log' ran 1 queries"):
+            with query_budget(view='journal_log'):
+                JournalEntry.objects.count()
+
+    def test_undeclared_view_budget(self):
+        with self.assertRaises(KeyError):
+            query_budget(view='not_a_view')
+
+
+def select_one():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+class TestAsyncQueryBudget(TestCase):
+
+    def test_recorder_counts_queries_on_worker_threads(self):
+        async def run_queries():
+            with QueryRecorder() as recorder:
+                await sync_to_async(select_one, thread_sensitive=False)()
+                await sync_to_async(select_one, thread_sensitive=False)()
+            return recorder
+
+        self.assertEqual(async_to_sync(run_queries)().count, 2)
+
+    @override_settings(DEBUG=True, QUERY_BUDGET_MAX_REPEATS=3)
+    def test_async_middleware_reports_repeated_queries(self):
+        async def view(request):
+            for _ in range(4):
+                await sync_to_async(select_one, thread_sensitive=False)()
+            return HttpResponse('ok')
+
+        middleware = QueryBudgetMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs('tasks.performance', level='WARNING') as logs:
+            async_to_sync(middleware)(RequestFactory().get('/slow/'))
+        self.assertIn('/slow/ repeated a query 4 times', logs.output[0])
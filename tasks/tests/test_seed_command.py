@@ -0,0 +1,31 @@
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from tasks.models import DEFAULT_TEMPLATES, FlowerGrowth, JournalEntry, Template, User, UserPreferences
+from tasks.seeding import bulk_seed, parse_mood_weights
+
+
+@patch('builtins.print')
+class TestBulkSeed(TestCase):
+
+    def test_bulk_seed_creates_users_and_entries(self, mock_print):
+        call_command('seed', bulk=True, users=3, entries_per_user=5, batch_size=4, body_words=10)
+        users = User.objects.filter(username__startswith='@seed')
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(JournalEntry.objects.filter(user__in=users).count(), 15)
+        self.assertEqual(Template.objects.filter(user__in=users).count(), 3 * len(DEFAULT_TEMPLATES))
+        self.assertEqual(FlowerGrowth.objects.filter(user__in=users).count(), 3)
+        self.assertEqual(UserPreferences.objects.filter(user__in=users).count(), 3)
+        self.assertTrue(users.first().check_password('Password123'))
+
+    def test_bulk_seed_follows_mood_weights(self, mock_print):
+        bulk_seed(2, 20, 'Password123', mood_weights=(0, 0, 0, 0, 1), workers=2)
+        moods = set(JournalEntry.objects.filter(user__username__startswith='@seed').values_list('mood', flat=True))
+        self.assertEqual(moods, {5})
+
+    def test_bulk_seed_rejects_bad_moods(self, mock_print):
+        with self.assertRaises(CommandError):
+            call_command('seed', bulk=True, moods='6:1')
+
+    def test_parse_mood_weights(self, mock_print):
+        self.assertEqual(parse_mood_weights('3:4,1:1'), (1, 0, 4, 0, 0))
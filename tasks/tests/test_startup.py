@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from tasks.management.commands.loadtest import summarise_memory
+from tasks.startup import HEAVY_MODULES, parse_import_times, process_memory, profile_boot
+from tasks.tests.helpers import enter_context
+
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _weakrefset
+import time:       300 |        420 | abc
+import time:        50 |         50 |     django.utils.version
+import time:       200 |        250 |   django.utils
+import time:       400 |        650 | django
+"""
+
+
+class TestStartupProfile(SimpleTestCase):
+
+    def test_import_times_are_added_up_per_package(self):
+        total, packages = parse_import_times(IMPORTTIME_OUTPUT)
+        self.assertEqual(total, 1070)
+        self.assertEqual(packages, {'_weakrefset': 120, 'abc': 300, 'django': 650})
+
+    def test_booting_does_not_import_the_heavy_libraries(self):
+        profile = profile_boot()
+        self.assertEqual(profile['heavy_modules'], [])
+        self.assertGreater(profile['max_rss_mb'], 0)
+        self.assertIn('django', dict(profile['slowest_imports']))
+
+    def test_command_writes_the_measurements(self):
+        directory = enter_context(self, tempfile.TemporaryDirectory())
+        output = os.path.join(directory, 'startup.json')
+        call_command('startup_profile', runs=1, output=output, stdout=StringIO())
+        with open(output) as file:
+            result = json.load(file)
+        self.assertEqual(result['runs'], 1)
+        self.assertFalse(set(result['heavy_modules']) & set(HEAVY_MODULES))
+
+    def test_command_fails_over_budget(self):
+        with self.assertRaisesMessage(CommandError, 'over the 1 ms budget'):
+            call_command('startup_profile', runs=1, budget_ms=1, stdout=StringIO())
+
+    def test_process_memory(self):
+        memory = process_memory(os.getpid())
+        self.assertGreater(memory['rss_mb'], 0)
+        self.assertLessEqual(memory['uss_mb'], memory['rss_mb'])
+
+    def test_worker_memory_is_averaged(self):
+        workers = [
+            {'pid': 1, 'rss_mb': 50, 'pss_mb': 30, 'uss_mb': 10},
+            {'pid': 2, 'rss_mb': 60, 'pss_mb': 40, 'uss_mb': 20},
+        ]
+        self.assertEqual(
+            summarise_memory(workers),
+            {'workers': 2, 'worker_rss_mb': 55, 'worker_pss_mb': 35, 'worker_uss_mb': 15},
+        )
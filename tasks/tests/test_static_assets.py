@@ -0,0 +1,66 @@
+import io
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from tasks.models import User
+from tasks.page_weight import asset_urls, measure_page, transfer_size
+from tasks.storage import OptimisedStaticFilesStorage
+from tasks.tests.helpers import enter_context
+
+
+def png_bytes(size):
+    output = io.BytesIO()
+    Image.new('RGBA', size, (200, 80, 120, 255)).save(output, format='PNG')
+    return output.getvalue()
+
+
+class TestOptimisedStaticFilesStorage(TestCase):
+
+    @override_settings(STATIC_OPTIMISED_IMAGES=['images/flower_*.png'], STATIC_IMAGE_MAX_DIMENSION=100)
+    def test_optimise_images_adds_scaled_webp_variants(self):
+        source = FileSystemStorage(location=enter_context(self, tempfile.TemporaryDirectory()))
+        source.save('images/flower_stage_0.png', io.BytesIO(png_bytes((300, 300))))
+        source.save('images/other.png', io.BytesIO(png_bytes((300, 300))))
+        storage = OptimisedStaticFilesStorage(location=enter_context(self, tempfile.TemporaryDirectory()))
+        paths = {name: (source, name) for name in ('images/flower_stage_0.png', 'images/other.png')}
+
+        storage.optimise_images(paths)
+
+        self.assertEqual(paths['images/flower_stage_0.webp'], (storage, 'images/flower_stage_0.webp'))
+        self.assertNotIn('images/other.webp', paths)
+        with storage.open('images/flower_stage_0.webp') as webp, Image.open(webp) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (100, 100))
+        with storage.open('images/flower_stage_0.png') as png, Image.open(png) as image:
+            self.assertEqual(image.size, (100, 100))
+
+
+class TestPageWeight(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def test_asset_urls_counts_one_picture_source(self):
+        html = '''
+            <link rel="stylesheet" href="/static/custom.css"><link rel="canonical" href="/">
+            <script src="/static/calendar.js"></script>
+            <picture><source srcset="/static/images/logo.webp" type="image/webp"><img src="/static/images/logo.png"></picture>
+            <img src="/static/images/pencil.png"><img src="/static/images/pencil.png">
+        '''
+        self.assertEqual(asset_urls(html), [
+            '/static/custom.css', '/static/calendar.js', '/static/images/logo.webp', '/static/images/pencil.png',
+        ])
+
+    def test_transfer_size_compresses_text_only(self):
+        text = b'body { color: red; }\n' * 100
+        self.assertLess(transfer_size(text, 'custom.css'), len(text))
+        self.assertEqual(transfer_size(text, 'image.png'), len(text))
+
+    def test_measure_page(self):
+        self.client.force_login(User.objects.get(username='@johndoe'))
+        result = measure_page(self.client, reverse('dashboard'))
+        self.assertEqual(result['status'], 200)
+        urls = [asset['url'] for asset in result['assets']]
+        self.assertIn('/static/custom.css', urls)
+        self.assertIn('/static/images/flower_stage_0.png', urls)
+        self.assertGreater(result['transfer_bytes'], result['html_transfer_bytes'])
@@ -0,0 +1,51 @@
+import xml.etree.ElementTree as ET
+from django.test import SimpleTestCase
+from tasks.svg_charts import bar_chart, integer_ticks, line_chart, number
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+MOOD_TICKS = [(1, 'Very Sad'), (2, 'Sad'), (3, 'Neutral'), (4, 'Happy'), (5, 'Very Happy')]
+
+
+class TestSvgCharts(SimpleTestCase):
+
+    def test_bar_chart(self):
+        svg = ET.fromstring(bar_chart(['Sad', 'Happy'], [3, 1], title='Moods', x_label='Mood', y_label='Count'))
+        self.assertEqual(svg.find(f'{SVG}title').text, 'Moods')
+        bars = svg.findall(f'{SVG}rect')
+        self.assertEqual(len(bars), 2)
+        self.assertAlmostEqual(float(bars[0].get('height')), 3 * float(bars[1].get('height')), delta=0.2)
+        texts = [text.text for text in svg.iter(f'{SVG}text')]
+        for label in ('Sad', 'Happy', 'Mood', 'Count', '3', '1'):
+            self.assertIn(label, texts)
+
+    def test_labels_are_escaped(self):
+        svg = bar_chart(['<script>'], [1], title='a & b')
+        self.assertNotIn('<script>', svg)
+        self.assertIn('a &amp; b', svg)
+
+    def test_integer_ticks(self):
+        self.assertEqual([value for value, _ in integer_ticks(3)], [0, 1, 2, 3])
+        self.assertEqual([value for value, _ in integer_ticks(9)], [0, 2, 4, 6, 8, 10])
+        self.assertEqual([value for value, _ in integer_ticks(0)], [0, 1])
+        self.assertEqual([value for value, _ in integer_ticks(230)], [0, 50, 100, 150, 200, 250])
+
+    def test_line_chart_leaves_gaps(self):
+        svg = ET.fromstring(line_chart(['1', '2', '3', '4'], [1, 2, None, 5], MOOD_TICKS))
+        path = svg.findall(f'{SVG}path')[0].get('d')
+        self.assertEqual(path.count('M'), 2)
+        self.assertEqual(path.count('L'), 1)
+        self.assertEqual(len(svg.findall(f'{SVG}circle')), 3)
+
+    def test_line_chart_thins_out_x_labels(self):
+        labels = [f'day {i}' for i in range(31)]
+        svg = line_chart(labels, [3] * 31, MOOD_TICKS)
+        self.assertEqual(sum(f'>{label}<' in svg for label in labels), 8)
+
+    def test_empty_charts(self):
+        ET.fromstring(bar_chart([], []))
+        ET.fromstring(line_chart([], [], MOOD_TICKS))
+
+    def test_number(self):
+        self.assertEqual(number(12.0), '12')
+        self.assertEqual(number(12.345), '12.3')
@@ -7,6 +7,7 @@ from django.utils import timezone
 from unittest.mock import ANY, patch, MagicMock
 from tasks.tasks import reset_flower_growth_weekly, check_and_reset_growth_daily
 from tasks.models import FlowerGrowth, JournalEntry, User
+from tasks.query_budget import query_budget
 
 
 class TestEmailReminderTasks(TestCase):
@@ -22,7 +23,7 @@ class TestEmailReminderTasks(TestCase):
     def test_check_and_trigger_reminder_emails(self, mock_filter, mock_apply_async):
         # First test case: User preferences exist for the current day
         mock_preference = UserPreferences(user=User.objects.create(username='testuser'), journal_time=datetime.now().time(), opt_out=False)
-        mock_filter.return_value = [mock_preference]
+        mock_filter.return_value.select_related.return_value = [mock_preference]
         check_and_trigger_reminder_emails()
         mock_filter.assert_called_once()
         scheduled_time = datetime.combine(datetime.today(), mock_preference.journal_time)
@@ -36,7 +37,7 @@ class TestEmailReminderTasks(TestCase):
         mock_apply_async.reset_mock()
 
         # Second test case: No user preferences for the current day
-        mock_filter.return_value = []
+        mock_filter.return_value.select_related.return_value = []
         check_and_trigger_reminder_emails()
         mock_filter.assert_called_once()
         mock_apply_async.assert_not_called()
@@ -45,6 +46,15 @@ class TestEmailReminderTasks(TestCase):
         mock_filter.reset_mock()
         mock_apply_async.reset_mock()
 
+    @patch('tasks.tasks.send_reminder_emails.apply_async')
+    def test_check_and_trigger_reminder_emails_query_budget(self, mock_apply_async):
+        for i in range(5):
+            user = User.objects.create(username=f'@user{i}', email=f'user{i}@example.com')
+            UserPreferences.objects.create(user=user, journal_time=datetime.now().time())
+        with query_budget(max_queries=1):
+            check_and_trigger_reminder_emails()
+        self.assertEqual(mock_apply_async.call_count, 5)
+
 class TestFlowerGrowthTasks(TestCase):
 
     def setUp(self):
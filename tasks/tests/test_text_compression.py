@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import zlib
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from tasks.benchmarks import benchmark_text_compression, sample_entry_html
+from tasks.models import JournalEntry, User
+from tasks.text_compression import (
+    CompressedText, DICTIONARIES, compress_text, decompress_text, decompressed, train_dictionary,
+)
+
+
+TEXT = '<h1><strong><em>How was your day ?</em></strong></h1>\r\n\r\n<p>We went to the café by the river.</p>\r\n'
+
+
+class TestCodec(SimpleTestCase):
+
+    def test_round_trip(self):
+        for text in ('', 'a', TEXT, TEXT * 50, '日記 ' * 100):
+            with self.subTest(text=text[:20]):
+                self.assertEqual(decompress_text(compress_text(text)), text)
+
+    def test_the_dictionary_makes_short_entries_smaller(self):
+        compressed = compress_text(TEXT)
+        self.assertEqual(compressed[:2], b'\x01\x01')
+        self.assertLess(len(compressed), len(zlib.compress(TEXT.encode(), 9)))
+
+    def test_tiny_text_is_stored_as_it_is(self):
+        self.assertEqual(compress_text('hi'), b'\x00hi')
+        self.assertEqual(compress_text(''), b'\x00')
+
+    def test_reads_plain_zlib(self):
+        self.assertEqual(decompress_text(zlib.compress(TEXT.encode())), TEXT)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            decompress_text(b'\x07abc')
+
+    def test_decompressed(self):
+        self.assertEqual(decompressed(CompressedText(compress_text(TEXT))), TEXT)
+        self.assertEqual(decompressed(TEXT), TEXT)
+        self.assertIsNone(decompressed(None))
+
+    def test_train_dictionary_keeps_repeated_markup(self):
+        samples = [f'<p class="question">What went well ?</p><p>Entry {n}</p>' for n in range(10)]
+        dictionary = train_dictionary(samples, size=64)
+        self.assertLessEqual(len(dictionary), 64)
+        self.assertIn(b'What went well ?', dictionary)
+        self.assertNotIn(b'Entry 3', dictionary)
+
+
+class TestCompressedFields(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.entry = JournalEntry.objects.create(user=self.user, title='Day', text=TEXT)
+
+    def stored(self, column):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {column} FROM tasks_journalentry WHERE id = %s', [self.entry.pk])
+            return bytes(cursor.fetchone()[0])
+
+    def test_bodies_are_stored_compressed(self):
+        self.assertEqual(decompress_text(self.stored('text')), TEXT)
+        self.assertEqual(decompress_text(self.stored('display_html')), self.entry.display_html)
+        self.assertLess(len(self.stored('text')), len(TEXT.encode()))
+        self.assertIn('café', JournalEntry.objects.get(pk=self.entry.pk).plain_text)
+
+    def test_decompressed_only_when_read(self):
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        self.assertIsInstance(entry.__dict__['display_html'], CompressedText)
+        self.assertEqual(entry.display_html, self.entry.display_html)
+        self.assertEqual(entry.__dict__['display_html'], self.entry.display_html)
+
+    def test_saving_unread_bodies_does_not_compress_them_again(self):
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        entry.favourited = True
+        with patch('tasks.fields.compress_text') as compress, patch('tasks.models.process_entry_text') as process:
+            entry.save()
+        compress.assert_not_called()
+        process.assert_not_called()
+        self.assertEqual(JournalEntry.objects.get(pk=self.entry.pk).text, TEXT)
+
+    def test_editing_the_text(self):
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        entry.text = '<p>Changed</p>'
+        entry.save()
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        self.assertEqual((entry.text, entry.plain_text), ('<p>Changed</p>', 'Changed'))
+
+
+class TestCompressionBenchmark(TestCase):
+
+    def test_benchmark_text_compression(self):
+        samples = sample_entry_html(20, seed=1)
+        self.assertEqual(len(samples), 40)
+        results = benchmark_text_compression(samples, {'deflate': None, 'v1': DICTIONARIES[1]}, rounds=1)
+        self.assertEqual(results['deflate']['raw_bytes'], sum(len(sample.encode()) for sample in samples))
+        self.assertLess(results['v1']['stored_bytes'], results['deflate']['stored_bytes'])
+        self.assertGreater(results['v1']['decode_us'], 0)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output, dictionary = os.path.join(directory, 'results.json'), os.path.join(directory, 'dictionary.bin')
+            call_command('compression_benchmark', sample=20, rounds=1, output=output,
+                         write_dictionary=dictionary, stdout=StringIO())
+            with open(output) as results:
+                self.assertIn('trained dictionary', json.load(results)['results'])
+            self.assertTrue(os.path.getsize(dictionary))
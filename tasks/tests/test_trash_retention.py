@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from tasks.models import JournalEntry, Template, User
+from tasks.purge import purge_expired_trash
+from tasks.tasks import purge_expired_trash_task
+
+
+@override_settings(TRASH_RETENTION_DAYS=30)
+class TestTrashRetention(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        expired = timezone.now() - timedelta(days=31)
+        recent = timezone.now() - timedelta(days=5)
+        self.expired_entries = [
+            JournalEntry.objects.create(user=self.user, title=f'Old {i}', text='Text', deleted=True, deleted_at=expired)
+            for i in range(5)
+        ]
+        self.recent_entry = JournalEntry.objects.create(user=self.user, title='Recent', text='Text', deleted=True, deleted_at=recent)
+        self.live_entry = JournalEntry.objects.create(user=self.user, title='Live', text='Text')
+        self.expired_template = Template.objects.create(user=self.user, name='Old', deleted=True, deleted_at=expired)
+
+    def test_delete_and_recover_track_deleted_at(self):
+        self.live_entry.delete_entry()
+        self.assertIsNotNone(self.live_entry.deleted_at)
+        self.live_entry.recover_entry()
+        self.assertIsNone(self.live_entry.deleted_at)
+
+    def test_purge_expired_trash(self):
+        deleted = purge_expired_trash(batch_size=2)
+        self.assertEqual(deleted['tasks.JournalEntry'], 5)
+        self.assertEqual(deleted['tasks.Template'], 1)
+        self.assertEqual(
+            set(JournalEntry.objects.filter(user=self.user).values_list('pk', flat=True)),
+            {self.recent_entry.pk, self.live_entry.pk},
+        )
+
+    def test_purge_expired_trash_stops_at_time_budget(self):
+        deleted = purge_expired_trash(time_budget=0)
+        self.assertEqual(sum(deleted.values()), 0)
+        self.assertEqual(JournalEntry.objects.filter(user=self.user).count(), 7)
+
+    def test_purge_expired_trash_task(self):
+        purge_expired_trash_task()
+        self.assertFalse(Template.objects.filter(pk=self.expired_template.pk).exists())
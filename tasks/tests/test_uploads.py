@@ -0,0 +1,105 @@
+import os
+import tempfile
+from hashlib import sha256
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+from tasks.entry_text import process_entry_text
+from tasks.models import MediaBlob, User
+from tasks.tests.helpers import enter_context
+from tasks.views.ExportViews import link_callback
+
+
+def make_image(size, format='JPEG', mode='RGB', exif=None):
+    output = BytesIO()
+    options = {'exif': exif.tobytes()} if exif is not None else {}
+    Image.new(mode, size, 'red' if mode == 'RGB' else (255, 0, 0, 0)).save(output, format=format, **options)
+    return output.getvalue()
+
+
+class TestUploads(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username=self.user.username, password='Password123')
+        self.media_root = enter_context(self, tempfile.TemporaryDirectory())
+        enter_context(self, self.settings(MEDIA_ROOT=self.media_root))
+
+    def upload(self, data, name='photo.jpg'):
+        response = self.client.post(reverse('ckeditor_upload'), {'upload': SimpleUploadedFile(name, data)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['url']
+
+    def path(self, url):
+        return os.path.join(self.media_root, url[len('/images/'):])
+
+    def uploaded_files(self):
+        return sorted(name for _, _, names in os.walk(self.media_root) for name in names)
+
+    def test_photo_is_scaled_rotated_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+        exif[0x010f] = 'Phone maker'
+        url = self.upload(make_image((4000, 3000), exif=exif))
+
+        self.assertRegex(url, r'^/images/uploads/[0-9a-f]{2}/[0-9a-f]{64}-1200w\.webp$')
+        with Image.open(self.path(url)) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (1200, 1600))
+            self.assertEqual(len(image.getexif()), 0)
+
+        print_url = url.replace('-1200w.webp', '-print.jpg')
+        with Image.open(self.path(print_url)) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (1800, 2400))
+            self.assertEqual(len(image.getexif()), 0)
+
+        for width in (480, 960):
+            with Image.open(self.path(url.replace('-1200w', f'-{width}w'))) as image:
+                self.assertEqual(image.width, width)
+
+    def test_identical_uploads_are_stored_once(self):
+        data = make_image((2000, 1000))
+        first = self.upload(data, 'first.jpg')
+        files = self.uploaded_files()
+        second = self.upload(data, 'second.jpg')
+        self.assertEqual(first, second)
+        self.assertEqual(self.uploaded_files(), files)
+
+    def test_small_transparent_image(self):
+        url = self.upload(make_image((300, 200), format='PNG', mode='RGBA'), 'drawing.png')
+        self.assertTrue(url.endswith('-300w.webp'))
+        with Image.open(self.path(url)) as image:
+            self.assertEqual(image.mode, 'RGBA')
+        with Image.open(self.path(url.replace('-300w.webp', '-print.jpg'))) as image:
+            self.assertEqual(image.getpixel((0, 0)), (255, 255, 255))
+        self.assertEqual(process_entry_text(f'<img src="{url}">').display_html, f'<img src="{url}" loading="lazy">')
+
+    def test_animated_gif_is_kept_as_uploaded(self):
+        frames = [Image.new('RGB', (10, 10), colour) for colour in ('red', 'blue')]
+        output = BytesIO()
+        frames[0].save(output, format='GIF', save_all=True, append_images=frames[1:])
+        url = self.upload(output.getvalue(), 'animation.gif')
+        digest = sha256(output.getvalue()).hexdigest()
+        self.assertEqual(url, f'/images/uploads/{digest[:2]}/{digest}.gif')
+        with open(self.path(url), 'rb') as uploaded:
+            self.assertEqual(uploaded.read(), output.getvalue())
+
+    def test_uploads_are_recorded(self):
+        url = self.upload(make_image((2000, 1000)))
+        self.assertTrue(MediaBlob.objects.filter(name=url[len('/images/'):]).exists())
+
+    def test_entry_html_offers_srcset(self):
+        url = self.upload(make_image((2000, 1000)))
+        base = url[:-len('-1600w.webp')]
+        self.assertIn(
+            f'srcset="{base}-480w.webp 480w, {base}-960w.webp 960w, {url} 1600w"',
+            process_entry_text(f'<p><img src="{url}"></p>').display_html,
+        )
+
+    def test_pdf_export_uses_the_print_copy(self):
+        url = self.upload(make_image((2000, 1000)))
+        self.assertEqual(link_callback(url, None), self.path(url.replace('-1600w.webp', '-print.jpg')))
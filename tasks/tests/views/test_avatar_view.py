@@ -0,0 +1,54 @@
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.avatars import gravatar_digest
+from tasks.models import User
+from tasks.query_budget import query_budget
+from tasks.tests.helpers import avatar_fetches, enter_context
+
+@override_settings(AVATAR_PROXY=True, AVATAR_UPSTREAM_FETCHER='tasks.tests.helpers.fake_avatar_fetcher')
+class AvatarViewTestCase(TestCase):
+    """Tests for the avatar proxy view."""
+
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        cache_dir = enter_context(self, tempfile.TemporaryDirectory())
+        enter_context(self, self.settings(AVATAR_CACHE_DIR=cache_dir))
+        self.user = User.objects.get(username='@johndoe')
+        self.digest = gravatar_digest(self.user.email)
+        self.url = reverse('avatar', args=[self.digest, 60])
+        avatar_fetches.clear()
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, f'/avatar/{self.digest}/60/')
+        self.assertEqual(self.user.mini_gravatar(), self.url)
+
+    def test_get_avatar_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_get_avatar(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('max-age=604800', response['Cache-Control'])
+        self.assertEqual(len(avatar_fetches), 1)
+
+    def test_get_avatar_with_invalid_size(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('avatar', args=[self.digest, 4096]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(AVATAR_UPSTREAM_FETCHER='tasks.tests.helpers.unreachable_avatar_fetcher')
+    def test_get_avatar_when_upstream_is_unreachable(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('avatar', args=[self.digest, 61]))
+        self.assertEqual(response.status_code, 502)
+
+    def test_avatar_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='avatar'):
+            self.client.get(self.url)
@@ -2,6 +2,7 @@ from django.test import TestCase
 from tasks.models import JournalEntry, User
 from django.urls import reverse
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 
 class CreateJounalEntryViewTestCase(TestCase):
@@ -75,3 +76,8 @@ class CreateJounalEntryViewTestCase(TestCase):
         self.assertEqual(before_count, after_count)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'components/create_entry.html')
+
+    def test_create_journal_entry_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='create_entry'):
+            self.client.get(self.url)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.urls import reverse
 from tasks.models import JournalEntry, User
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 class DashboardViewTestCase(TestCase):
     """Tests of the home view."""
@@ -52,4 +53,11 @@ class DashboardViewTestCase(TestCase):
     def test_get_profile_redirects_when_not_logged_in(self):
         redirect_url = reverse_with_next('log_in', self.url)
         response = self.client.get(self.url)
-        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
\ No newline at end of file
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def test_dashboard_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(title=f"Entry {i}", text="Text", user=self.user)
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='dashboard'):
+            self.client.get(self.url)
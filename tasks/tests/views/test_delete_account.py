@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.urls import reverse
-from tasks.models import User
+from tasks.models import JournalEntry, User
+from tasks.query_budget import query_budget
 
 
 class AccountDeletionTest(TestCase):
@@ -19,3 +20,15 @@ class AccountDeletionTest(TestCase):
         # Check that the account has been deleted
         self.assertEqual(response.status_code, 302)  # Expecting a redirect status code
         self.assertFalse(User.objects.filter(username='testuser').exists())  # Check that the user does not exist anymore
+
+    def test_account_deletion_logs_out_and_purges_user(self):
+        JournalEntry.objects.create(user=self.user, title='Entry', text='Text', mood=3)
+        response = self.client.post(reverse('delete_account'))
+        self.assertRedirects(response, reverse('log_in'))
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(JournalEntry.objects.filter(user_id=self.user.pk).exists())
+
+    def test_delete_account_confirmation_query_budget(self):
+        with query_budget(view='delete_account'):
+            self.client.get(reverse('delete_account'))
@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.urls import reverse
 from tasks.models import User, JournalEntry
+from tasks.query_budget import query_budget
 
 class DeleteSelectedEntriesTestCase(TestCase):
     fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/default_entry.json']
@@ -23,3 +24,35 @@ class DeleteSelectedEntriesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'success': True, 'message': 'Selected entries moved to trash!'})
 
+        self.assertFalse(JournalEntry.objects.filter(pk__in=self.entry_ids, deleted=False).exists())
+
+    def test_delete_selected_entries_of_another_user(self):
+        data = {'entryIds': self.entry_ids + [3]}
+        JournalEntry.objects.create(pk=3, user=User.objects.create_user(username='@janedoe', email='jane@example.org', password='Password123'), title='Not yours', text='text')
+        response = self.client.post(self.url, data, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(JournalEntry.objects.filter(deleted=True).exists())
+
+    def test_delete_selected_entries_that_do_not_exist(self):
+        data = {'entryIds': self.entry_ids + [999]}
+        response = self.client.post(self.url, data, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(JournalEntry.objects.filter(deleted=True).exists())
+
+    def test_delete_selected_entries_with_malformed_payload(self):
+        for body in ('not json', '[1, 2]', '{"entryIds": 5}', '{"entryIds": ["1", "abc"]}', '{"entryIds": [1.5]}'):
+            with self.subTest(body=body):
+                response = self.client.post(self.url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(JournalEntry.objects.filter(deleted=True).exists())
+
+    def test_delete_selected_entries_with_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_delete_selected_entries_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(title=f'Entry {i}', text='Text', user=self.user)
+        entry_ids = list(JournalEntry.objects.filter(user=self.user).values_list('pk', flat=True))
+        with query_budget(view='delete_selected_entries'):
+            self.client.post(self.url, {'entryIds': entry_ids}, content_type='application/json')
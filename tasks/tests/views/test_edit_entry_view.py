@@ -3,6 +3,7 @@ from django.urls import reverse
 from tasks.models import JournalEntry, User
 from tasks.forms import JournalEntryForm
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 class JournalEntryUpdateViewTestCase(TestCase):
     """Tests for JournalEntryUpdateView."""
@@ -60,4 +61,7 @@ class JournalEntryUpdateViewTestCase(TestCase):
         self.journal_entry.refresh_from_db()
         self.assertEqual(self.journal_entry.title, 'Test Title')
 
- 
\ No newline at end of file
+    def test_edit_journal_entry_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='edit_entry'):
+            self.client.get(self.url)
@@ -4,6 +4,7 @@ from django.urls import reverse
 from tasks.forms import UserPreferenceForm
 from tasks.models import UserPreferences, User
 from tasks.tests.helpers import LogInTester, reverse_with_next
+from tasks.query_budget import query_budget
 
 class EditPreferencesViewTestCase(TestCase, LogInTester):
     """Tests of the edit preferences view."""
@@ -61,4 +62,9 @@ class EditPreferencesViewTestCase(TestCase, LogInTester):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'registration/edit_preferences.html')
         self.assertTrue(response.context['form'].errors)
-    
+
+    def test_edit_preferences_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        UserPreferences.objects.create(user=self.user, journal_time='17:30:00')
+        with query_budget(view='edit_preferences'):
+            self.client.get(self.url)
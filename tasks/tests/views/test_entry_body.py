@@ -0,0 +1,53 @@
+from django.test import TestCase
+from django.urls import reverse
+from tasks.models import User, JournalEntry
+from tasks.query_budget import query_budget
+
+class EntryBodyTestCase(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json',
+                'tasks/tests/fixtures/default_entry.json', 'tasks/tests/fixtures/other_entries.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.entry = JournalEntry.objects.get(pk=1)
+        self.entry.text = '<p>Hello <script>alert(1)</script>world</p>'
+        self.entry.save()
+        self.url = reverse('entry_body', kwargs={'entry_id': self.entry.pk})
+
+    def test_entry_body_url(self):
+        self.assertEqual(self.url, f'/entry_body/{self.entry.pk}/')
+
+    def test_entry_body_returns_display_html(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'display_html': '<p>Hello world</p>'})
+
+    def test_entry_body_of_deleted_entry(self):
+        self.entry.delete_entry()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_entry_body_of_other_users_entry(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('entry_body', kwargs={'entry_id': 3}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_entry_body_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('log_in')))
+
+    def test_list_cards_do_not_include_the_body(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('journal_log'))
+        self.assertContains(response, 'Hello world')
+        self.assertNotContains(response, '<p>Hello world</p>')
+        self.assertContains(response, f'data-body-url="{self.url}"')
+        self.assertContains(response, '2 words · 1 min read')
+
+    def test_entry_body_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='entry_body'):
+            self.client.get(self.url)
@@ -5,20 +5,23 @@ from django.contrib.auth import get_user_model
 from tasks.models import JournalEntry 
 from PyPDF2 import PdfReader
 from io import BytesIO
+from unittest.mock import patch
+from tasks.query_budget import query_budget
 
 User = get_user_model()
 class ExportTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='@johndoe', password='Password123')
         self.entry = JournalEntry.objects.create(title="Test Entry", text="This is a test.", user=self.user)
-
+        self.client.login(username=self.user.username, password='Password123')
 
     def test_export_journal_entry_to_pdf(self):
         response = self.client.get(reverse('export_journal_entry_to_pdf', args=[self.entry.id]))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
         
-        pdf = PdfReader(BytesIO(response.content))
+        self.assertTrue(response.streaming)
+        pdf = PdfReader(BytesIO(response.getvalue()))
         page = pdf.pages[0]  
         text = page.extract_text()
         self.assertIn('Test Entry', text)
@@ -28,10 +31,88 @@ class ExportTest(TestCase):
         response = self.client.get(reverse('export_journal_entry_to_rtf', args=[self.entry.id]))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/rtf')
-        self.assertIn('Test Entry', response.content.decode())
+        self.assertIn('Test Entry', response.getvalue().decode())
+
+    def test_single_entry_export_filename_is_escaped(self):
+        self.entry.title = 'A "quoted" day'
+        self.entry.save()
+        for name in ('export_journal_entry_to_pdf', 'export_journal_entry_to_rtf'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[self.entry.id]))
+                self.assertEqual(response['Content-Disposition'],
+                                 f'attachment; filename="A \\"quoted\\" day.{name[-3:]}"')
+
+    def test_single_entry_export_range_request(self):
+        content = self.client.get(reverse('export_journal_entry_to_rtf', args=[self.entry.id])).getvalue()
+        response = self.client.get(reverse('export_journal_entry_to_rtf', args=[self.entry.id]), HTTP_RANGE='bytes=0-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.getvalue(), content[:5])
+
+    def test_exports_require_login(self):
+        self.client.logout()
+        for url in (reverse('export_journal_entry_to_pdf', args=[self.entry.id]),
+                    reverse('export_journal_entry_to_rtf', args=[self.entry.id]),
+                    reverse('export_entries') + f'?entries={self.entry.id}&format=rtf'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response.url.startswith(reverse('log_in')))
+
+    def test_cannot_export_the_entries_of_another_user(self):
+        other_user = User.objects.create_user(username='@janedoe', email='jane@example.org', password='Password123')
+        other_entry = JournalEntry.objects.create(title="Secret", text="Not yours.", user=other_user)
+        for name in ('export_journal_entry_to_pdf', 'export_journal_entry_to_rtf'):
+            self.assertEqual(self.client.get(reverse(name, args=[other_entry.id])).status_code, 404)
+        response = self.client.get(reverse('export_entries'), {'entries': f'{self.entry.id},{other_entry.id}', 'format': 'rtf'})
+        content = response.getvalue().decode()
+        self.assertIn('Test Entry', content)
+        self.assertNotIn('Secret', content)
 
     def test_export_entries_invalid_format(self):
-        self.client.login(username=self.user.username, password='Password123')
         response = self.client.get(reverse('export_entries'), {'entries': self.entry.id, 'format': 'invalid'})
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content.decode(), 'Invalid export format')
\ No newline at end of file
+        self.assertEqual(response.content.decode(), 'Invalid export format')
+
+    def test_export_entries_to_pdf(self):
+        other_entry = JournalEntry.objects.create(title="Other Entry", text="Another test.", user=self.user)
+        response = self.client.get(reverse('export_entries'), {'entries': f'{self.entry.id},{other_entry.id}', 'format': 'pdf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        self.assertTrue(response.streaming)
+        pdf = PdfReader(BytesIO(response.getvalue()))
+        self.assertEqual(len(pdf.pages), 2)
+        self.assertIn('Test Entry', pdf.pages[0].extract_text())
+        self.assertIn('Other Entry', pdf.pages[1].extract_text())
+
+    def test_export_entries_to_pdf_in_batches(self):
+        entry_ids = [self.entry.id] + [
+            JournalEntry.objects.create(title=f"Entry {i}", text="Text", user=self.user).id for i in range(4)
+        ]
+        with patch('tasks.views.ExportViews.PDF_MERGE_BATCH_SIZE', 2):
+            response = self.client.get(reverse('export_entries'), {'entries': ','.join(map(str, entry_ids)), 'format': 'pdf'})
+        pdf = PdfReader(BytesIO(response.getvalue()))
+        self.assertEqual(len(pdf.pages), 5)
+        self.assertIn('Test Entry', pdf.pages[0].extract_text())
+        self.assertIn('Entry 3', pdf.pages[4].extract_text())
+
+    def test_export_entries_to_rtf(self):
+        response = self.client.get(reverse('export_entries'), {'entries': self.entry.id, 'format': 'rtf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/rtf')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="journalentries.rtf"')
+        self.assertIn('This is a test.', response.getvalue().decode())
+
+    def test_export_entries_range_request(self):
+        content = self.client.get(reverse('export_entries'), {'entries': self.entry.id, 'format': 'rtf'}).getvalue()
+        response = self.client.get(reverse('export_entries'), {'entries': self.entry.id, 'format': 'rtf'},
+                                   HTTP_RANGE='bytes=5-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 5-9/{len(content)}')
+        self.assertEqual(response.getvalue(), content[5:10])
+
+    def test_export_entries_query_budget(self):
+        entry_ids = [JournalEntry.objects.create(title=f"Entry {i}", text="Text", user=self.user).id for i in range(5)]
+        with query_budget(view='export_entries'):
+            self.client.get(reverse('export_entries'), {'entries': ','.join(map(str, entry_ids)), 'format': 'rtf'})
+        with query_budget(view='export_journal_entry_to_rtf'):
+            self.client.get(reverse('export_journal_entry_to_rtf', args=[self.entry.id]))
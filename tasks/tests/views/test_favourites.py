@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.urls import reverse
-from tasks.models import User
+from tasks.models import User, JournalEntry
+from tasks.query_budget import query_budget
 
 class TestFavouritesTestCase(TestCase):
     fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json', 
@@ -45,3 +46,10 @@ class TestFavouritesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'pages/favourites.html')
         self.assertNotContains(response, "New Entry 2")
+
+    def test_favourites_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(title=f"Entry {i}", text="Text", user=self.user, favourited=True)
+        self.client.login(username=self.user.username, password="Password123")
+        with query_budget(view='favourites'):
+            self.client.get(self.url)
@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.urls import reverse
+from tasks.models import User, JournalEntry
+from tasks.query_budget import query_budget
+
+class GetJournalEntriesTestCase(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json', 
+                'tasks/tests/fixtures/default_entry.json', 'tasks/tests/fixtures/other_entries.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.url = reverse('get_journal_entries')
+
+    def test_get_journal_entries_url(self):
+        self.assertEqual(self.url, '/get_journal_entries/')
+
+    def test_get_journal_entries_for_date(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'date': '2024-02-01'})
+        self.assertEqual(response.status_code, 200)
+        titles = [entry['title'] for entry in response.json()['entries']]
+        self.assertEqual(sorted(titles), ['New Entry', 'New Entry 2'])
+
+    def test_get_journal_entries_returns_only_the_excerpt(self):
+        entry = JournalEntry.objects.get(pk=1)
+        entry.text = '<p>' + 'word ' * 500 + '</p>'
+        entry.save()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'date': entry.created_at.date().isoformat()})
+        returned = next(returned for returned in response.json()['entries'] if returned['id'] == entry.pk)
+        self.assertEqual(set(returned), {'id', 'title', 'mood', 'excerpt', 'word_count', 'reading_time'})
+        self.assertEqual(returned['excerpt'], entry.excerpt)
+        self.assertEqual(returned['word_count'], 500)
+        self.assertEqual(returned['reading_time'], 3)
+
+    def test_get_journal_entries_excludes_deleted_entries(self):
+        JournalEntry.objects.filter(pk=1).update(deleted=True)
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'date': '2024-02-01'})
+        titles = [entry['title'] for entry in response.json()['entries']]
+        self.assertEqual(titles, ['New Entry 2'])
+
+    def test_get_journal_entries_with_invalid_date(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'date': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_journal_entries_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url, {'date': '2024-02-01'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('log_in')))
+
+    def test_search_favourite_suggestion(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('search_favouriteSuggestion'), {'q': 'entry'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'suggestions': ['New Entry 2']})
+
+    def test_search_favourite_suggestion_excludes_deleted_entries(self):
+        JournalEntry.objects.filter(title='New Entry 2').update(deleted=True)
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('search_favouriteSuggestion'), {'q': 'entry'})
+        self.assertEqual(response.json(), {'suggestions': []})
+
+    def test_search_favourite_suggestion_without_query(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('search_favouriteSuggestion'))
+        self.assertEqual(response.json(), {'suggestions': []})
+
+    def test_get_journal_entries_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(title=f'Entry {i}', text='Text', user=self.user)
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='get_journal_entries'):
+            self.client.get(self.url, {'date': '2024-02-01'})
+        with query_budget(view='search_favouriteSuggestion'):
+            self.client.get(reverse('search_favouriteSuggestion'), {'q': 'entry'})
@@ -2,6 +2,7 @@
 from django.test import TestCase
 from django.urls import reverse
 from tasks.models import User
+from tasks.query_budget import query_budget
 
 class HomeViewTestCase(TestCase):
     """Tests of the home view."""
@@ -25,4 +26,8 @@ class HomeViewTestCase(TestCase):
         response = self.client.get(self.url, follow=True)
         redirect_url = reverse('dashboard')
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
-        self.assertTemplateUsed(response, 'pages/dashboard.html')
\ No newline at end of file
+        self.assertTemplateUsed(response, 'pages/dashboard.html')
+
+    def test_home_query_budget(self):
+        with query_budget(view='home'):
+            self.client.get(self.url)
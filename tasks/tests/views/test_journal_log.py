@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.urls import reverse
-from tasks.models import User
+from tasks.models import User, JournalEntry
+from tasks.query_budget import query_budget
 
 class TestJournalLogTestCase(TestCase):
     fixtures = ['tasks/tests/fixtures/default_user.json', 'tasks/tests/fixtures/other_users.json', 
@@ -46,4 +47,11 @@ class TestJournalLogTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'pages/journal_log.html')
         self.assertNotContains(response, "New Entry 2")
-        self.assertNotContains(response, self.user.username)
\ No newline at end of file
+        self.assertNotContains(response, self.user.username)
+
+    def test_journal_log_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(title=f"Entry {i}", text="Text", user=self.user, favourited=i % 2 == 0)
+        self.client.login(username=self.user.username, password="Password123")
+        with query_budget(view='journal_log'):
+            self.client.get(self.url)
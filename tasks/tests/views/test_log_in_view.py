@@ -5,6 +5,7 @@ from django.urls import reverse
 from tasks.forms import LogInForm
 from tasks.models import User
 from tasks.tests.helpers import LogInTester, MenuTesterMixin, reverse_with_next
+from tasks.query_budget import query_budget
 
 class LogInViewTestCase(TestCase, LogInTester, MenuTesterMixin):
     """Tests of the log in view."""
@@ -141,3 +142,7 @@ class LogInViewTestCase(TestCase, LogInTester, MenuTesterMixin):
         messages_list = list(response.context['messages'])
         self.assertEqual(len(messages_list), 1)
         self.assertEqual(messages_list[0].level, messages.ERROR)
+
+    def test_log_in_query_budget(self):
+        with query_budget(view='log_in'):
+            self.client.get(self.url)
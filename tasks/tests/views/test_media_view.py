@@ -0,0 +1,51 @@
+import os
+import tempfile
+from django.test import TestCase
+from django.urls import reverse
+from tasks.query_budget import query_budget
+from tasks.tests.helpers import enter_context
+
+
+class MediaViewTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = enter_context(self, tempfile.TemporaryDirectory())
+        enter_context(self, self.settings(MEDIA_ROOT=self.media_root))
+        self.name = 'uploads/ab/' + 'ab' * 32 + '-480w.webp'
+        os.makedirs(os.path.join(self.media_root, 'uploads/ab'))
+        with open(os.path.join(self.media_root, self.name), 'wb') as file:
+            file.write(b'webp image')
+        with open(os.path.join(self.media_root, 'logo.png'), 'wb') as file:
+            file.write(b'png image')
+
+    def test_media_url(self):
+        self.assertEqual(reverse('media', args=['logo.png']), '/images/logo.png')
+
+    def test_content_addressed_upload_is_immutable(self):
+        response = self.client.get(f'/images/{self.name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.getvalue(), b'webp image')
+
+    def test_other_files_are_cached_briefly(self):
+        response = self.client.get('/images/logo.png')
+        self.assertEqual(response.getvalue(), b'png image')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        response = self.client.get('/images/logo.png', HTTP_RANGE='bytes=0-2')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.getvalue(), b'png')
+
+    def test_missing_file(self):
+        self.assertEqual(self.client.get('/images/missing.png').status_code, 404)
+        self.assertEqual(self.client.get('/images/uploads').status_code, 404)
+
+    def test_paths_outside_media_root(self):
+        self.assertEqual(self.client.get('/images/../../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/images/%2e%2e/%2e%2e/manage.py').status_code, 404)
+
+    def test_media_query_budget(self):
+        with query_budget(view='media'):
+            self.client.get('/images/logo.png').close()
@@ -0,0 +1,28 @@
+from django.test import TestCase
+from django.urls import reverse
+from tasks.models import User
+
+class MetricsViewTestCase(TestCase):
+    fixtures = ['tasks/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.url = reverse('metrics')
+
+    def test_metrics_url(self):
+        self.assertEqual(self.url, '/metrics/')
+
+    def test_metrics_are_hidden_from_normal_users(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_metrics_are_shown_to_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('http_request_duration_seconds_count{view="dashboard"}', response.content.decode())
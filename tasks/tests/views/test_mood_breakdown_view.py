@@ -5,6 +5,7 @@ from django.utils import timezone
 from tasks.models import JournalEntry
 from django.contrib.auth import get_user_model
 from datetime import timedelta
+from tasks.query_budget import query_budget
 
 User = get_user_model()
 
@@ -48,6 +49,20 @@ class MoodBreakdownViewTest(TestCase):
         self.assertIn('mood_month', response.context)
         self.assertIn('mood_chart', response.context)
 
+    def test_mood_breakdown_charts_are_inline_svg(self):
+        """Test the mood charts are drawn as SVG, without matplotlib."""
+        response = self.client.get(self.url)
+        self.assertContains(response, '<svg', count=2)
+        self.assertContains(response, '>Very Happy<')
+        self.assertNotContains(response, 'data:image/png')
+
+    def test_mood_breakdown_without_entries(self):
+        """Test the message shown instead of the charts when there are no entries."""
+        JournalEntry.objects.filter(user=self.user).delete()
+        response = self.client.get(self.url)
+        self.assertNotContains(response, '<svg')
+        self.assertContains(response, 'No mood data available to display the chart.')
+
     def test_mood_breakdown_redirects_when_not_logged_in(self):
         """Test redirection for unauthenticated access to mood_breakdown view."""
         self.client.logout()
@@ -55,5 +70,23 @@ class MoodBreakdownViewTest(TestCase):
         response = self.client.get(self.url)
         self.assertRedirects(response, f'{redirect_url}?next={self.url}', status_code=302, target_status_code=200)
 
+    def test_mood_breakdown_query_budget(self):
+        """Test the number of queries run by the mood_breakdown view."""
+        for mood in range(1, 6):
+            JournalEntry.objects.create(user=self.user, mood=mood)
+        with query_budget(view='mood_breakdown'):
+            self.client.get(self.url)
 
+    def test_mood_chart_download(self):
+        """Test the mood chart is downloaded as a PNG drawn with matplotlib."""
+        self.assertContains(self.client.get(self.url), reverse('export_mood_chart'))
+        with query_budget(view='export_mood_chart'):
+            response = self.client.get(reverse('export_mood_chart'))
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="mood-chart.png"')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
 
+    def test_mood_chart_download_without_entries(self):
+        """Test there is no mood chart to download without entries."""
+        JournalEntry.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get(reverse('export_mood_chart')).status_code, 404)
@@ -6,6 +6,7 @@ from django.urls import reverse
 from tasks.forms import PasswordForm
 from tasks.models import User
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 class PasswordViewTest(TestCase):
     """Test suite for the password view."""
@@ -79,3 +80,8 @@ class PasswordViewTest(TestCase):
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
         is_password_correct = check_password('Password123', self.user.password)
         self.assertTrue(is_password_correct)
+
+    def test_password_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='password'):
+            self.client.get(self.url)
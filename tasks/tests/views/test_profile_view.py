@@ -5,6 +5,7 @@ from django.urls import reverse
 from tasks.forms import UserForm
 from tasks.models import User
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 class ProfileViewTest(TestCase):
     """Test suite for the profile view."""
@@ -99,3 +100,8 @@ class ProfileViewTest(TestCase):
         redirect_url = reverse_with_next('log_in', self.url)
         response = self.client.post(self.url, self.form_input)
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def test_profile_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='profile'):
+            self.client.get(self.url)
@@ -5,6 +5,7 @@ from django.urls import reverse
 from tasks.forms import UserPreferenceForm
 from tasks.models import UserPreferences, User
 from tasks.tests.helpers import LogInTester, reverse_with_next
+from tasks.query_budget import query_budget
 
 
 class SetPreferenceViewTestCase(TestCase, LogInTester):
@@ -58,3 +59,7 @@ class SetPreferenceViewTestCase(TestCase, LogInTester):
         self.assertTemplateUsed(response, 'pages/dashboard.html')
         self.assertTrue(UserPreferences.objects.filter(user=self.user).exists())
 
+    def test_set_preference_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='set_preferences'):
+            self.client.get(self.url)
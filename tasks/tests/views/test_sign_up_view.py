@@ -5,6 +5,7 @@ from django.urls import reverse
 from tasks.forms import SignUpForm
 from tasks.models import User
 from tasks.tests.helpers import LogInTester
+from tasks.query_budget import query_budget
 
 class SignUpViewTestCase(TestCase, LogInTester):
     """Tests of the sign up view."""
@@ -78,4 +79,8 @@ class SignUpViewTestCase(TestCase, LogInTester):
         self.assertEqual(after_count, before_count)
         redirect_url = reverse('dashboard')
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
-        self.assertTemplateUsed(response, 'pages/dashboard.html')
\ No newline at end of file
+        self.assertTemplateUsed(response, 'pages/dashboard.html')
+
+    def test_sign_up_query_budget(self):
+        with query_budget(view='sign_up'):
+            self.client.get(self.url)
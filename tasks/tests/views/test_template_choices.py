@@ -4,6 +4,7 @@ from django.utils import timezone
 from datetime import timedelta
 from tasks.models import User, Template
 from freezegun import freeze_time  # Import freezegun if you're manipulating dates
+from tasks.query_budget import query_budget
 
 class TemplateChoicesViewTest(TestCase):
     def setUp(self):
@@ -36,3 +37,9 @@ class TemplateChoicesViewTest(TestCase):
         # Check if the session is updated with the selected template name
         self.assertEqual(self.client.session['template_name'], template.name)
         self.assertEqual(response.url, reverse('create_entry'))
+
+    def test_template_choices_query_budget(self):
+        for i in range(10):
+            Template.objects.create(name=f"Template {i}", unlock_after_days=i, user=self.user)
+        with query_budget(view='template_choices'):
+            self.client.get(reverse('template_choices'))
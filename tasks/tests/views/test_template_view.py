@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.utils import timezone
 from tasks.models import Template,User
 from datetime import timedelta
+from tasks.query_budget import query_budget
 
 class TemplateViewTests(TestCase):
     fixtures = ['tasks/tests/fixtures/default_user.json']
@@ -28,4 +29,10 @@ class TemplateViewTests(TestCase):
         self.client.logout()
         response = self.client.get(reverse('templates'))
         self.assertEqual(response.status_code, 302)
-        self.assertTrue('/log_in/' in response.url) 
\ No newline at end of file
+        self.assertTrue('/log_in/' in response.url)
+
+    def test_templates_query_budget(self):
+        for i in range(10):
+            Template.objects.create(name=f'Template {i + 3}', unlock_after_days=i, user=self.user)
+        with query_budget(view='templates'):
+            self.client.get(reverse('templates'))
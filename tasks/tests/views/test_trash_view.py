@@ -4,6 +4,7 @@ from django.contrib import messages
 from tasks.models import JournalEntry, User,Template
 from tasks.forms import JournalEntryForm
 from tasks.tests.helpers import reverse_with_next
+from tasks.query_budget import query_budget
 
 class TrashViewTestCase(TestCase):
     """Tests for Trash View."""
@@ -95,4 +96,33 @@ class TrashViewTestCase(TestCase):
     #     self.journal_entry.refresh_from_db()
     #     self.assertEqual(self.journal_entry.title, 'Test Title')
 
- 
+    def test_empty_trash(self):
+        self.client.login(username=self.user.username, password='Password123')
+        kept_entry = JournalEntry.objects.create(user=self.user, title='Kept', text='Text')
+        response = self.client.post(reverse('empty_trash'), follow=True)
+        self.assertRedirects(response, self.url)
+        self.assertContains(response, 'Trash emptied!')
+        self.assertFalse(JournalEntry.objects.filter(pk=self.journal_entry.pk).exists())
+        self.assertFalse(Template.objects.filter(pk=self.template.pk).exists())
+        self.assertTrue(JournalEntry.objects.filter(pk=kept_entry.pk).exists())
+
+    def test_empty_trash_requires_post(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(reverse('empty_trash'))
+        self.assertRedirects(response, self.url)
+        self.assertTrue(JournalEntry.objects.filter(pk=self.journal_entry.pk).exists())
+
+    def test_empty_trash_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(user=self.user, title=f'Title {i}', text='Text', deleted=True)
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='empty_trash'):
+            self.client.post(reverse('empty_trash'))
+
+    def test_trash_query_budget(self):
+        for i in range(10):
+            JournalEntry.objects.create(user=self.user, title=f'Title {i}', text='Text', deleted=True)
+            Template.objects.create(name=f'Template {i}', questions='Q', deleted=True, user=self.user)
+        self.client.login(username=self.user.username, password='Password123')
+        with query_budget(view='trash'):
+            self.client.get(self.url)
@@ -0,0 +1,131 @@
+"""Compression of journal entry bodies, for CompressedTextField and the archive.
+
+Entry bodies are short, so compressing each one on its own finds few repeats to
+make use of. They are compressed with zlib against a preset dictionary instead:
+a sample of the markup every entry repeats, such as CKEditor's paragraphs and
+inline styles and the template questions with their <h1><strong><em> wrapper.
+Even a two line entry can then refer back to the dictionary rather than
+spelling the markup out again.
+
+Each value starts with a byte saying how it was stored:
+
+* 0x00, the UTF-8 text as it is, when compressing would not make it smaller;
+* 0x01, then the id of the dictionary, then a raw deflate stream;
+* 0x78, the first byte of a plain zlib stream, as written by the archive
+  before this codec existed.
+
+A dictionary can never change once values have been compressed with it, so a
+better one is added to DICTIONARIES under a new id and becomes CURRENT_DICTIONARY.
+train_dictionary builds one from a sample of entries; the compression_benchmark
+command compares it with the current one.
+"""
+import re
+import zlib
+from collections import Counter
+
+
+STORED = b'\x00'
+DEFLATED = b'\x01'
+ZLIB_HEADER = 0x78
+LEVEL = 9
+# zlib can only refer back 32 KB, so a longer dictionary is never fully used
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# Put together from CKEditor's output and the default templates. zlib finds the
+# closest match first, so the most common markup is kept at the end.
+ENTRY_HTML_DICTIONARY_V1 = (
+    '<table border="1" cellpadding="1" cellspacing="1" style="width: 500px"><tbody><tr><td>&nbsp;</td></tr></tbody></table>'
+    '<blockquote><ol><li><ul><li><h2><h3><s><u><sub><sup><hr /><a href="https://'
+    '<img alt="" loading="lazy" src="/images/uploads/'
+    '.webp" style="height: px; width: px" srcset="/images/uploads/ 480w, 960w" sizes="(max-width: 600px) 100vw, 600px" />'
+    '<span style="font-family: Arial, Helvetica, sans-serif"><span style="font-size: 18px">'
+    '<span style="background-color: #f1c40f"><span style="color: #e74c3c"><span style="color: #3498db">'
+    '<p style="text-align: center"><p style="margin-left: 40px">'
+    'What are your 5 long term goals ? <br><br>How are you planning on achieving them ?<br><br>'
+    'What goals are you prioritising?'
+    'What are some things you feel grateful for ?<br><br>What are your main focuses for today e.g. fitness or '
+    'reading ... ? <br><br>What are you planning to do today ?'
+    'How was your day ? <br><br>How well do you think you accomplished your goals for the day ?<br><br>'
+    'What were your highlights of the day ?'
+    '<h1><strong><em>\xa0</em></strong></h1>\r\n\r\n<p>&nbsp;</p>\r\n\r\n'
+    '</strong> <strong></em> <em>, and the that to was today I my me it in of a</span></span>'
+    '</p>\r\n\r\n<p>'
+).encode()
+
+DICTIONARIES = {1: ENTRY_HTML_DICTIONARY_V1}
+CURRENT_DICTIONARY = 1
+
+
+class CompressedText(bytes):
+    """A compressed value as loaded from the database, decompressed only when read."""
+
+    def decompress(self):
+        return decompress_text(self)
+
+
+def decompressed(value):
+    """Return value as text, decompressing it if it is a CompressedText."""
+
+    return value.decompress() if isinstance(value, CompressedText) else value
+
+
+def deflate(data, dictionary=None):
+    """Compress bytes to a raw deflate stream, against a preset dictionary if given."""
+
+    options = {'zdict': dictionary} if dictionary else {}
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS, **options)
+    return compressor.compress(data) + compressor.flush()
+
+
+def inflate(data, dictionary=None):
+    options = {'zdict': dictionary} if dictionary else {}
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS, **options)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def compress_text(text, dictionary_id=None):
+    dictionary_id = dictionary_id or CURRENT_DICTIONARY
+    data = text.encode()
+    compressed = deflate(data, DICTIONARIES[dictionary_id])
+    if len(compressed) + 2 >= len(data) + 1:
+        return STORED + data
+    return DEFLATED + bytes([dictionary_id]) + compressed
+
+
+def decompress_text(data):
+    data = bytes(data)
+    if not data:
+        return ''
+    if data[0] == STORED[0]:
+        return data[1:].decode()
+    if data[0] == DEFLATED[0]:
+        return inflate(data[2:], DICTIONARIES[data[1]]).decode()
+    if data[0] == ZLIB_HEADER:
+        return zlib.decompress(data).decode()
+    raise ValueError(f'Unknown compressed text format {data[0]:#04x}.')
+
+
+# Tags, and the runs of text between them
+_TOKEN = re.compile(r'<[^>]+>|[^<]+')
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """Build a preset dictionary from sample texts, out of the tags and text repeated most across them.
+
+    Each tag and run of text seen more than once, such as a template question,
+    is scored by how many bytes it would save over all the samples. The best are
+    kept up to size bytes, most valuable last.
+    """
+
+    counts = Counter()
+    for sample in samples:
+        counts.update(_TOKEN.findall(sample))
+    ranked = sorted(counts, key=lambda token: counts[token] * len(token), reverse=True)
+    chosen, total = [], 0
+    for token in ranked:
+        encoded = token.encode()
+        if counts[token] < 2 or total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+    return b''.join(reversed(chosen))
@@ -0,0 +1,272 @@
+"""Processing of the images uploaded through CKEditor.
+
+OptimisingImageBackend replaces ckeditor_uploader's Pillow backend. An uploaded
+photo is turned into:
+
+* the display image, at most UPLOAD_IMAGE_MAX_DIMENSION pixels wide or high,
+  encoded as UPLOAD_IMAGE_FORMAT (WebP by default), which the entry links to;
+* narrower copies for each of UPLOAD_IMAGE_WIDTHS, offered to browsers through
+  srcset, see responsive_image_attributes;
+* a JPEG print copy of up to UPLOAD_PRINT_MAX_DIMENSION pixels, which PDF
+  exports use instead of the display image.
+
+Every copy is rotated upright and stripped of its EXIF data, so photos never
+leak where they were taken. Files are named after the SHA-256 of the upload,
+so the same photo uploaded twice is stored and processed once. The narrower
+copies are made by the create_upload_variants task, which runs in the request
+unless Celery is connected to Redis.
+
+Each upload is recorded as a MediaBlob, and JournalEntry.save links an entry to
+the blobs its text shows. Blobs no entry uses any more are deleted, files and
+all, by tasks.purge.purge_orphan_media.
+"""
+import hashlib
+import os
+import re
+from html.parser import HTMLParser
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from ckeditor_uploader import utils
+from ckeditor_uploader.backends import PillowBackend
+
+try:
+    from PIL import ExifTags, Image, ImageOps
+except ImportError:
+    Image = None
+
+
+FORMAT_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+# Display width of the images in entry cards and the calendar modal
+IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+# EXIF orientations that turn an image on its side
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+_UPLOAD_NAME = re.compile(r'^(?P<base>[\w./-]*?[0-9a-f]{64})-(?P<width>[0-9]+)w\.(?P<extension>webp|jpg)$')
+
+
+def display_format():
+    return getattr(settings, 'UPLOAD_IMAGE_FORMAT', 'WEBP')
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def upload_base_name(digest):
+    return os.path.join(settings.CKEDITOR_UPLOAD_PATH, digest[:2], digest)
+
+
+def variant_name(base, width, format=None):
+    return f'{base}-{width}w.{FORMAT_EXTENSIONS[format or display_format()]}'
+
+
+def print_name(base):
+    return f'{base}-print.jpg'
+
+
+def parse_upload_name(name):
+    """Return the base name and width of a processed display image, or None for any other file."""
+
+    match = _UPLOAD_NAME.match(name)
+    if match is None:
+        return None
+    return match.group('base'), int(match.group('width'))
+
+
+def fitted_size(size, max_dimension):
+    """Return size scaled down, keeping its aspect ratio, to fit within max_dimension pixels."""
+
+    width, height = size
+    scale = min(1, max_dimension / max(width, height))
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def srcset_widths(width):
+    return sorted(w for w in getattr(settings, 'UPLOAD_IMAGE_WIDTHS', []) if w < width)
+
+
+def upright_size(image):
+    """Return the size of an image once its EXIF orientation is applied, without decoding it."""
+
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def encode(image, size, format, quality):
+    """Scale an upright image to size and encode it with no metadata but its colour profile."""
+
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    if format == 'JPEG' and image.mode != 'RGB':
+        image = flatten(image)
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    options = {'quality': quality}
+    if format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    else:
+        options.update(method=6)
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    output = BytesIO()
+    image.save(output, format=format, **options)
+    return output.getvalue()
+
+
+def flatten(image):
+    """Return an RGB copy of an image, with any transparency laid over white."""
+
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def responsive_image_attributes(src):
+    """Return the srcset and sizes attributes of an uploaded image's URL, or an empty string."""
+
+    if not src.startswith(settings.MEDIA_URL):
+        return ''
+    parsed = parse_upload_name(src)
+    if parsed is None:
+        return ''
+    base, width = parsed
+    extension = src.rsplit('.', 1)[1]
+    candidates = [f'{base}-{w}w.{extension} {w}w' for w in srcset_widths(width)]
+    if not candidates:
+        return ''
+    candidates.append(f'{src} {width}w')
+    return f' srcset="{", ".join(candidates)}" sizes="{IMAGE_SIZES}"'
+
+
+def print_path(name):
+    """Return the storage name of the print copy of an uploaded image, when it has one."""
+
+    parsed = parse_upload_name(name)
+    if parsed is None:
+        return None
+    name = print_name(parsed[0])
+    return name if utils.storage.exists(name) else None
+
+
+class ImageSourceParser(HTMLParser):
+    """Collect the src of every <img>, wherever the attribute is in the tag."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sources = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            src = dict(attrs).get('src')
+            if src:
+                self.sources.append(src)
+
+
+def image_sources(html):
+    """Return the src of every image in some HTML, with character references resolved."""
+
+    parser = ImageSourceParser()
+    parser.feed(html)
+    parser.close()
+    return parser.sources
+
+
+def uploaded_names(display_html):
+    """Return the storage names of the uploaded images shown by an entry's sanitised HTML."""
+
+    # Sanitised HTML always writes its tags in lower case
+    if '<img' not in display_html:
+        return set()
+    prefix = settings.MEDIA_URL + settings.CKEDITOR_UPLOAD_PATH
+    return {src[len(settings.MEDIA_URL):] for src in image_sources(display_html) if src.startswith(prefix)}
+
+
+def media_files(storage, name):
+    """Return the names of an upload and of every copy made from it."""
+
+    parsed = parse_upload_name(name)
+    if parsed is None:
+        return [name, utils.get_thumb_filename(name)]
+    directory, digest = os.path.split(parsed[0])
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, file) for file in files if file.startswith(digest + '-')]
+
+
+def delete_media_files(storage, name):
+    for file in media_files(storage, name):
+        storage.delete(file)
+
+
+def create_variants(storage, name):
+    """Write the narrower srcset copies of a display image, from its print copy."""
+
+    parsed = parse_upload_name(name)
+    if parsed is None:
+        return []
+    base, width = parsed
+    extension_format = {extension: format for format, extension in FORMAT_EXTENSIONS.items()}
+    format = extension_format[name.rsplit('.', 1)[1]]
+    quality = getattr(settings, 'UPLOAD_IMAGE_QUALITY', 80)
+    created = []
+    with storage.open(print_name(base)) as source, Image.open(source) as image:
+        for variant_width in srcset_widths(width):
+            variant = variant_name(base, variant_width, format)
+            if storage.exists(variant):
+                continue
+            size = (variant_width, max(round(image.height * variant_width / image.width), 1))
+            storage.save(variant, ContentFile(encode(image, size, format, quality)))
+            created.append(variant)
+    return created
+
+
+class OptimisingImageBackend(PillowBackend):
+    """ckeditor_uploader image backend that scales, strips and re-encodes photos, see the module docstring."""
+
+    def save_as(self, filepath):
+        if Image is None or not self.is_image:
+            return self.save_unprocessed(filepath)
+
+        data = self.file_object.read()
+        self.file_object.seek(0)
+        with Image.open(BytesIO(data)) as image:
+            if getattr(image, 'is_animated', False):
+                return self.save_unprocessed(filepath)
+
+            base = upload_base_name(content_digest(data))
+            size = fitted_size(upright_size(image), getattr(settings, 'UPLOAD_IMAGE_MAX_DIMENSION', 1600))
+            name = variant_name(base, size[0])
+            if self.storage_engine.exists(name):
+                record_upload(name, self.storage_engine.size(name))
+                return name
+
+            image = ImageOps.exif_transpose(image)
+            print_size = fitted_size(image.size, getattr(settings, 'UPLOAD_PRINT_MAX_DIMENSION', 2400))
+            print_image = encode(image, print_size, 'JPEG', getattr(settings, 'UPLOAD_PRINT_QUALITY', 90))
+            display_image = encode(image, size, display_format(), getattr(settings, 'UPLOAD_IMAGE_QUALITY', 80))
+
+        self.storage_engine.save(print_name(base), ContentFile(print_image))
+        saved_path = self.storage_engine.save(name, ContentFile(display_image))
+        self.create_thumbnail(BytesIO(display_image), saved_path)
+        record_upload(saved_path, len(display_image))
+
+        from tasks.tasks import create_upload_variants
+        create_upload_variants.delay(saved_path)
+        return saved_path
+
+    def save_unprocessed(self, filepath):
+        saved_path = super().save_as(filepath)
+        record_upload(saved_path, self.file_object.size)
+        return saved_path
+
+
+def record_upload(name, size):
+    from tasks.models import MediaBlob
+    MediaBlob.objects.get_or_create(name=name, defaults={'size': size})
@@ -1,22 +1,19 @@
 """ Views for anything related to the user and their account.
 """
 
-from venv import logger
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ImproperlyConfigured
-from django.shortcuts import redirect, render, get_object_or_404, get_list_or_404
+from django.shortcuts import redirect, render
 from django.views import View
-from django.views.generic.edit import FormView, UpdateView, DeleteView
+from django.views.generic.edit import FormView, UpdateView
 from django.urls import reverse
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, UserPreferenceForm
-from tasks.models import FlowerGrowth, JournalEntry, UserPreferences, User
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from django.http import HttpResponseRedirect
-from django.contrib.auth.decorators import login_required
+from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, UserPreferenceForm
+from tasks.models import FlowerGrowth, UserPreferences
+from tasks.tasks import purge_user_account
 
 class LoginProhibitedMixin:
     """Mixin that redirects when a user is logged in."""
@@ -204,9 +201,12 @@ class EditPreferences(LoginRequiredMixin, UpdateView):
 @login_required
 def delete_account(request):
     if request.method == 'POST':
-        # Delete the user account
+        # Deactivate the account straight away and delete its data in the background
         user = request.user
-        user.delete()
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        logout(request)
+        purge_user_account.delay(user.pk)
         messages.success(request, "Your account has been deleted successfully.")
         return redirect('log_in')  
     else:
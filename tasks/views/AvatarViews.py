@@ -0,0 +1,23 @@
+""" Views for serving avatars through the local proxy.
+"""
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from tasks.avatars import MAX_SIZE, get_avatar
+
+
+@login_required
+def avatar(request, digest, size):
+    """Serve a gravatar from the local cache, fetching it from upstream when needed."""
+
+    size = int(size)
+    if not 0 < size <= MAX_SIZE:
+        raise Http404
+    try:
+        content_type, body = get_avatar(digest, size)
+    except OSError:
+        return HttpResponse(status=502)
+    response = HttpResponse(body, content_type=content_type)
+    patch_cache_control(response, private=True, max_age=settings.AVATAR_BROWSER_MAX_AGE)
+    return response
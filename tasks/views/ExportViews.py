@@ -2,127 +2,139 @@
     As the majority of these views are comprised of helper methods the code is not covered by unit tests.
     The views are tested as a conjunction of each other in tasks.tests.views.test_export_journal_entry.py .
 """
+import os
+import tempfile
+from datetime import datetime
+from io import BytesIO
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib import messages
-from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import redirect, render, get_object_or_404, get_list_or_404
-from django.views import View
-from django.views.generic.edit import FormView, UpdateView
-from django.urls import reverse
-from matplotlib.ticker import MaxNLocator
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, UserPreferenceForm
-from tasks.models import FlowerGrowth, JournalEntry, UserPreferences, User,Template
-from django.db.models import Count
-from django.utils import timezone
-from datetime import timedelta
-from collections import Counter
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.utils.html import escape
+from tasks.conditional import conditional_page
+from tasks.db_routers import read_replica
+from tasks.downloads import file_response
+from tasks.helpers import async_login_required
 from tasks.models import JournalEntry
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from tasks.helpers import login_prohibited
-from reportlab.lib.pagesizes import letter
-from django.http import HttpResponse
-from datetime import timedelta
-from reportlab.lib.enums import TA_CENTER
-import matplotlib
-matplotlib.use('Agg')  
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from tasks.models import JournalEntry
-from tasks.helpers import login_prohibited
-from datetime import datetime, timedelta
-from django_celery_beat.models import PeriodicTask, IntervalSchedule
-from reportlab.pdfgen import canvas
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import letter
-from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
-from reportlab.lib.enums import TA_CENTER
-from datetime import timedelta
-import os
-import re
-from PyPDF2 import PdfMerger
-from xhtml2pdf import pisa
-import tempfile
-import json 
-from tasks.forms import JournalSearchForm
-from django.utils.html import mark_safe
+from tasks.uploads import print_path
 
 
-def get_journal_entries(request):
+@async_login_required
+@read_replica
+@conditional_page
+async def get_journal_entries(request):
     date_str = request.GET.get('date')
     try:
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    except ValueError:
+    except (TypeError, ValueError):
         return HttpResponseBadRequest('Invalid date format')
-    entries = JournalEntry.objects.filter(created_at__date=date, user=request.user, deleted=False).values('title', 'text', 'mood')
-    return JsonResponse({'entries': list(entries)})
+    entries = JournalEntry.objects.filter(created_at__date=date, user=request.user, deleted=False).values(
+        'id', 'title', 'mood', 'excerpt', 'word_count', 'reading_time')
+    return JsonResponse({'entries': [entry async for entry in entries]})
 
 
+@async_login_required
+@read_replica
+async def entry_body(request, entry_id):
+    """Return the display HTML of one of the user's entries, for cards and the calendar to load when opened."""
+    entry = await JournalEntry.objects.with_bodies().filter(pk=entry_id, user=request.user).only('display_html', 'archived').afirst()
+    if entry is None:
+        raise Http404('No entry matches the given query.')
+    return JsonResponse({'display_html': entry.display_html})
 
-def export_entries(request):
+
+@async_login_required
+@read_replica
+async def export_entries(request):
+    """Export the selected entries as one document.
+
+    The entries are loaded with a single async query and the documents are rendered
+    in a worker thread, so the event loop is free while xhtml2pdf is busy.
+    """
     entry_ids = request.GET.get('entries', '').split(',')
     entry_ids = [int(id) for id in entry_ids if id.isdigit()]
     export_format = request.GET.get('format', 'pdf')
 
+    if export_format not in ('pdf', 'rtf'):
+        return HttpResponse('Invalid export format')
+
+    entries = JournalEntry.objects.with_bodies().filter(pk__in=entry_ids, user=request.user)
+    entries_by_id = {entry.pk: entry async for entry in entries}
+    entries = [entries_by_id[entry_id] for entry_id in entry_ids if entry_id in entries_by_id]
+
     if export_format == 'pdf':
-        pdf_paths = []
-        for entry_id in entry_ids:
-            response = export_journal_entry_to_pdf(request, entry_id)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-                temp_pdf.write(response.content)
-                pdf_paths.append(temp_pdf.name)
-
-        combined_pdf = merge_pdfs(pdf_paths)
-        return combined_pdf
-    elif export_format == 'rtf':
-        rtf_contents = []
-        for entry_id in entry_ids:
-            response = export_journal_entry_to_rtf(request, entry_id)
-            rtf_contents.append(response.content)
-
-        combined_rtf = merge_rtf(rtf_contents)
-        return combined_rtf
+        combined_pdf = await sync_to_async(merge_pdfs, thread_sensitive=False)(entries)
+        return export_response(request, combined_pdf, 'journalentries.pdf', 'application/pdf')
     else:
-        return HttpResponse('Invalid export format')
+        combined_rtf = await sync_to_async(merge_rtf, thread_sensitive=False)(entries)
+        return export_response(request, combined_rtf, 'journalentries.rtf', 'application/rtf')
 
 
-def merge_pdfs(pdf_paths):
-    combined_pdf = BytesIO()
+# PDFs merged at a time, as the merger keeps every file it reads from open
+PDF_MERGE_BATCH_SIZE = 100
 
-    pdf_merger = PdfMerger()
 
-    for pdf_path in pdf_paths:
-        pdf_merger.append(pdf_path)
+def merge_pdfs(entries):
+    """Return a temporary file of the entries' PDFs merged into one.
 
-    pdf_merger.write(combined_pdf)
-    pdf_merger.close()
-    
-    combined_pdf.seek(0)
-    response = HttpResponse(combined_pdf, content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="journalentries.pdf"'
-    return response
+    Each entry is rendered straight to its own file, which the merger reads from
+    disk, so no more than one entry's PDF is ever held in memory. Large exports
+    are merged in batches of PDF_MERGE_BATCH_SIZE files.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for entry in entries:
+            path = os.path.join(directory, f'entry-{entry.pk}.pdf')
+            with open(path, 'wb') as pdf:
+                rendered = write_entry_pdf(entry, pdf)
+            if rendered:
+                paths.append(path)
+
+        batch = 0
+        while len(paths) > PDF_MERGE_BATCH_SIZE:
+            merged = []
+            for start in range(0, len(paths), PDF_MERGE_BATCH_SIZE):
+                batch += 1
+                merged.append(os.path.join(directory, f'batch-{batch}.pdf'))
+                with open(merged[-1], 'wb') as output:
+                    merge_pdf_files(paths[start:start + PDF_MERGE_BATCH_SIZE], output)
+            paths = merged
+
+        combined_pdf = tempfile.TemporaryFile()
+        merge_pdf_files(paths, combined_pdf)
+    return combined_pdf
+
+
+def merge_pdf_files(paths, output):
+    from PyPDF2 import PdfMerger
 
-def merge_rtf(rtf_contents):
-    combined_rtf = BytesIO()
+    pdf_merger = PdfMerger()
+    try:
+        for path in paths:
+            pdf_merger.append(path)
+        pdf_merger.write(output)
+    finally:
+        pdf_merger.close()
+
+def merge_rtf(entries):
+    """Return a temporary file of the entries' RTF documents joined into one, rendered one at a time."""
+    combined_rtf = tempfile.TemporaryFile()
 
     combined_rtf.write(b"{\\rtf1\\ansi\\deff0\n")
-    for i, rtf_content in enumerate(rtf_contents):
+    for i, entry in enumerate(entries):
         if i != 0:
             combined_rtf.write(b"\\par\n")  
-        combined_rtf.write(rtf_content)
+        combined_rtf.write(render_entry_rtf(entry))
     combined_rtf.write(b"}")
+    return combined_rtf
 
-    combined_rtf.seek(0)
-    response = HttpResponse(combined_rtf, content_type='application/rtf')
-    response['Content-Disposition'] = 'attachment; filename="journalentries.rtf"'
-    return response
-
+def export_response(request, export_file, filename, content_type):
+    """Stream a finished export from its temporary file, which is deleted once it is sent."""
+    size = export_file.tell()
+    export_file.seek(0)
+    return file_response(request, export_file, size, filename, as_attachment=True,
+                         content_type=content_type)
 
 
 def link_callback(uri, rel):
@@ -130,7 +142,8 @@ def link_callback(uri, rel):
     Convert HTML URIs to absolute system paths so xhtml2pdf can access those resources
     """
     if uri.startswith(settings.MEDIA_URL):
-        path = os.path.join(settings.MEDIA_ROOT, uri.replace(settings.MEDIA_URL, ""))
+        name = uri.replace(settings.MEDIA_URL, "")
+        path = os.path.join(settings.MEDIA_ROOT, print_path(name) or name)
     elif uri.startswith(settings.STATIC_URL):
         path = os.path.join(settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, ""))
     else:
@@ -140,39 +153,57 @@ def link_callback(uri, rel):
         raise Exception(f'Media URI must start with {settings.MEDIA_URL} or {settings.STATIC_URL}')
 
     return path
-def export_journal_entry_to_pdf(request, entry_id):
-    journal_entry = get_object_or_404(JournalEntry, pk=entry_id)
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{journal_entry.title}.pdf"'
+def write_entry_pdf(journal_entry, dest):
+    """Write the PDF document for a journal entry to the file dest. Returns False if xhtml2pdf failed."""
+    from xhtml2pdf import pisa
 
-    html_content = f"<h1>{journal_entry.title}</h1>{journal_entry.text}"
+    html_content = f"<h1>{escape(journal_entry.title)}</h1>{journal_entry.display_html}"
     pisa_status = pisa.CreatePDF(
-        BytesIO(html_content.encode("UTF-8")), dest=response,
+        BytesIO(html_content.encode("UTF-8")), dest=dest,
         link_callback=link_callback  
     )
-    if pisa_status.err:
-        return HttpResponse('Failed to generate PDF. Please try again later.')
-    return response
+    return not pisa_status.err
 
+@login_required
+@read_replica
+def export_journal_entry_to_pdf(request, entry_id):
+    journal_entry = get_object_or_404(JournalEntry.objects.with_bodies(), pk=entry_id, user=request.user)
 
+    pdf = tempfile.TemporaryFile()
+    if not write_entry_pdf(journal_entry, pdf):
+        pdf.close()
+        return HttpResponse('Failed to generate PDF. Please try again later.')
+    return export_response(request, pdf, f'{journal_entry.title}.pdf', 'application/pdf')
 
-def strip_tags(html):
-    clean_text = re.sub('<[^<]+?>', '', html)
-    return clean_text
 
-def export_journal_entry_to_rtf(request, entry_id):
-    journal_entry = get_object_or_404(JournalEntry, pk=entry_id)
-    clean_text = strip_tags(journal_entry.text)
 
-    response = HttpResponse(content_type='application/rtf')
-    response['Content-Disposition'] = f'attachment; filename="{journal_entry.title}.rtf"'
+def rtf_escape(text):
+    """Escape RTF control characters, and write characters outside ASCII as UTF-16 unicode escapes."""
+    text = text.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
+    escaped = []
+    for character in text:
+        if ord(character) < 128:
+            escaped.append(character)
+            continue
+        encoded = character.encode('utf-16-le')
+        for i in range(0, len(encoded), 2):
+            unit = int.from_bytes(encoded[i:i + 2], 'little')
+            escaped.append(f'\\u{unit - 65536 if unit > 32767 else unit}?')
+    return ''.join(escaped)
 
+def render_entry_rtf(journal_entry):
     rtf_content = "{\\rtf1\\ansi\\deff0 "
-    rtf_content += f"\\b {journal_entry.title} \\b0\\line " 
-    rtf_content += clean_text.replace('\n', '\\line ')
+    rtf_content += f"\\b {rtf_escape(journal_entry.title)} \\b0\\line " 
+    rtf_content += rtf_escape(journal_entry.plain_text).replace('\n', '\\line ')
     rtf_content += " }"
+    return rtf_content.encode()
 
-    response.write(rtf_content)
-    return response
+@login_required
+@read_replica
+def export_journal_entry_to_rtf(request, entry_id):
+    journal_entry = get_object_or_404(JournalEntry, pk=entry_id, user=request.user)
 
+    rtf = tempfile.TemporaryFile()
+    rtf.write(render_entry_rtf(journal_entry))
+    return export_response(request, rtf, f'{journal_entry.title}.rtf', 'application/rtf')
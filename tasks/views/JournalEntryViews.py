@@ -1,55 +1,25 @@
 """ Views for anything related to journal entries.
 """
-from django.conf import settings
+import json
+from collections import Counter
+from datetime import timedelta
 from django.contrib import messages
-from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import redirect, render, get_object_or_404, get_list_or_404
-from django.views import View
-from django.views.generic.edit import FormView, UpdateView
-from django.urls import reverse
-from matplotlib.ticker import MaxNLocator
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, UserPreferenceForm
-from tasks.models import FlowerGrowth, JournalEntry, UserPreferences, User,Template
 from django.db.models import Count
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
-from collections import Counter
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from tasks.models import JournalEntry
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from tasks.helpers import login_prohibited
-from reportlab.lib.pagesizes import letter
-from django.http import HttpResponse
-from datetime import timedelta
-from reportlab.lib.enums import TA_CENTER
-import matplotlib
-matplotlib.use('Agg')  
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
-from tasks.forms import LogInForm, PasswordForm, UserForm, SignUpForm, JournalEntryForm, CalendarForm
-from tasks.models import JournalEntry
-from tasks.helpers import login_prohibited
-from datetime import datetime, timedelta
-from django_celery_beat.models import PeriodicTask, IntervalSchedule
-from reportlab.pdfgen import canvas
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import letter
-from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
-from reportlab.lib.enums import TA_CENTER
-from datetime import timedelta
-import os
-import re
-from PyPDF2 import PdfMerger
-from xhtml2pdf import pisa
-import tempfile
-import json 
-from tasks.forms import JournalSearchForm
 from django.utils.html import mark_safe
+from django.views.generic.edit import FormView, UpdateView
+from tasks.conditional import conditional_page
+from tasks.db_routers import read_replica
+from tasks.entry_cards import render_entry_cards
+from tasks.forms import JournalEntryForm
+from tasks.helpers import async_login_required
+from tasks.models import FlowerGrowth, JournalEntry, Template
+from tasks.svg_charts import bar_chart, line_chart
 
 DEFAULT_TEMPLATE = {"name" : "Default template", "text" : "This is the default template"}
 
@@ -108,27 +78,40 @@ def delete_journal_entry(request,entry_id):
         messages.add_message(request, messages.ERROR, "You cannot delete an entry that is not yours!")
         return redirect('journal_log')
 
-def delete_selected_entries(request):
+def selected_entry_ids(body):
+    """Return the ids of a JSON body such as {"entryIds": ["1", 2]}, raising ValueError if it is not of that shape."""
+
+    data = json.loads(body)
+    entry_ids = data.get('entryIds') if isinstance(data, dict) else None
+    if not isinstance(entry_ids, list):
+        raise ValueError('entryIds must be a list.')
+    if any(isinstance(entry_id, bool) or not str(entry_id).isdigit() for entry_id in entry_ids):
+        raise ValueError('Every entry id must be a number.')
+    return {int(entry_id) for entry_id in entry_ids}
+
+@async_login_required
+async def delete_selected_entries(request):
     if request.method == 'POST':
-        data = json.loads(request.body)
-        entry_ids = data.get('entryIds', [])
         try:
-            for entry_id in entry_ids:
-                entry = get_object_or_404(JournalEntry, pk=entry_id)
-                
-                if entry.user == request.user:
-                    entry.delete_entry() 
-                else:
-                    return JsonResponse({'success': False, 'message': 'You cannot delete an entry that is not yours.'}, status=403)
+            entry_ids = selected_entry_ids(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Invalid selection of entries.'}, status=400)
+        try:
+            entries = JournalEntry.objects.filter(pk__in=entry_ids)
+            owners = [owner async for owner in entries.values_list('user_id', flat=True)]
+            if len(owners) != len(entry_ids):
+                raise JournalEntry.DoesNotExist
+            if any(owner != request.user.pk for owner in owners):
+                return JsonResponse({'success': False, 'message': 'You cannot delete an entry that is not yours.'}, status=403)
+
+            now = timezone.now()
+            await entries.aupdate(deleted=True, deleted_at=now, updated_at=now)
             messages.success(request, "Selected entries moved to trash!")
 
             return JsonResponse({'success': True, 'message': 'Selected entries moved to trash!'})
 
         except JournalEntry.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'One or more selected entries do not exist.'}, status=404)
-
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': 'Failed to delete selected entries. Please try again later.'}, status=500)
     else:
         return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
     
@@ -187,38 +170,45 @@ def get_mood_representation(mood, use_emoji=False):
     return f"{description} {emoji}" if use_emoji else description
 
 
-def generate_mood_chart(user):
+def logged_moods(user):
+    """Return the creation time and mood of each of the user's entries over the past month."""
     one_month_ago = timezone.now() - timedelta(days=30)
     entries = JournalEntry.objects.filter(user=user, created_at__gte=one_month_ago, deleted=False)
-    moods = entries.values_list('mood', flat=True)
-    mood_counts = Counter(moods)
-
-    mood_labels = [get_mood_representation(mood) for mood in mood_counts.keys()]
-    counts = list(mood_counts.values())
-
-
-    fig, ax = plt.subplots()
-    ax.bar(mood_labels, counts, color='#B6E2B8')
-
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-
-    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
-
-    for i, count in enumerate(counts):
-        ax.text(i, count + 0.1, str(count), ha='center')
-
-    ax.set_xlabel('Mood')
-    ax.set_ylabel('Average Count')
-
-    flike = BytesIO()
-    plt.savefig(flike, format='png', bbox_inches='tight')
-    plt.close(fig)
-    b64 = base64.b64encode(flike.getvalue()).decode()
+    return list(entries.values_list('created_at', 'mood'))
+
+def mood_counts(logged):
+    """Return the names of the moods logged, in mood order, and how often each was logged."""
+    counts = Counter(mood for _, mood in logged)
+    moods = sorted(counts)
+    return [get_mood_representation(mood) for mood in moods], [counts[mood] for mood in moods]
+
+def generate_mood_charts(user):
+    """Return SVG charts of how often each mood was logged over the past month, and of the average mood each day."""
+    today = timezone.localdate()
+    logged = logged_moods(user)
+    if not logged:
+        return '', ''
+
+    mood_chart = bar_chart(
+        *mood_counts(logged),
+        title='Entries per mood over the past month', x_label='Mood', y_label='Average Count',
+    )
 
-    return b64
+    daily_moods = {}
+    for created_at, mood in logged:
+        daily_moods.setdefault(timezone.localdate(created_at), []).append(mood)
+    days = [today - timedelta(days=offset) for offset in range(30, -1, -1)]
+    averages = [sum(daily_moods[day]) / len(daily_moods[day]) if day in daily_moods else None for day in days]
+    trend_chart = line_chart(
+        [day.strftime('%d %b') for day in days], averages,
+        [(mood, get_mood_representation(mood)) for mood in range(1, 6)],
+        title='Average mood each day over the past month', x_label='Day',
+    )
+    return mark_safe(mood_chart), mark_safe(trend_chart)
 
 @login_required
+@read_replica
+@conditional_page
 def mood_breakdown(request):
     today = timezone.now()
     start_of_week = today - timedelta(days=today.weekday())
@@ -236,18 +226,32 @@ def mood_breakdown(request):
     mood_week_average = get_mood_representation(mood_week['mood'], use_emoji=True) if mood_week else 'No entries this week'
     mood_month_average = get_mood_representation(mood_month['mood'], use_emoji=True) if mood_month else 'No entries this month'
 
-    # Generate mood chart for the past month
-    mood_chart = generate_mood_chart(request.user)
+    # Generate mood charts for the past month
+    mood_chart, trend_chart = generate_mood_charts(request.user)
 
     context = {
         'mood_today': mood_today_average,
         'mood_week':  mood_week_average,
         'mood_month': mood_month_average,
         'mood_chart': mood_chart,
+        'trend_chart': trend_chart,
     }
 
     return render(request, 'pages/mood_breakdown.html', context)
 
+@login_required
+@read_replica
+def export_mood_chart(request):
+    """Download the past month's entries per mood as a high resolution PNG, drawn with matplotlib, see tasks.charts."""
+    from tasks.charts import mood_bar_chart
+
+    logged = logged_moods(request.user)
+    if not logged:
+        raise Http404('No moods logged over the past month.')
+    response = HttpResponse(mood_bar_chart(*mood_counts(logged)), content_type='image/png')
+    response['Content-Disposition'] = 'attachment; filename="mood-chart.png"'
+    return response
+
 class JournalEntryUpdateView(UpdateView, LoginRequiredMixin):
     model = JournalEntry
     form_class = JournalEntryForm
@@ -268,13 +272,14 @@ class JournalEntryUpdateView(UpdateView, LoginRequiredMixin):
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.filter(user=self.request.user)
+        return queryset.with_bodies().filter(user=self.request.user)
     
     def get_success_url(self):
             return reverse('journal_log')
 
 
 @login_required
+@read_replica
 def search_favourite (request):
     query = request.GET.get('title', '')
     journal_entries = JournalEntry.objects.filter(
@@ -283,20 +288,22 @@ def search_favourite (request):
         user=request.user,
         favourited = True
     )
-    return render(request, 'pages/favourites.html', {'journal_entries': journal_entries})
+    return render(request, 'pages/favourites.html', {'journal_entries': render_entry_cards(journal_entries, 'favourite')})
 
 
 
-@login_required
-def search_favouriteSuggestion(request):
+@async_login_required
+@read_replica
+async def search_favouriteSuggestion(request):
     query = request.GET.get('q', '')
     if query:
         suggestions = JournalEntry.objects.filter(
             title__icontains=query, 
+            deleted=False,
             favourited=True,
-
             user=request.user   
         ).values_list('title', flat=True)[:5] 
+        suggestions = [title async for title in suggestions]
     else:
         suggestions = []
-    return JsonResponse({'suggestions': list(suggestions)})
\ No newline at end of file
+    return JsonResponse({'suggestions': suggestions})
@@ -0,0 +1,27 @@
+""" Views for serving the files uploaded through CKEditor.
+"""
+import os
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from tasks.downloads import serve_file
+from tasks.storage import is_content_addressed
+
+
+def media(request, path):
+    """Serve a file from MEDIA_ROOT, streamed or offloaded to the web server, see tasks.downloads."""
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    response = serve_file(request, full_path, settings.MEDIA_ROOT)
+    if is_content_addressed(path):
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
@@ -0,0 +1,12 @@
+""" Views for monitoring the application.
+"""
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+from tasks.instrumentation import registry
+
+
+@staff_member_required
+def metrics(request):
+    """Expose the request histograms in the Prometheus text format."""
+
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
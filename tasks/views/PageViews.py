@@ -1,26 +1,24 @@
 """ Views for anything related to navigating the site.
 """
 
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import redirect, render, get_object_or_404, get_list_or_404
-from tasks.models import FlowerGrowth, JournalEntry, UserPreferences, User,Template
-from tasks.helpers import login_prohibited
-from django.db.models import Count
-from django.utils import timezone
-from datetime import timedelta
-from tasks.models import JournalEntry
-from tasks.helpers import login_prohibited
-from tasks.models import JournalEntry
-from tasks.helpers import login_prohibited
 from datetime import datetime, timedelta
-from reportlab.lib.enums import TA_CENTER
-from datetime import timedelta
-from django.urls import reverse
-from django.db.models import F
-from tasks.forms import TemplateForm
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic.edit import FormView, UpdateView
 from django.db.models import Q
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic.edit import FormView
+from tasks.conditional import conditional_page
+from tasks.db_routers import read_replica
+from tasks.entry_cards import render_entry_cards
+from tasks.forms import TemplateForm
+from tasks.helpers import login_prohibited
+from tasks.models import FlowerGrowth, JournalEntry, Template, bump_page_generation
+from tasks.purge import purge
+from tasks.tasks import collect_orphan_media
 
 
 
@@ -35,30 +33,37 @@ def dashboard(request):
         except FlowerGrowth.DoesNotExist:
             stage = 0
         flower_image_url = get_flower_stage_image(stage) 
+        flower_webp_url = flower_image_url.replace('.png', '.webp') if settings.STATIC_WEBP_VARIANTS else None
 
         return render(request, 'pages/dashboard.html', {'journal_entries' : JournalEntry.objects.filter(user=request.user),
-                                                        'flower_image_url' : flower_image_url,})
+                                                        'flower_image_url' : flower_image_url,
+                                                        'flower_webp_url' : flower_webp_url,})
 
 
 @login_required
+@read_replica
+@conditional_page
 def journal_log(request):
     start_date = timezone.now() - timedelta(days=30)
     end_date = timezone.now()
-    query = Q(user=request.user)
+    entries = JournalEntry.objects.filter(user=request.user)
     search_key = request.POST.get('search')
     if search_key:
-         query &= Q(title__icontains=search_key) | Q(text__icontains=search_key) 
-    last_30_days_query = query & Q(created_at__range=(start_date, end_date))
-    return render(request, 'pages/journal_log.html', {'journal_entries' : JournalEntry.objects.filter(query).order_by('-created_at'),
-                                                      'journal_entries_last_thirty_days' :  JournalEntry.objects.filter(last_30_days_query).order_by('-created_at')})
+         entries = entries.search(search_key)
+    journal_entries = render_entry_cards(entries.order_by('-created_at'), 'log')
+    journal_entries_last_thirty_days = [entry for entry in journal_entries if start_date <= entry.created_at <= end_date]
+    return render(request, 'pages/journal_log.html', {'journal_entries' : journal_entries,
+                                                      'journal_entries_last_thirty_days' : journal_entries_last_thirty_days})
 
 @login_required
+@read_replica
+@conditional_page
 def favourites(request):
-    query = Q(user=request.user) & Q(favourited=True)
+    entries = JournalEntry.objects.filter(Q(user=request.user) & Q(favourited=True))
     search_key = request.POST.get('search')
     if search_key:
-         query &= Q(title__icontains=search_key) | Q(text__icontains=search_key)
-    return render(request, 'pages/favourites.html', {'journal_entries' : JournalEntry.objects.filter(query)})
+         entries = entries.search(search_key)
+    return render(request, 'pages/favourites.html', {'journal_entries' : render_entry_cards(entries, 'favourite')})
 
 @login_required
 def templates(request):
@@ -79,25 +84,39 @@ def templates(request):
     return render(request, 'pages/templates.html',context)
 
 @login_required
+@conditional_page
 def trash(request):
     query = Q(user=request.user) & Q(deleted=True) & Q( permanently_deleted=False)
     query_templates = Q(deleted=True) & Q( permanently_deleted=False) & Q(user = request.user)
+    entries = JournalEntry.objects.filter(query)
     search_key = request.POST.get('search')
     if search_key:
-         query &= Q(title__icontains=search_key) | Q(text__icontains=search_key)
+         entries = entries.search(search_key)
     
     context = {
-        'journal_entries': JournalEntry.objects.filter(query),
-        'templates': Template.objects.filter(query_templates)
+        'journal_entries': render_entry_cards(entries, 'trash'),
+        'templates': Template.objects.filter(query_templates),
+        'retention_days': settings.TRASH_RETENTION_DAYS,
     }
     return render(request, 'pages/trash.html',context)
 
+@login_required
+def empty_trash(request):
+    if request.method == 'POST':
+        deleted = purge(JournalEntry.objects.filter(user=request.user, deleted=True))
+        purge(Template.objects.filter(user=request.user, deleted=True))
+        bump_page_generation([request.user.pk])
+        if deleted:
+            collect_orphan_media.delay()
+        messages.add_message(request, messages.SUCCESS, "Trash emptied!")
+    return redirect('trash')
+
 
 @login_prohibited
 def home(request):
     """Display the application's start/home screen."""
 
-    return render(request, 'pages/home.html')
+    return render(request, 'pages/home.html', {'static_webp_variants': settings.STATIC_WEBP_VARIANTS})
 
 
 def get_flower_stage_image(stage):
@@ -0,0 +1,51 @@
+"""Fill the per-process caches before gunicorn forks its workers.
+
+With preload_app, the gunicorn master loads the application once. It then calls
+warm_up, so the URL resolver, the compiled templates and the card template
+fingerprints are built once and shared with every worker. The workers do not
+each rebuild them on their first requests. gc.freeze moves everything loaded so
+far out of the garbage collector's reach. Without that, a collection in a
+worker would write to the shared pages and copy them.
+"""
+import gc
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+from tasks.entry_cards import CARD_TEMPLATES, template_fingerprint
+
+
+def warm_url_resolver():
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def warm_templates():
+    """Compile every template of this project, leaving those of installed packages to load on use."""
+
+    count = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory)
+            if not directory.is_relative_to(settings.BASE_DIR):
+                continue
+            for path in sorted(directory.rglob('*.html')):
+                engine.get_template(path.relative_to(directory).as_posix())
+                count += 1
+    for template_name in CARD_TEMPLATES.values():
+        template_fingerprint(template_name)
+    return count
+
+
+def warm_up():
+    """Warm the caches, then freeze the heap so forked workers keep sharing it."""
+
+    url_names = warm_url_resolver()
+    templates = warm_templates()
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    return {'url_names': url_names, 'templates': templates}